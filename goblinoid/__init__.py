@@ -22,3 +22,13 @@ __author__ = "Fridolin Pokorny"
 __version__ = "0.1.0"
 
 from .create import create_schema
+from .create import submit_schema
+from .decorators import composite_index
+from .decorators import consistency
+from .decorators import data_types
+from .decorators import mixed_index
+from .decorators import edge_index
+from .decorators import multiplicity
+from .decorators import ttl
+from .decorators import vertex_label
+from .lifecycle import IndexLifecycle
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Advisors checking schema description for storage-efficiency and write contention issues.
+
+String keys are flagged if their names suggest values of a narrower type (e.g. timestamps, counters, flags
+or UUIDs) or if they are used as sort keys of vertex-centric indexes, where strings are ordered
+lexicographically and take more space than numbers or dates.
+
+Consistency modifiers are checked for combinations known to cause lock contention under concurrent writes.
+
+Traversals found in query logs are checked for filters not answered by any composite, mixed or vertex-centric
+index, index definitions are suggested for them.
+"""
+
+import collections
+import re
+import typing
+
+from .enums import PropertyDataType
+from .traversal import EdgeLookup
+from .traversal import GraphLookup
+from .traversal import extract_lookups
+from .traversal import find_traversals
+from .traversal import parse_traversal
+
+# Patterns matched against names of String keys (split into lowercase words) and data types suggested.
+_NAME_PATTERNS = (
+    (
+        re.compile(r"(^|_)(date|datetime|time|timestamp|ts|created|updated|modified|deleted|expires|[a-z]+ed_at)($|_)"),
+        PropertyDataType.DATE,
+        "name suggests a point in time",
+    ),
+    (re.compile(r"(^|_)(uuid|guid)($|_)"), PropertyDataType.UUID, "name suggests a UUID"),
+    (
+        re.compile(r"(^|_)(count|counter|size|length|total|num|number|amount|port|age|duration|seconds|bytes)($|_)"),
+        PropertyDataType.LONG,
+        "name suggests an integral number",
+    ),
+    (
+        re.compile(r"(^|_)(ratio|score|rate|percent|percentage|weight|probability|latitude|longitude)($|_)"),
+        PropertyDataType.DOUBLE,
+        "name suggests a floating point number",
+    ),
+    (
+        re.compile(r"^(is|has|can|should|was)_|(^|_)(enabled|disabled|flag|active|valid)$"),
+        PropertyDataType.BOOLEAN,
+        "name suggests a flag",
+    ),
+    (
+        re.compile(r"(^|_)(location|geo|geoshape|coordinates)($|_)"),
+        PropertyDataType.GEOSHAPE,
+        "name suggests a location",
+    ),
+)
+
+# Pattern matched against names of keys (split into lowercase words) which are likely written frequently.
+_HIGH_WRITE_PATTERN = re.compile(r"(^|_)(updated|modified|last|seen|count|counter|status|state|score|hits)($|_)")
+
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+# Patterns used to find index definitions in Groovy index files.
+_BUILD_INDEX = re.compile(
+    r"buildIndex\(\s*['\"](?P<name>[^'\"]+)['\"]\s*,"
+    r"\s*(?:[\w.]+\.)?(?P<element>Vertex|Edge|JanusGraphVertex|JanusGraphEdge)\.class"
+    r"(?P<body>.*?)\.build(?P<index_type>Composite|Mixed)Index\(",
+    re.DOTALL,
+)
+_BUILD_EDGE_INDEX = re.compile(
+    r"buildEdgeIndex\(\s*(?:mgmt\.getEdgeLabel\(\s*['\"](?P<label>[^'\"]+)['\"]\s*\)|(?P<label_var>\w+))\s*,"
+    r"\s*['\"](?P<name>[^'\"]+)['\"]\s*,\s*(?:[\w.]+\.)?(?P<direction>OUT|IN|BOTH)\s*,"
+    r"\s*(?:[\w.]+\.)?(?P<order>(?i:asc|desc|incr|decr))\s*,(?P<keys>.*?)\)\s*(?:\.build\(\s*\))?\s*;?\s*$",
+    re.MULTILINE,
+)
+_ADD_KEY = re.compile(r"addKey\(\s*(?:mgmt\.getPropertyKey\(\s*['\"](?P<key>[^'\"]+)['\"]\s*\)|(?P<key_var>\w+))")
+_INDEX_ONLY = re.compile(
+    r"indexOnly\(\s*(?:mgmt\.get(?:Vertex|Edge)Label\(\s*['\"](?P<label>[^'\"]+)['\"]\s*\)|(?P<label_var>\w+))"
+)
+_KEY_REFERENCE = re.compile(r"mgmt\.getPropertyKey\(\s*['\"](?P<key>[^'\"]+)['\"]\s*\)|(?P<key_var>\w+)")
+
+# Definition of an index as stated in schema description.
+_IndexDefinition = typing.Dict[str, typing.Any]
+
+
+class DataTypeAdvice(typing.NamedTuple):
+    """A suggestion to change data type of a property key."""
+
+    key: str
+    data_type: PropertyDataType
+    suggested: typing.Optional[PropertyDataType]
+    reason: str
+
+
+def _normalize_name(name: str) -> str:
+    """Convert key name to lowercase words separated by underscores."""
+    return _CAMEL_CASE_BOUNDARY.sub("_", name).replace("-", "_").replace(".", "_").lower()
+
+
+def advise_data_types(schema: typing.Dict[str, typing.Any]) -> typing.List[DataTypeAdvice]:
+    """Flag String keys in the schema description which could use a narrower, more compact data type."""
+    sort_keys = {}
+    for edge_label, label_indexes in schema["edge_indexes"].items():
+        for index_name, index in label_indexes.items():
+            for key in index["keys"]:
+                sort_keys.setdefault(key, f"{edge_label}/{index_name}")
+
+    result = []
+    for key, definition in sorted(schema["property_keys"].items()):
+        data_type = PropertyDataType[definition["data_type"]]
+        if data_type != PropertyDataType.STRING or key.startswith("__"):
+            # Builtin keys used by Goblin are always strings.
+            continue
+
+        name = _normalize_name(key)
+        for pattern, suggested, reason in _NAME_PATTERNS:
+            if pattern.search(name):
+                result.append(DataTypeAdvice(key, data_type, suggested, reason))
+                break
+        else:
+            if key in sort_keys:
+                result.append(
+                    DataTypeAdvice(
+                        key,
+                        data_type,
+                        None,
+                        f"used as sort key of vertex-centric index {sort_keys[key]}, strings are ordered "
+                        "lexicographically",
+                    )
+                )
+
+    return result
+
+
+def check_consistency(schema: typing.Dict[str, typing.Any]) -> typing.List[str]:
+    """Find combinations of consistency modifiers and schema elements known to cause write contention."""
+    property_keys = schema["property_keys"]
+    result = []
+    for index_name, index in sorted(schema["indexes"].items()):
+        if index["index_type"] != "composite" or not index["unique"]:
+            continue
+
+        if index.get("consistency") != "LOCK":
+            continue
+
+        high_write_keys = [key for key in index["keys"] if _HIGH_WRITE_PATTERN.search(_normalize_name(key))]
+        if high_write_keys:
+            result.append(
+                f"Unique index {index_name!r} with LOCK consistency covers keys which are likely written "
+                f"frequently ({', '.join(high_write_keys)}), expect lock contention"
+            )
+
+    for key, definition in sorted(property_keys.items()):
+        if definition.get("consistency") != "LOCK":
+            continue
+
+        if definition["cardinality"] in ("SET", "LIST"):
+            result.append(
+                f"Property key {key!r} with cardinality {definition['cardinality']} uses LOCK consistency, "
+                f"each added value acquires locks"
+            )
+        elif _HIGH_WRITE_PATTERN.search(_normalize_name(key)):
+            result.append(f"Property key {key!r} is likely written frequently and uses LOCK consistency")
+
+    for edge_label, definition in sorted(schema["edge_labels"].items()):
+        if definition.get("consistency") == "LOCK" and definition.get("multiplicity", "MULTI") == "MULTI":
+            result.append(
+                f"Edge label {edge_label!r} with multiplicity MULTI uses LOCK consistency, edges added "
+                f"concurrently to the same vertices contend for locks - consider FORK"
+            )
+
+    return result
+
+
+class IndexAdvice(typing.NamedTuple):
+    """A suggestion to declare an index for filters not answered by any index."""
+
+    lookup: typing.Union[GraphLookup, EdgeLookup]
+    count: int
+    example: str
+    suggestion: str
+
+
+def _strip_variable(name: str) -> str:
+    """Turn a variable holding a schema element in Groovy into the element name, e.g. name_p to name."""
+    for suffix in ("_p", "_vl", "_el", "_key", "_label"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def parse_index_file(content: str) -> typing.Dict[str, typing.Any]:
+    """Find index definitions in a Groovy index file, return them in the form used in schema description.
+
+    Index files are written by hand, only usual forms of buildIndex and buildEdgeIndex calls are recognized.
+    Property keys and labels can be referenced using management lookups or variables named after them.
+    """
+    indexes = {}
+    for match in _BUILD_INDEX.finditer(content):
+        body = match.group("body")
+        index_only = _INDEX_ONLY.search(body)
+        label = None
+        if index_only:
+            label = index_only.group("label") or _strip_variable(index_only.group("label_var"))
+        indexes[match.group("name")] = {
+            "index_type": match.group("index_type").lower(),
+            "element": "vertex" if match.group("element").endswith("Vertex") else "edge",
+            "label": label,
+            "keys": [m.group("key") or _strip_variable(m.group("key_var")) for m in _ADD_KEY.finditer(body)],
+            "index_only": label is not None,
+        }
+
+    edge_indexes = {}
+    for match in _BUILD_EDGE_INDEX.finditer(content):
+        label = match.group("label") or _strip_variable(match.group("label_var"))
+        order = match.group("order").lower()
+        edge_indexes.setdefault(label, {})[match.group("name")] = {
+            "keys": [
+                m.group("key") or _strip_variable(m.group("key_var"))
+                for m in _KEY_REFERENCE.finditer(match.group("keys"))
+            ],
+            "direction": match.group("direction"),
+            "order": "DESC" if order in ("desc", "decr") else "ASC",
+        }
+
+    return {"indexes": indexes, "edge_indexes": edge_indexes}
+
+
+def collect_indexes(
+    schema: typing.Dict[str, typing.Any], index_file: typing.Optional[str] = None
+) -> typing.Tuple[typing.List[_IndexDefinition], typing.Dict[str, typing.List[_IndexDefinition]]]:
+    """Collect graph indexes and vertex-centric indexes per edge label from schema description and index file.
+
+    :param schema: schema description as created from models
+    :param index_file: content of the Groovy index file with additional index definitions
+    """
+    indexes = list(schema["indexes"].values())
+    edge_indexes = {label: list(label_indexes.values()) for label, label_indexes in schema["edge_indexes"].items()}
+    if index_file:
+        parsed = parse_index_file(index_file)
+        indexes.extend(parsed["indexes"].values())
+        for label, label_indexes in parsed["edge_indexes"].items():
+            edge_indexes.setdefault(label, []).extend(label_indexes.values())
+
+    return indexes, edge_indexes
+
+
+def _is_graph_lookup_covered(lookup: GraphLookup, indexes: typing.Iterable[typing.Dict[str, typing.Any]]) -> bool:
+    """Check whether any graph index can answer the lookup."""
+    keys = set(lookup.keys) | set(lookup.range_keys)
+    for index in indexes:
+        if index["element"] != lookup.element:
+            continue
+        if index["index_only"] and index["label"] is not None and index["label"] != lookup.label:
+            continue
+
+        if index["index_type"] == "composite":
+            # Composite indexes need an equality condition on all of their keys.
+            if set(index["keys"]) <= set(lookup.keys):
+                return True
+        elif keys & set(index["keys"]):
+            return True
+
+    return False
+
+
+def _is_edge_lookup_covered(lookup: EdgeLookup, edge_indexes: typing.Iterable[typing.Dict[str, typing.Any]]) -> bool:
+    """Check whether any vertex-centric index can answer the lookup."""
+    keys = set(lookup.keys)
+    if lookup.order:
+        keys.add(lookup.order[0])
+
+    for index in edge_indexes:
+        if index["direction"] not in ("BOTH", lookup.direction):
+            continue
+        # Conditions and ordering need to be stated on a prefix of sort keys.
+        if index["keys"] and index["keys"][0] in keys:
+            return True
+
+    return False
+
+
+def is_lookup_covered(
+    lookup: typing.Union[GraphLookup, EdgeLookup],
+    indexes: typing.Iterable[typing.Dict[str, typing.Any]],
+    edge_indexes: typing.Dict[str, typing.Iterable[typing.Dict[str, typing.Any]]],
+) -> bool:
+    """Check whether the lookup can be answered by any of the given graph or vertex-centric indexes."""
+    if isinstance(lookup, GraphLookup):
+        return _is_graph_lookup_covered(lookup, indexes)
+    return _is_edge_lookup_covered(lookup, edge_indexes.get(lookup.edge_label, ()))
+
+
+def suggest_index(lookup: typing.Union[GraphLookup, EdgeLookup]) -> str:
+    """Suggest a decorator declaring an index which answers the lookup."""
+    if isinstance(lookup, EdgeLookup):
+        keys = list(lookup.keys)
+        order = "ASC"
+        if lookup.order:
+            order = lookup.order[1]
+            if lookup.order[0] not in keys:
+                keys.append(lookup.order[0])
+        arguments = ", ".join(repr(key) for key in keys)
+        return (
+            f"@edge_index({arguments}, direction=IndexDirection.{lookup.direction}, order=IndexOrder.{order}) "
+            f"on the edge model with label {lookup.edge_label!r}"
+        )
+
+    keys = list(lookup.keys) + [key for key in lookup.range_keys if key not in lookup.keys]
+    arguments = ", ".join(repr(key) for key in keys)
+    # Range and text predicates can be answered only by mixed indexes.
+    decorator = "mixed_index" if lookup.range_keys else "composite_index"
+    if lookup.label is None:
+        return f"@{decorator}({arguments}) on the {lookup.element} model defining the keys"
+    return f"@{decorator}({arguments}, index_only=True) on the {lookup.element} model with label {lookup.label!r}"
+
+
+def advise_indexes(
+    schema: typing.Dict[str, typing.Any], query_log: typing.Iterable[str], index_file: typing.Optional[str] = None
+) -> typing.List[IndexAdvice]:
+    """Find filters of traversals in the query log not answered by any index, ranked by their frequency.
+
+    :param schema: schema description as created from models
+    :param query_log: lines of a query log, traversals starting with g.V() or g.E() are found in them
+    :param index_file: content of the Groovy index file with additional index definitions
+    """
+    indexes, edge_indexes = collect_indexes(schema, index_file)
+    counter = collections.Counter()
+    examples = {}
+    for line in query_log:
+        for traversal in find_traversals(line):
+            for lookup in extract_lookups(parse_traversal(traversal)):
+                if not is_lookup_covered(lookup, indexes, edge_indexes):
+                    counter[lookup] += 1
+                    examples.setdefault(lookup, "g." + traversal.strip())
+
+    return [
+        IndexAdvice(lookup, count, examples[lookup], suggest_index(lookup))
+        for lookup, count in counter.most_common()
+    ]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Create schemas for multiple models modules in one run.
+
+Entries are described in a JSON manifest - a list of objects, each stating at least module_import,
+models_iterable and output; optionally index_file, snapshot_file, previous_snapshot_file, output_format,
+chunk_size and static_discovery accepted by create_schema:
+
+  [
+    {"module_import": "thoth.storages.graph.models", "models_iterable": "ALL_MODELS", "output": "thoth.groovy"},
+    {"module_import": "myapp.models", "models_iterable": "MODELS", "output": "myapp.groovy", "index_file": "i.groovy"}
+  ]
+
+Relative paths are resolved against the directory holding the manifest. Entries are independent and they are
+processed in a pool of processes, a failure of one entry is reported and does not affect other entries.
+"""
+
+import concurrent.futures
+import json
+import logging
+import os
+import time
+import traceback
+import typing
+
+from .create import create_schema
+from .exceptions import BatchManifestError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Entry fields holding paths, resolved relatively to the manifest.
+_PATH_FIELDS = ("output", "index_file", "snapshot_file", "previous_snapshot_file")
+
+
+class BatchEntry(typing.NamedTuple):
+    """An entry of batch manifest."""
+
+    module_import: str
+    models_iterable: str
+    output: str
+    index_file: typing.Optional[str] = None
+    snapshot_file: typing.Optional[str] = None
+    previous_snapshot_file: typing.Optional[str] = None
+    output_format: str = "script"
+    chunk_size: typing.Optional[int] = None
+    static_discovery: bool = False
+
+
+class BatchResult(typing.NamedTuple):
+    """Result of processing one entry of batch manifest."""
+
+    entry: BatchEntry
+    duration: float
+    error: typing.Optional[str] = None
+
+
+def load_manifest(file: str) -> typing.List[BatchEntry]:
+    """Load entries stated in the given batch manifest."""
+    try:
+        with open(file, "r") as manifest_file:
+            content = json.load(manifest_file)
+    except (OSError, ValueError) as exc:
+        raise BatchManifestError(f"Failed to load batch manifest {file!r}: {str(exc)}") from exc
+
+    if not isinstance(content, list):
+        raise BatchManifestError(f"Batch manifest {file!r} should be a list of entries")
+
+    base_dir = os.path.dirname(os.path.abspath(file))
+    entries = []
+    for idx, item in enumerate(content):
+        if not isinstance(item, dict):
+            raise BatchManifestError(f"Entry #{idx} in batch manifest {file!r} is not an object")
+
+        unknown_fields = set(item) - set(BatchEntry._fields)
+        if unknown_fields:
+            raise BatchManifestError(
+                f"Unknown fields stated in entry #{idx} in batch manifest {file!r}: {sorted(unknown_fields)}"
+            )
+
+        try:
+            entry = BatchEntry(**item)
+        except TypeError as exc:
+            raise BatchManifestError(f"Invalid entry #{idx} in batch manifest {file!r}: {str(exc)}") from exc
+
+        entries.append(
+            entry._replace(
+                **{
+                    field: os.path.join(base_dir, getattr(entry, field))
+                    for field in _PATH_FIELDS
+                    if getattr(entry, field)
+                }
+            )
+        )
+
+    return entries
+
+
+def _process_entry(entry: BatchEntry) -> BatchResult:
+    """Create schema for the given entry, report failure in the result instead of raising."""
+    start = time.monotonic()
+    try:
+        create_schema(
+            entry.module_import,
+            entry.models_iterable,
+            entry.output,
+            entry.index_file,
+            snapshot_file=entry.snapshot_file,
+            previous_snapshot_file=entry.previous_snapshot_file,
+            output_format=entry.output_format,
+            chunk_size=entry.chunk_size,
+            static_discovery=entry.static_discovery,
+        )
+    except Exception as exc:
+        _LOGGER.debug("Processing of entry %r failed:\n%s", entry, traceback.format_exc())
+        return BatchResult(entry, time.monotonic() - start, f"{exc.__class__.__name__}: {str(exc)}")
+
+    return BatchResult(entry, time.monotonic() - start)
+
+
+def run_batch(entries: typing.Sequence[BatchEntry], workers: int = None) -> typing.List[BatchResult]:
+    """Create schema for each entry, entries are processed in parallel.
+
+    :param entries: entries to process
+    :param workers: number of worker processes, defaults to number of processors; entries are processed
+                    sequentially in the current process if set to 1
+    :return: results in the order of entries
+    """
+    if workers == 1:
+        return [_process_entry(entry) for entry in entries]
+
+    results = []
+    # Worker processes are forked from this process, so Goblin and Gremlin Python are imported only once.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_process_entry, entry) for entry in entries]
+        for entry, future in zip(entries, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                # Worker died (e.g. killed on memory) or the result could not be transferred.
+                results.append(BatchResult(entry, 0.0, f"{exc.__class__.__name__}: {str(exc)}"))
+
+    return results
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark schema creation on synthetic Goblin models.
+
+A module with models of the requested shape is generated, schema is created from it in each output format
+and wall time, peak memory, import time of the generated module and size of the resulting script are
+recorded. Results can be stored as a baseline and later runs fail if they regress past it:
+
+  $ python3 -m goblinoid.benchmark --vertex-classes 2000 --save-baseline benchmark.json
+  $ python3 -m goblinoid.benchmark --vertex-classes 2000 --baseline benchmark.json --tolerance 0.2
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import click
+
+from .create import create_schema
+from .groovy import WRITERS
+
+_LOGGER = logging.getLogger(__name__)
+
+_BASELINE_FORMAT_VERSION = 1
+# Goblin data types generated, property keys shared by multiple classes always get the same type.
+_DATA_TYPES = ("String", "Integer", "Float", "Boolean")
+# Metrics compared against baseline.
+METRICS = ("wall_time", "peak_memory", "import_time", "script_size")
+
+
+class ModelShape(typing.NamedTuple):
+    """Shape of generated synthetic models."""
+
+    vertex_classes: int = 100
+    edge_classes: int = 50
+    properties_per_class: int = 10
+    # Number of properties in each class stored under a property key shared with other classes.
+    shared_keys: int = 2
+    indexes_per_class: int = 1
+
+
+class BenchmarkResult(typing.NamedTuple):
+    """Result of benchmarking one output format."""
+
+    wall_time: float
+    peak_memory: int
+    import_time: float
+    script_size: int
+
+
+def _get_property_lines(class_name: str, property_class: str, shape: ModelShape) -> typing.List[str]:
+    """Generate property declarations of a model class."""
+    lines = []
+    for idx in range(shape.properties_per_class):
+        data_type = _DATA_TYPES[idx % len(_DATA_TYPES)]
+        if idx < shape.shared_keys:
+            db_name = f"shared_{idx}"
+        else:
+            db_name = f"{class_name.lower()}_{idx}"
+        lines.append(f"    p{idx} = goblin.{property_class}(goblin.{data_type}, db_name={db_name!r})")
+
+    return lines
+
+
+def _get_index_lines(shape: ModelShape) -> typing.List[str]:
+    """Generate index declarations of a model class, composite and mixed indexes are alternated."""
+    lines = []
+    for idx in range(min(shape.indexes_per_class, shape.properties_per_class)):
+        decorator = "composite_index" if idx % 2 == 0 else "mixed_index"
+        lines.append(f"@{decorator}('p{idx}')")
+
+    return lines
+
+
+def generate_models_source(shape: ModelShape) -> str:
+    """Generate source of a module with synthetic models, models are available in ALL_MODELS iterable."""
+    lines = ["import goblin", "", "from goblinoid import composite_index", "from goblinoid import mixed_index", ""]
+    class_names = []
+    for kind, count, property_class in (
+        ("Vertex", shape.vertex_classes, "VertexProperty"),
+        ("Edge", shape.edge_classes, "Property"),
+    ):
+        for idx in range(count):
+            class_name = f"{kind}{idx}"
+            class_names.append(class_name)
+            lines.append("")
+            lines.extend(_get_index_lines(shape))
+            lines.append(f"class {class_name}(goblin.{kind}):")
+            lines.extend(_get_property_lines(class_name, property_class, shape) or ["    pass"])
+            lines.append("")
+
+    lines.append("")
+    lines.append(f"ALL_MODELS = ({', '.join(class_names)},)")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _benchmark_output_format(
+    module_name: str, output_format: str, output_dir: str, repeat: int
+) -> BenchmarkResult:
+    """Benchmark schema creation from the generated module in the given output format."""
+    start = time.monotonic()
+    importlib.import_module(module_name)
+    import_time = time.monotonic() - start
+
+    output_file = os.path.join(output_dir, f"schema-{output_format}.groovy")
+    wall_time = None
+    for _ in range(repeat):
+        start = time.monotonic()
+        create_schema(module_name, "ALL_MODELS", output_file, output_format=output_format)
+        duration = time.monotonic() - start
+        wall_time = duration if wall_time is None else min(wall_time, duration)
+
+    # Measure memory in a separate run, tracing allocations would distort wall time.
+    tracemalloc.start()
+    try:
+        create_schema(module_name, "ALL_MODELS", output_file, output_format=output_format)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        wall_time=wall_time,
+        peak_memory=peak_memory,
+        import_time=import_time,
+        script_size=os.path.getsize(output_file),
+    )
+
+
+def run_benchmark(
+    shape: ModelShape, output_formats: typing.Iterable[str] = None, repeat: int = 3
+) -> typing.Dict[str, BenchmarkResult]:
+    """Benchmark schema creation from synthetic models of the given shape in each output format.
+
+    :param shape: shape of generated models
+    :param output_formats: output formats benchmarked, all available output formats if not provided
+    :param repeat: number of runs, the fastest one is reported as wall time
+    :return: results keyed by output format
+    """
+    results = {}
+    source = generate_models_source(shape)
+    # Generated modules import Goblin, import it upfront so that it is not accounted to the first output format.
+    importlib.import_module("goblin")
+    with tempfile.TemporaryDirectory(prefix="goblinoid-benchmark-") as work_dir:
+        sys.path.insert(0, work_dir)
+        try:
+            for output_format in output_formats or sorted(WRITERS):
+                # Use a fresh module for each output format so that its import time is measured.
+                module_name = f"goblinoid_benchmark_models_{output_format}"
+                with open(os.path.join(work_dir, f"{module_name}.py"), "w") as module_file:
+                    module_file.write(source)
+
+                _LOGGER.info("Benchmarking output format %r", output_format)
+                results[output_format] = _benchmark_output_format(module_name, output_format, work_dir, repeat)
+                sys.modules.pop(module_name, None)
+        finally:
+            sys.path.remove(work_dir)
+
+    return results
+
+
+def save_baseline(file: str, shape: ModelShape, results: typing.Dict[str, BenchmarkResult]) -> None:
+    """Store benchmark results as a baseline for later runs."""
+    with open(file, "w") as baseline_file:
+        json.dump(
+            {
+                "version": _BASELINE_FORMAT_VERSION,
+                "shape": shape._asdict(),
+                "results": {output_format: result._asdict() for output_format, result in results.items()},
+            },
+            baseline_file,
+            sort_keys=True,
+            indent=2,
+        )
+
+
+def load_baseline(file: str) -> typing.Tuple[ModelShape, typing.Dict[str, BenchmarkResult]]:
+    """Load benchmark results stored as a baseline."""
+    with open(file, "r") as baseline_file:
+        content = json.load(baseline_file)
+
+    if content.get("version") != _BASELINE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported baseline format version {content.get('version')!r} in {file!r}")
+
+    return (
+        ModelShape(**content["shape"]),
+        {output_format: BenchmarkResult(**result) for output_format, result in content["results"].items()},
+    )
+
+
+def find_regressions(
+    results: typing.Dict[str, BenchmarkResult],
+    baseline: typing.Dict[str, BenchmarkResult],
+    tolerance: float = 0.2,
+) -> typing.List[str]:
+    """Compare results with baseline, return description of each metric that regressed past tolerance."""
+    regressions = []
+    for output_format, result in sorted(results.items()):
+        baseline_result = baseline.get(output_format)
+        if baseline_result is None:
+            _LOGGER.warning("No baseline for output format %r", output_format)
+            continue
+
+        for metric in METRICS:
+            value = getattr(result, metric)
+            baseline_value = getattr(baseline_result, metric)
+            if value > baseline_value * (1 + tolerance):
+                regressions.append(
+                    f"{output_format}: {metric} regressed from {baseline_value:g} to {value:g} "
+                    f"({(value / baseline_value - 1) * 100 if baseline_value else float('inf'):.1f}% worse)"
+                )
+
+    return regressions
+
+
+@click.command()
+@click.option("--vertex-classes", type=click.IntRange(min=0), default=ModelShape().vertex_classes, show_default=True)
+@click.option("--edge-classes", type=click.IntRange(min=0), default=ModelShape().edge_classes, show_default=True)
+@click.option(
+    "--properties-per-class", type=click.IntRange(min=0), default=ModelShape().properties_per_class, show_default=True
+)
+@click.option(
+    "--shared-keys",
+    type=click.IntRange(min=0),
+    default=ModelShape().shared_keys,
+    show_default=True,
+    help="Number of properties in each class stored under property keys shared across classes.",
+)
+@click.option(
+    "--indexes-per-class", type=click.IntRange(min=0), default=ModelShape().indexes_per_class, show_default=True
+)
+@click.option(
+    "--output-format",
+    "output_formats",
+    type=click.Choice(sorted(WRITERS)),
+    multiple=True,
+    help="Output formats benchmarked, all if not provided.",
+)
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="Number of timed runs.")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Fail if results regress past results stored in the given baseline file.",
+)
+@click.option(
+    "--tolerance",
+    type=click.FloatRange(min=0),
+    default=0.2,
+    show_default=True,
+    help="Relative worsening of a metric tolerated before it is reported as a regression.",
+)
+@click.option(
+    "--save-baseline", "baseline_output", type=click.Path(dir_okay=False), help="Store results as a baseline."
+)
+def main(
+    vertex_classes,
+    edge_classes,
+    properties_per_class,
+    shared_keys,
+    indexes_per_class,
+    output_formats,
+    repeat,
+    baseline,
+    tolerance,
+    baseline_output,
+):
+    """Benchmark schema creation on synthetic Goblin models."""
+    shape = ModelShape(
+        vertex_classes=vertex_classes,
+        edge_classes=edge_classes,
+        properties_per_class=properties_per_class,
+        shared_keys=shared_keys,
+        indexes_per_class=indexes_per_class,
+    )
+    results = run_benchmark(shape, output_formats, repeat)
+    for output_format, result in sorted(results.items()):
+        click.echo(
+            f"{output_format}: wall time {result.wall_time:.3f}s, peak memory {result.peak_memory / 1024:.0f}KiB, "
+            f"import time {result.import_time:.3f}s, script size {result.script_size}B"
+        )
+
+    if baseline_output:
+        save_baseline(baseline_output, shape, results)
+
+    if baseline:
+        baseline_shape, baseline_results = load_baseline(baseline)
+        if baseline_shape != shape:
+            raise click.UsageError(f"Baseline was recorded for different model shape: {baseline_shape}")
+
+        regressions = find_regressions(results, baseline_results, tolerance)
+        for regression in regressions:
+            click.echo(f"Regression: {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Cache of generated scripts keyed by a fingerprint of all inputs.
+
+Fingerprint is computed from sources of the package holding models (without importing it), content of
+index file and snapshot used, Goblinoid version and options used to generate the script. Models can be defined
+in modules outside of that package, digests of sources of all modules defining models are stored in cache entries
+and checked on lookup. On cache hit, the script and schema description are taken from the cache and models are
+not imported at all.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import typing
+
+from . import __version__ as goblinoid_version
+from .discovery import find_module_source
+from .discovery import iter_package_sources
+from .exceptions import StaticDiscoveryError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Suffix of files holding cache entries.
+_ENTRY_SUFFIX = ".json"
+
+
+def _get_default_cache_dir() -> str:
+    """Get default directory for cached entries, respect XDG base directory specification."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "goblinoid")
+
+
+def _hash_file(digest: typing.Any, path: str) -> None:
+    """Update digest with content of the given file."""
+    with open(path, "rb") as input_file:
+        for block in iter(lambda: input_file.read(65536), b""):
+            digest.update(block)
+
+
+def hash_module_sources(module_names: typing.Iterable[str]) -> typing.Dict[str, str]:
+    """Compute digests of sources of the given modules, without importing them.
+
+    :return: a mapping of paths to source files to their digests, modules without sources found are skipped
+    """
+    result = {}
+    for module_name in sorted(set(module_names)):
+        found = find_module_source(module_name)
+        if found is None:
+            _LOGGER.debug("Sources of module %r not found, changes in it will not invalidate cache", module_name)
+            continue
+
+        digest = hashlib.sha256()
+        _hash_file(digest, found[0])
+        result[found[0]] = digest.hexdigest()
+
+    return result
+
+
+def _sources_changed(sources: typing.Dict[str, str]) -> bool:
+    """Check whether any of sources recorded by hash_module_sources changed."""
+    for path, expected in sources.items():
+        digest = hashlib.sha256()
+        try:
+            _hash_file(digest, path)
+        except FileNotFoundError:
+            return True
+        if digest.hexdigest() != expected:
+            return True
+
+    return False
+
+
+class BuildCache:
+    """A size-bounded cache of generated scripts, least recently used entries are evicted first."""
+
+    def __init__(self, cache_dir: str = None, max_size: int = 64 * 1024 * 1024):
+        """Initialize cache.
+
+        :param cache_dir: directory holding cache entries, defaults to goblinoid directory in user's cache directory
+        :param max_size: maximum size of all cache entries in bytes
+        """
+        self.cache_dir = cache_dir or _get_default_cache_dir()
+        self.max_size = max_size
+
+    def compute_key(
+        self,
+        module_import: str,
+        models_iterable: str,
+        files: typing.Iterable[typing.Optional[str]],
+        options: typing.Dict[str, typing.Any],
+    ) -> typing.Optional[str]:
+        """Compute cache key for the given inputs, None if sources of models cannot be found.
+
+        :param files: paths to additional input files (e.g. index file) affecting the result, None values are ignored
+        :param options: JSON serializable options affecting the result
+        """
+        digest = hashlib.sha256()
+        digest.update(
+            json.dumps(
+                {
+                    "version": goblinoid_version,
+                    "module_import": module_import,
+                    "models_iterable": models_iterable,
+                    "options": options,
+                },
+                sort_keys=True,
+            ).encode()
+        )
+
+        try:
+            for relative_path, file_path in iter_package_sources(module_import):
+                digest.update(relative_path.encode())
+                _hash_file(digest, file_path)
+        except StaticDiscoveryError:
+            _LOGGER.warning("Sources of module %r not found, cache will not be used", module_import)
+            return None
+
+        for file_path in files:
+            if file_path:
+                digest.update(file_path.encode())
+                _hash_file(digest, file_path)
+
+        return digest.hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        """Get path to the file holding cache entry."""
+        return os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """Get a cached entry, None on cache miss."""
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, "r") as entry_file:
+                entry = json.load(entry_file)
+        except FileNotFoundError:
+            _LOGGER.debug("Cache miss for key %r", key)
+            return None
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning("Ignoring broken cache entry %r: %s", entry_path, str(exc))
+            return None
+
+        if _sources_changed(entry.get("sources", {})):
+            _LOGGER.debug("Sources of models changed for key %r", key)
+            return None
+
+        # Mark entry as recently used.
+        os.utime(entry_path)
+        _LOGGER.debug("Cache hit for key %r", key)
+        return entry
+
+    def put(self, key: str, entry: typing.Dict[str, typing.Any]) -> None:
+        """Store a JSON serializable entry in the cache, evict least recently used entries if needed.
+
+        If the entry states sources (as computed by hash_module_sources), the entry is used only until any of them
+        changes.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._get_entry_path(key)
+        temporary_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as entry_file:
+            json.dump(entry, entry_file)
+        # Replace atomically so concurrent runs never see partially written entries.
+        os.replace(temporary_path, entry_path)
+        self._evict(keep=entry_path)
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used entries until the cache fits into its maximum size."""
+        entries = []
+        total_size = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(_ENTRY_SUFFIX):
+                continue
+
+            entry_path = os.path.join(self.cache_dir, file_name)
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            if entry_path == keep:
+                continue
+
+            _LOGGER.debug("Evicting cache entry %r", entry_path)
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Check Python sources for traversals filtering on keys not answered by any index.
+
+Sources are inspected statically - traversals written as a single chain of steps starting with
+session.traversal(Model), g.V() or g.E() are found, properties can be referenced by names of keys or as
+attributes of models (e.g. Package.name). Traversals composed across multiple statements are not inspected.
+"""
+
+import ast
+import logging
+import os
+import sys
+import typing
+
+from .advisor import collect_indexes
+from .advisor import is_lookup_covered
+from .advisor import suggest_index
+from .ir import SchemaIR
+from .traversal import Call
+from .traversal import EdgeLookup
+from .traversal import GraphLookup
+from .traversal import extract_lookups
+
+_LOGGER = logging.getLogger(__name__)
+
+# Names of Gremlin classes whose attributes are used as step arguments, e.g. T.label or Order.decr.
+_GREMLIN_NAMES = frozenset(("T", "P", "TextP", "Text", "Order"))
+# Names commonly imported from Gremlin classes and used as step arguments.
+_GREMLIN_TOKENS = frozenset(("label", "asc", "desc", "incr", "decr"))
+
+
+class _Unknown:
+    """An argument which cannot be evaluated statically, e.g. a variable."""
+
+    def __repr__(self) -> str:
+        return "<unknown>"
+
+
+_UNKNOWN = _Unknown()
+
+
+class TraversalFinding(typing.NamedTuple):
+    """A traversal in sources with filters not answered by any index."""
+
+    path: str
+    line: int
+    lookup: typing.Union[GraphLookup, EdgeLookup]
+    suggestion: str
+
+
+class _ModelInfo(typing.NamedTuple):
+    """Label of a model and names of keys its properties are stored under."""
+
+    element: str
+    label: str
+    db_names: typing.Dict[str, str]
+
+
+def _get_models(schema: SchemaIR) -> typing.Dict[str, _ModelInfo]:
+    """Map names of model classes to their labels and names of keys."""
+    result = {}
+    for element, labels in (("vertex", schema.vertex_labels), ("edge", schema.edge_labels)):
+        for label, record in labels.items():
+            result[record.model_class.__name__] = _ModelInfo(
+                element,
+                label,
+                {
+                    property_name: property_instance.getdb_name() or property_name
+                    for property_name, property_instance in record.model_class.__properties__.items()
+                },
+            )
+    return result
+
+
+def _get_name(node: ast.AST) -> typing.Optional[str]:
+    """Get name of a (qualified) name, e.g. Package for models.Package."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _to_value(node: ast.AST, models: typing.Dict[str, _ModelInfo]) -> typing.Any:
+    """Evaluate an argument of a step statically."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if sys.version_info < (3, 8) and isinstance(node, (ast.Str, ast.Num, ast.NameConstant)):
+        # Literals are parsed as constants since Python 3.8, the dedicated nodes are removed in Python 3.14.
+        return ast.literal_eval(node)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_to_value(item, models) for item in node.elts]
+    if isinstance(node, ast.Call):
+        name = _get_name(node.func)
+        if name is not None:
+            return Call(name, tuple(_to_value(arg, models) for arg in node.args))
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        model = models.get(node.value.id)
+        if model is not None and node.attr in model.db_names:
+            return model.db_names[node.attr]
+        if node.value.id in _GREMLIN_NAMES:
+            return node.attr
+    if isinstance(node, ast.Name) and node.id in _GREMLIN_TOKENS:
+        return node.id
+    return _UNKNOWN
+
+
+def _to_steps(node: ast.Call, models: typing.Dict[str, _ModelInfo]) -> typing.List[Call]:
+    """Turn a chain of calls into steps of a traversal, return an empty list if it is not a traversal."""
+    chain = []
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        chain.append(node)
+        node = node.func.value
+    chain.reverse()
+    if not chain:
+        return []
+
+    start = chain[0]
+    if start.func.attr == "traversal":
+        model = models.get(_get_name(start.args[0])) if len(start.args) == 1 else None
+        if model is None:
+            return []
+        steps = [Call("V" if model.element == "vertex" else "E", ()), Call("hasLabel", (model.label,))]
+    elif start.func.attr in ("V", "E"):
+        steps = [Call(start.func.attr, tuple(_to_value(arg, models) for arg in start.args))]
+    else:
+        return []
+
+    steps.extend(
+        Call(call.func.attr, tuple(_to_value(arg, models) for arg in call.args)) for call in chain[1:]
+    )
+    return steps
+
+
+def _iter_sources(paths: typing.Iterable[str]) -> typing.Iterator[str]:
+    """Iterate over Python sources in the given files and directories."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(directory for directory in dirs if not directory.startswith((".", "__pycache__")))
+            for file_name in sorted(files):
+                if file_name.endswith(".py"):
+                    yield os.path.join(root, file_name)
+
+
+def check_traversals(
+    paths: typing.Iterable[str], schema: SchemaIR, index_file: typing.Optional[str] = None
+) -> typing.List[TraversalFinding]:
+    """Find traversals in Python sources filtering on keys not answered by any index.
+
+    :param paths: Python files or directories to search for Python files
+    :param schema: schema IR built from models, models are referenced by their class names in sources
+    :param index_file: content of the Groovy index file with additional index definitions
+    """
+    models = _get_models(schema)
+    indexes, edge_indexes = collect_indexes(schema.describe(), index_file)
+
+    result = []
+    for path in _iter_sources(paths):
+        try:
+            with open(path, "r") as source_file:
+                tree = ast.parse(source_file.read(), filename=path)
+        except (OSError, SyntaxError, UnicodeDecodeError) as exc:
+            _LOGGER.warning("Skipping %r, the file cannot be parsed: %s", path, str(exc))
+            continue
+
+        # Only outermost calls of chains are inspected, inner calls are parts of the same traversal.
+        inner = {
+            id(node.func.value)
+            for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+        }
+        found = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or id(node) in inner:
+                continue
+
+            for lookup in extract_lookups(_to_steps(node, models)):
+                if (node.lineno, lookup) not in found and not is_lookup_covered(lookup, indexes, edge_indexes):
+                    found.add((node.lineno, lookup))
+                    result.append(TraversalFinding(path, node.lineno, lookup, suggest_index(lookup)))
+
+    return sorted(result, key=lambda finding: (finding.path, finding.line))
@@ -17,13 +17,34 @@
 
 """Goblinoid CLI."""
 
+import cProfile
+import json
 import logging
 
 import click
 import daiquiri
 
 from goblinoid import create_schema
+from goblinoid import IndexLifecycle
+from goblinoid import submit_schema
 from goblinoid import __version__ as goblinoid_version
+from goblinoid.advisor import advise_data_types
+from goblinoid.advisor import advise_indexes
+from goblinoid.batch import load_manifest
+from goblinoid.batch import run_batch
+from goblinoid.cache import BuildCache
+from goblinoid.checker import check_traversals
+from goblinoid.create import describe_schema
+from goblinoid.create import load_schema_ir
+from goblinoid.document import DOCUMENT_FORMATS
+from goblinoid.document import get_loader_script
+from goblinoid.groovy import WRITERS
+from goblinoid.lifecycle import REINDEX_BACKENDS
+from goblinoid.metrics import Metrics
+from goblinoid.profiler import profile_edge_list
+from goblinoid.profiler import profile_graphson
+from goblinoid.profiler import recommend
+from goblinoid.watch import watch_schema
 
 daiquiri.setup(level=logging.INFO)
 
@@ -38,7 +59,7 @@ def _print_version(ctx, _, value):
     ctx.exit()
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.pass_context
 @click.option("-v", "--verbose", is_flag=True, help="Be verbose about what's going on.")
 @click.option(
@@ -53,14 +74,14 @@ def _print_version(ctx, _, value):
     "--module-import",
     "-m",
     type=str,
-    required=True,
+    required=False,
     help="Python's import specification to a package/module from where models iterable should be imported.",
 )
 @click.option(
     "--models-iterable",
     "-i",
     type=str,
-    required=True,
+    required=False,
     help="A name of iterable that holds all models defined.",
 )
 @click.option(
@@ -70,7 +91,7 @@ def _print_version(ctx, _, value):
     required=False,
     default="./init.groovy",
     show_default=True,
-    help="Define a name and path of the resulting file.",
+    help="Define a name and path of the resulting file, use '-' to write to standard output.",
 )
 @click.option(
     "--index-file",
@@ -79,6 +100,176 @@ def _print_version(ctx, _, value):
     default=None,
     help="A path to index file to be used to append indexes the resulting file.",
 )
+@click.option(
+    "--snapshot-file",
+    type=click.Path(dir_okay=False, writable=True),
+    required=False,
+    default=None,
+    help="A path to a file where snapshot of the created schema should be stored.",
+)
+@click.option(
+    "--previous-snapshot-file",
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    required=False,
+    default=None,
+    help="A path to a snapshot of previously created schema, only new schema elements are written if provided.",
+)
+@click.option(
+    "--schema-document",
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    required=False,
+    default=None,
+    help="Create schema from the given JSON or binary schema document instead of importing models.",
+)
+@click.option(
+    "--document-file",
+    type=click.Path(dir_okay=False, writable=True),
+    required=False,
+    default=None,
+    help="A path to a file where schema document of the created schema should be stored.",
+)
+@click.option(
+    "--document-format",
+    type=click.Choice(DOCUMENT_FORMATS),
+    required=False,
+    default="json",
+    show_default=True,
+    help="Form of the stored schema document, binary form is gzip compressed JSON.",
+)
+@click.option(
+    "--output-format",
+    type=click.Choice(sorted(WRITERS)),
+    required=False,
+    default="script",
+    show_default=True,
+    help="Format of the resulting script, compact format states schema as data processed by a fixed loader.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    required=False,
+    default=None,
+    help="Apply schema in chunks of about the given number of schema elements, each committed in its own "
+    "transaction; indexes share a chunk with their keys and schema elements are created only if missing, so "
+    "rerunning applied chunks has no effect.",
+)
+@click.option(
+    "--submit",
+    is_flag=True,
+    help="Submit schema directly to Gremlin Server instead of writing the resulting file.",
+)
+@click.option(
+    "--host",
+    "hosts",
+    type=str,
+    multiple=True,
+    default=("localhost",),
+    show_default=True,
+    help="Gremlin Server host to submit schema to, can be supplied multiple times.",
+)
+@click.option(
+    "--port",
+    type=int,
+    default=8182,
+    show_default=True,
+    help="Port of Gremlin Server to submit schema to.",
+)
+@click.option(
+    "--max-inflight",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Maximum number of chunks submitted to Gremlin Server at the same time.",
+)
+@click.option(
+    "--index-lifecycle",
+    is_flag=True,
+    help="Wait for registration, reindex and enable created indexes, needed if indexed keys already hold data.",
+)
+@click.option(
+    "--index-timeout",
+    type=click.IntRange(min=1),
+    default=600,
+    show_default=True,
+    help="Timeout in seconds for each index to change its status or to be reindexed.",
+)
+@click.option(
+    "--reindex-parallelism",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of indexes reindexed in parallel.",
+)
+@click.option(
+    "--reindex-backend",
+    type=click.Choice(REINDEX_BACKENDS),
+    default="local",
+    show_default=True,
+    help="Reindex data in JanusGraph instance or using MapReduce.",
+)
+@click.option(
+    "--static-discovery",
+    is_flag=True,
+    help="Discover models by static analysis of sources instead of importing them.",
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=False,
+    show_default=True,
+    help="Reuse previously generated script if sources of models, index file and options did not change.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, writable=True),
+    metavar="DIR",
+    help="Directory holding cached scripts, defaults to goblinoid directory in user's cache directory.",
+)
+@click.option(
+    "--cache-size",
+    type=click.IntRange(min=0),
+    default=64 * 1024 * 1024,
+    show_default=True,
+    metavar="BYTES",
+    help="Maximum size of cached scripts, least recently used scripts are evicted first.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Watch sources of models and create schema again each time they change, runs until interrupted.",
+)
+@click.option(
+    "--watch-interval",
+    type=click.FloatRange(min=0.05),
+    default=0.5,
+    show_default=True,
+    metavar="SECONDS",
+    help="Interval in which sources are checked for changes in watch mode.",
+)
+@click.option("--timings", is_flag=True, help="Print time and memory spent in each phase.")
+@click.option(
+    "--metrics-json",
+    type=click.Path(dir_okay=False, writable=True),
+    metavar="FILE",
+    help="Write time and memory spent in each phase and counts of created schema elements as JSON.",
+)
+@click.option(
+    "--trace-allocations",
+    is_flag=True,
+    help="Record memory allocated in each phase in timings and metrics, slows down the run considerably.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False, writable=True),
+    metavar="FILE",
+    help="Profile the whole run using cProfile, write statistics to the given file.",
+)
+@click.option(
+    "--lookups-file",
+    type=click.Path(dir_okay=False, writable=True),
+    metavar="FILE",
+    help="Generate a Python module with index-backed lookup helpers for Goblin sessions into the given file.",
+)
 def cli(
     ctx=None,
     verbose=0,
@@ -88,6 +279,32 @@ def cli(
     schema_vertex_identifier=None,
     output_file=None,
     index_file=None,
+    snapshot_file=None,
+    previous_snapshot_file=None,
+    schema_document=None,
+    document_file=None,
+    document_format=None,
+    output_format=None,
+    chunk_size=None,
+    submit=False,
+    hosts=None,
+    port=None,
+    max_inflight=None,
+    index_lifecycle=False,
+    index_timeout=None,
+    reindex_parallelism=None,
+    reindex_backend=None,
+    static_discovery=False,
+    use_cache=False,
+    cache_dir=None,
+    cache_size=None,
+    watch=False,
+    watch_interval=None,
+    timings=False,
+    metrics_json=None,
+    trace_allocations=False,
+    profile=None,
+    lookups_file=None,
 ):
     """Create graph database schema automatically from source code."""
     if ctx:
@@ -98,13 +315,312 @@ def cli(
         _LOGGER.debug("Debug mode turned on")
         _LOGGER.debug(f"Passed options: {locals()}")
 
-    _LOGGER.info(f"Creating schema, writing result into {output_file.name}")
-    create_schema(
-        module_import,
-        models_iterable,
-        output_file.name,
-        index_file.name if index_file else None,
-    )
+    if ctx and ctx.invoked_subcommand:
+        return
+
+    # Options are required only when creating schema from models, sub-commands do not use them.
+    if not module_import and not schema_document:
+        raise click.MissingParameter(ctx=ctx, param_hint="'--module-import' / '-m'", param_type="option")
+    if not models_iterable and not schema_document:
+        raise click.MissingParameter(ctx=ctx, param_hint="'--models-iterable' / '-i'", param_type="option")
+    if schema_document and (watch or lookups_file):
+        raise click.UsageError("Watch mode and lookup helpers need models, they cannot be used with a schema document")
+
+    lifecycle = None
+    if index_lifecycle:
+        lifecycle = IndexLifecycle(timeout=index_timeout, parallelism=reindex_parallelism, backend=reindex_backend)
+
+    if watch:
+        if submit or not isinstance(output_file, click.utils.LazyFile):
+            raise click.UsageError("Watch mode can be used only when writing the resulting script into a file")
+        if lookups_file:
+            raise click.UsageError("Lookup helpers cannot be generated in watch mode")
+        if timings or metrics_json or profile:
+            raise click.UsageError("Timings, metrics and profiling are not available in watch mode")
+
+        _LOGGER.info(f"Creating schema in watch mode, writing result into {output_file.name}")
+        try:
+            watch_schema(
+                module_import,
+                models_iterable,
+                output_file.name,
+                interval=watch_interval,
+                static_discovery=static_discovery,
+                index_file=index_file.name if index_file else None,
+                snapshot_file=snapshot_file,
+                previous_snapshot_file=previous_snapshot_file,
+                output_format=output_format,
+                chunk_size=chunk_size,
+                index_lifecycle=lifecycle,
+            )
+        except KeyboardInterrupt:
+            _LOGGER.info("Watch mode interrupted")
+        return
+
+    metrics = None
+    if timings or metrics_json:
+        metrics = Metrics(trace_allocations=trace_allocations)
+
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        if submit:
+            _LOGGER.info(f"Creating schema, submitting to {', '.join(hosts)} on port {port}")
+            submit_schema(
+                module_import,
+                models_iterable,
+                list(hosts),
+                port,
+                index_file.name if index_file else None,
+                snapshot_file=snapshot_file,
+                previous_snapshot_file=previous_snapshot_file,
+                chunk_size=chunk_size,
+                max_inflight=max_inflight,
+                index_lifecycle=lifecycle,
+                static_discovery=static_discovery,
+                metrics=metrics,
+                schema_document=schema_document,
+                document_file=document_file,
+                document_format=document_format,
+                lookups_file=lookups_file,
+                consistency_warnings=True,
+            )
+        else:
+            _LOGGER.info(f"Creating schema, writing result into {output_file.name}")
+            create_schema(
+                module_import,
+                models_iterable,
+                # Files are opened lazily by click, let Goblinoid open them only when needed; streams such as
+                # standard output are written directly.
+                output_file.name if isinstance(output_file, click.utils.LazyFile) else output_file,
+                index_file.name if index_file else None,
+                snapshot_file=snapshot_file,
+                previous_snapshot_file=previous_snapshot_file,
+                output_format=output_format,
+                chunk_size=chunk_size,
+                index_lifecycle=lifecycle,
+                static_discovery=static_discovery,
+                cache=BuildCache(cache_dir, cache_size) if use_cache else None,
+                metrics=metrics,
+                schema_document=schema_document,
+                document_file=document_file,
+                document_format=document_format,
+                lookups_file=lookups_file,
+                consistency_warnings=True,
+            )
+    finally:
+        if profiler:
+            profiler.disable()
+            _LOGGER.info(f"Writing profile statistics to {profile}")
+            profiler.dump_stats(profile)
+
+    if timings:
+        click.echo(metrics.format_summary(), err=True)
+
+    if metrics_json:
+        metrics.save(metrics_json)
+
+
+@cli.command("batch")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Number of worker processes, defaults to number of processors.",
+)
+def batch(manifest, workers=None):
+    """Create schemas for all entries stated in the given JSON manifest."""
+    entries = load_manifest(manifest)
+    _LOGGER.info(f"Creating schema for {len(entries)} entries stated in {manifest}")
+    results = run_batch(entries, workers)
+
+    failed = 0
+    for result in results:
+        entry = f"{result.entry.module_import}:{result.entry.models_iterable} -> {result.entry.output}"
+        if result.error:
+            failed += 1
+            click.echo(f"FAILED {entry}: {result.error}", err=True)
+        else:
+            click.echo(f"OK     {entry} ({result.duration:.3f}s)", err=True)
+
+    if failed:
+        raise click.ClickException(f"Creating schema failed for {failed} out of {len(results)} entries")
+
+
+@cli.command("advise-storage")
+@click.option("--module-import", "-m", type=str, required=True, help="Module from where models iterable is imported.")
+@click.option("--models-iterable", "-i", type=str, required=True, help="A name of iterable that holds all models.")
+@click.option(
+    "--static-discovery",
+    is_flag=True,
+    help="Discover models by static analysis of sources instead of importing them.",
+)
+def advise_storage(module_import, models_iterable, static_discovery=False):
+    """Suggest narrower, more compact data types for String property keys."""
+    schema = describe_schema(module_import, models_iterable, static_discovery)
+    advices = advise_data_types(schema)
+    for advice in advices:
+        suggestion = f"consider {advice.suggested.name}" if advice.suggested else "consider a numeric or date type"
+        click.echo(f"{advice.key}: {advice.data_type.name}, {suggestion} - {advice.reason}")
+
+    if not advices:
+        _LOGGER.info("No property keys found that could use a more compact data type")
+
+
+@cli.command("advise-indexes")
+@click.argument("query_logs", metavar="QUERY_LOG", nargs=-1, required=True, type=click.File("r"))
+@click.option("--module-import", "-m", type=str, required=True, help="Module from where models iterable is imported.")
+@click.option("--models-iterable", "-i", type=str, required=True, help="A name of iterable that holds all models.")
+@click.option(
+    "--index-file",
+    type=click.File("r"),
+    required=False,
+    help="A path to Groovy file with additional index definitions to take into account.",
+)
+@click.option(
+    "--static-discovery",
+    is_flag=True,
+    help="Discover models by static analysis of sources instead of importing them.",
+)
+def advise_query_indexes(query_logs, module_import, models_iterable, index_file=None, static_discovery=False):
+    """Report filters of traversals in query logs not answered by any index, ranked by frequency.
+
+    Traversals starting with g.V() or g.E() are looked up in each line of the query logs ("-" for standard input).
+    """
+    schema = describe_schema(module_import, models_iterable, static_discovery)
+    lines = (line for query_log in query_logs for line in query_log)
+    advices = advise_indexes(schema, lines, index_file.read() if index_file else None)
+    for advice in advices:
+        click.echo(f"{advice.count}x {advice.example}")
+        click.echo(f"    suggested: {advice.suggestion}")
+
+    if not advices:
+        _LOGGER.info("All filters found in query logs are answered by indexes")
+
+
+@cli.command("profile-sample")
+@click.argument("sample", type=click.File("r"))
+@click.option("--module-import", "-m", type=str, required=True, help="Module from where models iterable is imported.")
+@click.option("--models-iterable", "-i", type=str, required=True, help="A name of iterable that holds all models.")
+@click.option(
+    "--sample-format",
+    type=click.Choice(["graphson", "csv"]),
+    help="Format of the sample, derived from the file extension if not stated (.csv for CSV edge list).",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=10000,
+    show_default=True,
+    help="Number of lines of the sample processed at once.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Number of worker processes profiling GraphSON samples, defaults to number of processors.",
+)
+@click.option(
+    "--supernode-degree",
+    type=click.IntRange(min=1),
+    default=100000,
+    show_default=True,
+    help="Degree of vertices for which partitioning of their label is recommended.",
+)
+@click.option(
+    "--vci-degree",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Degree of vertices for which vertex-centric indexes on incident edges are recommended.",
+)
+@click.option(
+    "--statistics-json",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write degree histograms and statistics of property keys computed on the sample to a JSON file.",
+)
+@click.option(
+    "--static-discovery",
+    is_flag=True,
+    help="Discover models by static analysis of sources instead of importing them.",
+)
+def profile_sample(
+    sample,
+    module_import,
+    models_iterable,
+    sample_format=None,
+    chunk_size=10000,
+    workers=None,
+    supernode_degree=100000,
+    vci_degree=1000,
+    statistics_json=None,
+    static_discovery=False,
+):
+    """Profile a GraphSON or CSV edge list data sample and recommend schema changes for models."""
+    schema = load_schema_ir(module_import, models_iterable, static_discovery)
+    if sample_format is None:
+        sample_format = "csv" if sample.name.lower().endswith(".csv") else "graphson"
+
+    _LOGGER.info(f"Profiling {sample_format} sample {sample.name}")
+    if sample_format == "csv":
+        profile = profile_edge_list(sample, chunk_size)
+    else:
+        profile = profile_graphson(sample, chunk_size, workers)
+
+    if statistics_json:
+        with open(statistics_json, "w") as statistics_file:
+            json.dump(profile.describe(), statistics_file, indent=2)
+
+    recommendations = recommend(profile, schema, supernode_degree, vci_degree)
+    for recommendation in recommendations:
+        click.echo(f"{recommendation.element} ({recommendation.kind}): {recommendation.suggestion}")
+        click.echo(f"    {recommendation.reason}")
+
+    if not recommendations:
+        _LOGGER.info("No schema changes recommended based on the sample")
+
+
+@cli.command("check-traversals")
+@click.argument("paths", metavar="PATH", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--module-import", "-m", type=str, required=True, help="Module from where models iterable is imported.")
+@click.option("--models-iterable", "-i", type=str, required=True, help="A name of iterable that holds all models.")
+@click.option(
+    "--index-file",
+    type=click.File("r"),
+    required=False,
+    help="A path to Groovy file with additional index definitions to take into account.",
+)
+@click.option(
+    "--static-discovery",
+    is_flag=True,
+    help="Discover models by static analysis of sources instead of importing them.",
+)
+def check_source_traversals(paths, module_import, models_iterable, index_file=None, static_discovery=False):
+    """Report traversals in Python sources filtering on keys not answered by any index."""
+    schema = load_schema_ir(module_import, models_iterable, static_discovery)
+    findings = check_traversals(paths, schema, index_file.read() if index_file else None)
+    for finding in findings:
+        click.echo(f"{finding.path}:{finding.line}: filter not answered by any index, suggested: {finding.suggestion}")
+
+    if findings:
+        raise click.ClickException(f"Found {len(findings)} filters of traversals not answered by any index")
+
+
+@cli.command("document-loader")
+@click.argument("document_path", metavar="DOCUMENT_PATH")
+@click.option(
+    "--output-file",
+    "-o",
+    type=click.File(mode="w"),
+    default="./loader.groovy",
+    show_default=True,
+    help="Define a name and path of the resulting file, use '-' to write to standard output.",
+)
+def document_loader(document_path, output_file):
+    """Write a script applying schema document stored on Gremlin Server side at DOCUMENT_PATH in bulk."""
+    output_file.write(get_loader_script(document_path))
 
 
 if __name__ == "__main__":
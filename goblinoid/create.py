@@ -17,227 +17,409 @@
 
 """Core creation of schema."""
 
+import contextlib
+import io
 import logging
 import typing
-import operator
-
-from goblin.element import Edge
-from goblin.element import Vertex
-from goblin.element import VertexProperty
-from goblin.properties import Property
-from gremlin_python.process.traversal import Cardinality
-import goblin.properties
-
-from .exceptions import InvalidElementError
-from .exceptions import UnsupportedPropertyCardinality
-from .exceptions import MultipleLabelsError
-from .exceptions import UnsupportedPropertyType
-from .exceptions import WrongPropertyType
+
+from .advisor import check_consistency
+from .cache import BuildCache
+from .cache import hash_module_sources
+from .discovery import discover_models
+from .document import DOCUMENT_FORMATS
+from .document import load_document
+from .document import save_document
+from .groovy import WRITERS
+from .ir import SchemaIR
+from .ir import build_schema_ir
+from .lifecycle import IndexLifecycle
+from .lookups import generate_lookups
+from .lookups import write_lookups
+from .metrics import Metrics
+from .schema import get_indexes_on_existing_elements
+from .snapshot import diff_schema
+from .snapshot import load_snapshot
+from .snapshot import save_snapshot
+from .submit import apply_schema
 from .utils import get_iterable_from_module
 
 
 _LOGGER = logging.getLogger(__name__)
-_FILE_PREPEND = """// Automatically generated file by Goblinoid.
-
-:remote connect tinkerpop.server conf/remote.yaml session
-:remote console
-
-
-mgmt = graph.openManagement()
-
-"""
-
-_FILE_APPEND = """
-mgmt.commit()
-"""
-
-_SUPPORTED_PROPERTY_TYPES = {
-    # In most cases we could just concatenate as the naming seems to be compatible, but let keep this extensible.
-    goblin.properties.String.__name__: "String.class",
-    goblin.properties.Integer.__name__: "Integer.class",
-    goblin.properties.Float.__name__: "Float.class",
-    goblin.properties.Boolean.__name__: "Boolean.class",
-    # These are supported by JanusGraph, but not supported by Goblin:
-    #   Character
-    #   Byte
-    #   Short
-    #   Long
-    #   Double
-    #   Date
-    #   Geoshape
-    #   UUID
-}
-
-
-def _get_property_type(
-    property_instance: typing.Union[VertexProperty, Property]
-) -> str:
-    """Get type of property based on classes defined in Goblin."""
-    type_str = _SUPPORTED_PROPERTY_TYPES.get(
-        property_instance.data_type.__class__.__name__
-    )
-    if type_str is None:
-        raise UnsupportedPropertyType(
-            f"Property type {type(property_instance.data_type)} is "
-            f"not supported by Goblinoid"
-        )
 
-    return type_str
+
+def _read_file(path: str) -> typing.Optional[str]:
+    """Read content of the given file, return None if the file does not exist."""
+    try:
+        with open(path, "r") as input_file:
+            return input_file.read()
+    except FileNotFoundError:
+        return None
+
+
+class _Tee:
+    """A write-only text stream writing to all the given streams, None streams are ignored, counts bytes written."""
+
+    __slots__ = ("streams", "written")
+
+    def __init__(self, *streams: typing.Optional[typing.TextIO]):
+        """Initialize tee writing into the given streams."""
+        self.streams = tuple(stream for stream in streams if stream is not None)
+        self.written = 0
+
+    def write(self, text: str) -> int:
+        """Write text to all streams."""
+        for stream in self.streams:
+            stream.write(text)
+        self.written += len(text.encode())
+        return len(text)
+
+
+@contextlib.contextmanager
+def _open_output(output_file: typing.Union[str, typing.TextIO]) -> typing.Iterator[typing.TextIO]:
+    """Open output file if a path is given, streams are flushed but left open to the caller."""
+    if isinstance(output_file, str):
+        with open(output_file, "w") as output:
+            yield output
+    else:
+        yield output_file
+        output_file.flush()
+
+
+def load_schema_ir(
+    module_import: str, models_iterable: str, static_discovery: bool = False, metrics: Metrics = None
+) -> SchemaIR:
+    """Load models and build schema IR out of them, schema elements refer to models defining them.
+
+    :param module_import: import specification of module holding models iterable
+    :param models_iterable: name of iterable that holds all models
+    :param static_discovery: discover models by static analysis of sources instead of importing them
+    :param metrics: if provided, time and memory spent in each phase is recorded
+    """
+    metrics = metrics or Metrics()
+    with metrics.phase("import"):
+        if static_discovery:
+            iterable = discover_models(module_import, models_iterable)
+        else:
+            iterable = get_iterable_from_module(module_import, models_iterable)
+
+    with metrics.phase("build"):
+        return build_schema_ir(iterable, module_import, models_iterable)
+
+
+def describe_schema(
+    module_import: str, models_iterable: str, static_discovery: bool = False, metrics: Metrics = None
+) -> typing.Dict[str, typing.Any]:
+    """Describe schema defined by models as a JSON serializable dictionary.
+
+    :param module_import: import specification of module holding models iterable
+    :param models_iterable: name of iterable that holds all models
+    :param static_discovery: discover models by static analysis of sources instead of importing them
+    :param metrics: if provided, time and memory spent in each phase is recorded
+    :return: schema description as stored in snapshots
+    """
+    # TODO: schema_vertex_identifier
+    return load_schema_ir(module_import, models_iterable, static_discovery, metrics).describe()
+
+
+def _warn_consistency(schema: typing.Dict[str, typing.Any]) -> None:
+    """Warn about consistency modifiers stated on schema elements known to cause write contention."""
+    for warning in check_consistency(schema):
+        _LOGGER.warning(warning)
 
 
-def _get_property_cardinality(property_instance: Cardinality) -> str:
-    """Convert Goblin's cardinality enum to its representation in Gremlin's groovy shell."""
-    if property_instance.cardinality == Cardinality.single:
-        return "org.janusgraph.core.Cardinality.SINGLE"
-    elif property_instance.cardinality == Cardinality.set_:
-        return "org.janusgraph.core.Cardinality.SET"
-    elif property_instance.cardinality == Cardinality.list_:
-        return "org.janusgraph.core.Cardinality.LIST"
+def _get_schema(
+    module_import: str,
+    models_iterable: str,
+    previous_snapshot_file: typing.Optional[str],
+    static_discovery: bool,
+    metrics: Metrics,
+    index_lifecycle: typing.Optional[IndexLifecycle],
+    schema_document: typing.Optional[str] = None,
+) -> typing.Tuple[typing.Optional[SchemaIR], typing.Dict[str, typing.Any], typing.Dict[str, typing.Any]]:
+    """Describe schema of models.
+
+    :return: schema IR (None if loaded from a schema document), schema description and description of schema
+             elements to be created
+    """
+    schema_ir = None
+    if schema_document:
+        _LOGGER.info("Loading schema from schema document %r, models are not imported", schema_document)
+        with metrics.phase("import"):
+            schema = load_document(schema_document)
     else:
-        raise UnsupportedPropertyCardinality(
-            f"Cardinality type {type(property_instance.cardinality)} is not supported"
+        schema_ir = load_schema_ir(module_import, models_iterable, static_discovery, metrics)
+        schema = schema_ir.describe()
+
+    return schema_ir, schema, _get_changes(schema, previous_snapshot_file, metrics, index_lifecycle)
+
+
+def _get_changes(
+    schema: typing.Dict[str, typing.Any],
+    previous_snapshot_file: typing.Optional[str],
+    metrics: Metrics,
+    index_lifecycle: typing.Optional[IndexLifecycle],
+) -> typing.Dict[str, typing.Any]:
+    """Get description of schema elements to be created or altered, record their counts."""
+    to_create = schema
+    previous = None
+    if previous_snapshot_file:
+        _LOGGER.info("Computing schema changes against snapshot %r", previous_snapshot_file)
+        with metrics.phase("diff"):
+            previous = load_snapshot(previous_snapshot_file)
+            to_create = diff_schema(previous, schema)
+
+    metrics.count_schema(to_create)
+    _warn_installed_indexes(to_create, previous, index_lifecycle)
+    return to_create
+
+
+def _generate_lookups(schema_ir: SchemaIR, module_import: str, models_iterable: str, metrics: Metrics) -> str:
+    """Generate a module with lookup helpers for indexes in the schema IR."""
+    with metrics.phase("lookups"):
+        output = io.StringIO()
+        count = generate_lookups(schema_ir, output, f"{module_import}:{models_iterable}")
+        _LOGGER.debug("Generated %d lookup helpers", count)
+        return output.getvalue()
+
+
+def _warn_installed_indexes(
+    schema: typing.Dict[str, typing.Any],
+    previous: typing.Optional[typing.Dict[str, typing.Any]],
+    index_lifecycle: typing.Optional[IndexLifecycle],
+) -> None:
+    """Warn about indexes which will not be enabled as keys they are built on were created in an earlier run."""
+    if index_lifecycle:
+        return
+
+    index_names = get_indexes_on_existing_elements(schema, previous)
+    if index_names:
+        _LOGGER.warning(
+            "Indexes built on property keys or edge labels created before are left installed and are not used "
+            "until enabled, use index lifecycle to enable them: %s",
+            ", ".join(index_names),
         )
 
 
 def create_schema(
     module_import: str,
     models_iterable: str,
-    output_file: str,
+    output_file: typing.Union[str, typing.TextIO],
     index_file: str = None,
+    snapshot_file: str = None,
+    previous_snapshot_file: str = None,
+    output_format: str = "script",
+    chunk_size: int = None,
+    index_lifecycle: IndexLifecycle = None,
+    static_discovery: bool = False,
+    cache: BuildCache = None,
+    metrics: Metrics = None,
+    schema_document: str = None,
+    document_file: str = None,
+    document_format: str = "json",
+    lookups_file: str = None,
+    schema: typing.Dict[str, typing.Any] = None,
+    consistency_warnings: bool = False,
 ) -> None:
     """Create a graph database schema.
 
-    :param module_import:
-    :param models_iterable:
-    :param output_file:
+    :param module_import: import specification of module holding models iterable
+    :param models_iterable: name of iterable that holds all models
+    :param output_file: path to the resulting groovy script or a text stream the script is written to
+    :param index_file: path to a file with index definitions appended to the resulting script
+    :param snapshot_file: path to a file where snapshot of the created schema should be stored
+    :param previous_snapshot_file: path to a snapshot from a previous run, only changes are written if provided
+    :param output_format: format of the resulting script, one of "script" or "compact"
+    :param chunk_size: split schema creation into transactions creating at most chunk_size schema elements
+    :param index_lifecycle: if provided, created indexes are awaited, reindexed and enabled as configured
+    :param static_discovery: discover models by static analysis of sources instead of importing them
+    :param cache: if provided, reuse a previously generated script if none of the inputs changed
+    :param metrics: if provided, time and memory spent in each phase is recorded
+    :param schema_document: path to a schema document to create schema from instead of importing models
+    :param document_file: path to a file where schema document of the created schema should be stored
+    :param document_format: form of the stored schema document, one of "json" or "binary"
+    :param lookups_file: path to a Python module with index-backed lookup helpers generated for models
+    :param schema: schema description as returned by describe_schema, models are not described again and cache is
+                   not used if provided
+    :param consistency_warnings: warn about consistency modifiers known to cause write contention
     :return: None
     """
-    iterable = get_iterable_from_module(module_import, models_iterable)
-    # TODO: schema_vertex_identifier
-
-    edge_labels = {}
-    vertex_labels = {}
-    properties = {}
-    for model_class in iterable:
-        if issubclass(model_class, Vertex):
-            existing_vertex_label = vertex_labels.get(model_class.__label__)
-            if existing_vertex_label:
-                raise MultipleLabelsError(
-                    f"Vertex label {model_class.__label__!r} found multiple times - "
-                    f"in class {model_class!r} and {existing_vertex_label!r}"
-                )
-            vertex_labels[model_class.__label__] = model_class
-        elif issubclass(model_class, Edge):
-            existing_edge_label = edge_labels.get(model_class.__label__)
-            if existing_edge_label:
-                raise MultipleLabelsError(
-                    f"Edge label {model_class.__label__!r} found multiple times - "
-                    f"in class {model_class!r} and {existing_vertex_label!r}"
-                )
-            edge_labels[model_class.__label__] = model_class
-        else:
-            raise InvalidElementError(
-                f"Element {model_class.__name__} from {module_import} present in "
-                f"iterable {models_iterable} is not of type "
-                f"goblin.element.Edge nor goblin.element.Vertex"
+    writer = WRITERS.get(output_format)
+    if writer is None:
+        raise ValueError(f"Unknown output format {output_format!r}, available formats: {', '.join(WRITERS)}")
+    if document_format not in DOCUMENT_FORMATS:
+        raise ValueError(
+            f"Unknown schema document format {document_format!r}, available formats: {', '.join(DOCUMENT_FORMATS)}"
+        )
+    if schema_document and lookups_file:
+        raise ValueError("Lookup helpers need models, they cannot be generated from a schema document")
+    if schema is not None and (schema_document or lookups_file):
+        raise ValueError("A schema description cannot be combined with a schema document or lookup helpers")
+
+    metrics = metrics or Metrics()
+    cache_key = None
+    entry = None
+    # Loading a schema document is cheap, cache is keyed by sources of models which are not used then.
+    if cache is not None and not schema_document and schema is None:
+        with metrics.phase("cache"):
+            cache_key = cache.compute_key(
+                module_import,
+                models_iterable,
+                files=(index_file, previous_snapshot_file),
+                options={
+                    "output_format": output_format,
+                    "chunk_size": chunk_size,
+                    "index_lifecycle": index_lifecycle._asdict() if index_lifecycle else None,
+                    "static_discovery": static_discovery,
+                    "lookups": lookups_file is not None,
+                },
             )
-
-        for property_name, property_instance in model_class.__properties__.items():
-            if not isinstance(property_instance, (Property, VertexProperty)):
-                _LOGGER.warning(
-                    f"Skipping property {property_name!r}, not of type Property nor VertexProperty"
-                )
-                continue
-
-            if isinstance(property_instance, Property) and issubclass(
-                model_class, Vertex
-            ):
-                raise WrongPropertyType(
-                    f"Property {property_name!r} in {model_class} is of "
-                    f"type {type(property_instance)}, but should be of type VertexProperty."
-                )
-            elif isinstance(property_instance, VertexProperty) and issubclass(
-                model_class, Edge
-            ):
-                raise WrongPropertyType(
-                    f"Property {property_name!r} in {model_class} is of "
-                    f"type {type(property_instance)}, but should be of type Property."
-                )
-
-            db_name = property_instance.getdb_name() or property_name
-            properties[db_name] = properties.get(db_name, []) + [property_instance]
-
-    with open(output_file, "w") as output:
-        output.write(_FILE_PREPEND)
-        for vertex_label in sorted(vertex_labels.keys()):
-            output.write(
-                f"{vertex_label}_vl = mgmt.getVertexLabel('{vertex_label}')\n"
-                f"if ({vertex_label}_vl == null)\n"
-                f"  {vertex_label}_vl = mgmt.makeVertexLabel('{vertex_label}').make()\n\n"
+            if cache_key is not None:
+                entry = cache.get(cache_key)
+
+    if entry is None:
+        if schema is None:
+            schema_ir, schema, to_write = _get_schema(
+                module_import,
+                models_iterable,
+                previous_snapshot_file,
+                static_discovery,
+                metrics,
+                index_lifecycle,
+                schema_document,
             )
-
-        output.write("\n")
-
-        for edge_label in sorted(edge_labels.keys()):
-            output.write(
-                f"{edge_label}_el = mgmt.getEdgeLabel('{edge_label}')\n"
-                f"if ({edge_label}_el == null)\n"
-                f"  {edge_label}_el = mgmt.makeEdgeLabel('{edge_label}').make()\n\n"
-            )
-
-        output.write("\n")
-
-        for property_db_name, property_instances in sorted(properties.items(), key=operator.itemgetter(0)):
-            property_type = _get_property_type(property_instances[0])
-            property_cardinality = None
-            if isinstance(property_instances[0], VertexProperty):
-                property_cardinality = _get_property_cardinality(property_instances[0])
-
-            for property_instance in property_instances[1:]:
-                next_property_type = _get_property_type(property_instance)
-                if next_property_type != property_type:
-                    raise ValueError(
-                        "Property type does not match for classes ... and class"
-                    )
-
-                if isinstance(property_instance, VertexProperty):
-                    next_property_cardinality = _get_property_cardinality(
-                        property_instance
-                    )
-                    property_cardinality = (
-                        property_cardinality or next_property_cardinality
-                    )
-                    if next_property_cardinality != property_cardinality:
-                        raise ValueError
-
-            output.write(
-                f"{property_db_name}_p = mgmt.getPropertyKey('{property_db_name}')\n"
-                f"if ({property_db_name}_p == null)\n"
-                f"  {property_db_name}_p = mgmt.makePropertyKey('{property_db_name}').dataType({property_type})"
+        else:
+            schema_ir, to_write = None, _get_changes(schema, previous_snapshot_file, metrics, index_lifecycle)
+        # Script is written to the output as it is generated, keep a copy only if it should be cached.
+        cached_script = io.StringIO() if cache_key is not None else None
+        with metrics.phase("write"), _open_output(output_file) as output:
+            tee = _Tee(output, cached_script)
+            writer(tee, to_write, index_file, chunk_size, index_lifecycle)
+            metrics.count("bytes_written", tee.written)
+
+        lookups = None
+        if lookups_file:
+            lookups = _generate_lookups(schema_ir, module_import, models_iterable, metrics)
+
+        entry = {"schema": schema, "lookups": lookups}
+        if cached_script is not None:
+            # Models can be defined outside of the package whose sources are hashed into the cache key.
+            labels = (*schema_ir.vertex_labels.values(), *schema_ir.edge_labels.values())
+            cache.put(
+                cache_key,
+                {
+                    "script": cached_script.getvalue(),
+                    "schema": schema,
+                    "lookups": lookups,
+                    "sources": hash_module_sources(record.model_class.__module__ for record in labels),
+                },
             )
-            if property_cardinality:
-                output.write(f".cardinality({property_cardinality})")
-            output.write(f".make()\n\n")
-
-        output.write(
-            "lbl = mgmt.getPropertyKey('__label__')\n"
-            "if (lbl == null)\n"
-            "  lbl = mgmt.makePropertyKey('__label__').dataType(String.class)"
-            f".cardinality(org.janusgraph.core.Cardinality.SINGLE).make()\n\n"
+    else:
+        _LOGGER.info("Inputs did not change, using cached script")
+        _get_changes(entry["schema"], previous_snapshot_file, metrics, index_lifecycle)
+        with metrics.phase("write"):
+            if not isinstance(output_file, str) or _read_file(output_file) != entry["script"]:
+                with _open_output(output_file) as output:
+                    output.write(entry["script"])
+                    metrics.count("bytes_written", len(entry["script"].encode()))
+            else:
+                _LOGGER.info("Output file %r is up to date", output_file)
+
+    schema = entry["schema"]
+    if consistency_warnings:
+        _warn_consistency(schema)
+
+    if snapshot_file:
+        _LOGGER.info("Writing schema snapshot to %r", snapshot_file)
+        with metrics.phase("snapshot"):
+            save_snapshot(snapshot_file, schema)
+
+    if document_file:
+        _LOGGER.info("Writing schema document to %r", document_file)
+        with metrics.phase("document"):
+            save_document(document_file, schema, document_format)
+
+    if lookups_file:
+        write_lookups(lookups_file, entry["lookups"])
+
+
+def submit_schema(
+    module_import: str,
+    models_iterable: str,
+    hosts: typing.List[str],
+    port: int = 8182,
+    index_file: str = None,
+    snapshot_file: str = None,
+    previous_snapshot_file: str = None,
+    chunk_size: int = None,
+    max_inflight: int = 8,
+    index_lifecycle: IndexLifecycle = None,
+    static_discovery: bool = False,
+    metrics: Metrics = None,
+    schema_document: str = None,
+    document_file: str = None,
+    document_format: str = "json",
+    lookups_file: str = None,
+    consistency_warnings: bool = False,
+) -> typing.Dict[str, float]:
+    """Create a graph database schema by submitting it directly to Gremlin Server.
+
+    :param module_import: import specification of module holding models iterable
+    :param models_iterable: name of iterable that holds all models
+    :param hosts: Gremlin Server hosts to connect to
+    :param port: port of Gremlin Server
+    :param index_file: path to a file with index definitions applied after schema is created
+    :param snapshot_file: path to a file where snapshot of the created schema should be stored
+    :param previous_snapshot_file: path to a snapshot from a previous run, only changes are applied if provided
+    :param chunk_size: split schema creation into transactions creating at most chunk_size schema elements
+    :param max_inflight: maximum number of chunks submitted at the same time
+    :param index_lifecycle: if provided, created indexes are awaited, reindexed and enabled as configured
+    :param static_discovery: discover models by static analysis of sources instead of importing them
+    :param metrics: if provided, time and memory spent in each phase is recorded
+    :param schema_document: path to a schema document to create schema from instead of importing models
+    :param document_file: path to a file where schema document of the created schema should be stored
+    :param document_format: form of the stored schema document, one of "json" or "binary"
+    :param lookups_file: path to a Python module with index-backed lookup helpers generated for models
+    :param consistency_warnings: warn about consistency modifiers known to cause write contention
+    :return: time in seconds spent on each submitted step
+    """
+    if schema_document and lookups_file:
+        raise ValueError("Lookup helpers need models, they cannot be generated from a schema document")
+
+    metrics = metrics or Metrics()
+    schema_ir, schema, to_submit = _get_schema(
+        module_import,
+        models_iterable,
+        previous_snapshot_file,
+        static_discovery,
+        metrics,
+        index_lifecycle,
+        schema_document,
+    )
+    if consistency_warnings:
+        _warn_consistency(schema)
+
+    with metrics.phase("submit"):
+        timings = apply_schema(
+            to_submit,
+            hosts,
+            port,
+            index_file=index_file,
+            chunk_size=chunk_size,
+            max_inflight=max_inflight,
+            index_lifecycle=index_lifecycle,
         )
 
-        output.write(
-            "type = mgmt.getPropertyKey('__type__')\n"
-            "if (type == null)\n"
-            "  type = mgmt.makePropertyKey('__type__').dataType(String.class)"
-            f".cardinality(org.janusgraph.core.Cardinality.SINGLE).make()\n\n"
-        )
+    if snapshot_file:
+        _LOGGER.info("Writing schema snapshot to %r", snapshot_file)
+        with metrics.phase("snapshot"):
+            save_snapshot(snapshot_file, schema)
 
-        if index_file:
-            _LOGGER.info("Adding indexes from file %r", index_file)
-            with open(index_file, 'r') as index_definitions:
-                output.write("//\n// Indexes defined for the schema.\n//\n\n")
-                output.write(index_definitions.read())
+    if document_file:
+        _LOGGER.info("Writing schema document to %r", document_file)
+        with metrics.phase("document"):
+            save_document(document_file, schema, document_format)
 
-        output.write(_FILE_APPEND)
+    if lookups_file:
+        write_lookups(lookups_file, _generate_lookups(schema_ir, module_import, models_iterable, metrics))
 
+    return timings
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Decorators used to annotate Goblin models with additional schema definitions.
+
+An example of usage:
+
+  @composite_index("package_name", "package_version", unique=True, index_only=True)
+  @mixed_index("description", mapping={"description": IndexMapping.TEXT})
+  class Package(goblin.Vertex):
+      package_name = goblin.VertexProperty(goblin.String)
+      package_version = goblin.VertexProperty(goblin.String)
+      description = goblin.VertexProperty(goblin.String)
+
+Keys are referenced by attribute names used in the model class, Goblinoid resolves them to
+names used in the graph database (respecting db_name if provided).
+
+Data types supported by JanusGraph, but not by Goblin, can be stated for properties explicitly:
+
+  @data_types(released=PropertyDataType.DATE, downloads=PropertyDataType.LONG)
+  class Release(goblin.Vertex):
+      released = goblin.VertexProperty(Date)
+      downloads = goblin.VertexProperty(goblin.Integer)
+
+Vertex models can state options of their vertex labels:
+
+  @vertex_label(partitioned=True)
+  class Package(goblin.Vertex):
+      ...
+
+Elements of short-lived models can expire automatically, time-to-live is stated in seconds or as timedelta
+(vertex labels with time-to-live need to be static):
+
+  @ttl(datetime.timedelta(days=7), status=3600)
+  @vertex_label(static=True)
+  class AnalysisResult(goblin.Vertex):
+      status = goblin.VertexProperty(goblin.String)
+
+Consistency modifiers of edge labels, property keys and composite indexes can be stated as well:
+
+  @consistency(ConsistencyModifier.FORK, weight=ConsistencyModifier.LOCK)
+  class DependsOn(goblin.Edge):
+      weight = goblin.Property(goblin.Integer)
+
+Edge models can additionally state multiplicity and vertex-centric indexes:
+
+  @multiplicity(EdgeMultiplicity.MANY2ONE)
+  @edge_index("since", direction=IndexDirection.OUT, order=IndexOrder.DESC)
+  class DependsOn(goblin.Edge):
+      since = goblin.Property(goblin.Integer)
+"""
+
+import datetime
+import typing
+
+from goblin.element import Edge
+from goblin.element import Vertex
+
+from .enums import ConsistencyModifier
+from .enums import EdgeMultiplicity
+from .enums import IndexDirection
+from .enums import IndexMapping
+from .enums import IndexOrder
+from .enums import PropertyDataType
+from .exceptions import ConsistencyDefinitionError
+from .exceptions import IndexDefinitionError
+from .exceptions import InvalidElementError
+from .exceptions import TTLDefinitionError
+
+# Name of attribute which holds index declarations on a model class.
+INDEXES_ATTR = "__goblinoid_indexes__"
+# Name of attribute which holds vertex-centric index declarations on an edge model class.
+EDGE_INDEXES_ATTR = "__goblinoid_edge_indexes__"
+# Name of attribute which holds multiplicity of an edge model class.
+MULTIPLICITY_ATTR = "__goblinoid_multiplicity__"
+# Name of attribute which holds options of a vertex label defined by a vertex model class.
+VERTEX_LABEL_ATTR = "__goblinoid_vertex_label__"
+# Name of attribute which holds time-to-live of a label and property keys declared on a model class.
+TTL_ATTR = "__goblinoid_ttl__"
+# Name of attribute which holds consistency modifiers of a label and property keys declared on a model class.
+CONSISTENCY_ATTR = "__goblinoid_consistency__"
+# Name of attribute which holds data types of property keys overriding types derived from Goblin data types.
+DATA_TYPES_ATTR = "__goblinoid_data_types__"
+
+
+class CompositeIndex(typing.NamedTuple):
+    """Declaration of a composite index."""
+
+    keys: typing.Tuple[str, ...]
+    name: typing.Optional[str] = None
+    unique: bool = False
+    index_only: bool = False
+    consistency: typing.Optional[ConsistencyModifier] = None
+
+
+class MixedIndex(typing.NamedTuple):
+    """Declaration of a mixed index."""
+
+    keys: typing.Tuple[str, ...]
+    name: typing.Optional[str] = None
+    backend: str = "search"
+    mapping: typing.Optional[typing.Dict[str, IndexMapping]] = None
+    index_only: bool = False
+
+
+class VertexLabel(typing.NamedTuple):
+    """Declaration of vertex label options."""
+
+    partitioned: bool = False
+    static: bool = False
+
+
+class TTL(typing.NamedTuple):
+    """Declaration of time-to-live of a label and property keys, in seconds."""
+
+    label: typing.Optional[int] = None
+    keys: typing.Optional[typing.Dict[str, int]] = None
+
+
+class Consistency(typing.NamedTuple):
+    """Declaration of consistency modifiers of a label and property keys."""
+
+    label: typing.Optional[ConsistencyModifier] = None
+    keys: typing.Optional[typing.Dict[str, ConsistencyModifier]] = None
+
+
+class EdgeIndex(typing.NamedTuple):
+    """Declaration of a vertex-centric index."""
+
+    keys: typing.Tuple[str, ...]
+    name: typing.Optional[str] = None
+    direction: IndexDirection = IndexDirection.BOTH
+    order: IndexOrder = IndexOrder.ASC
+
+
+def _add_index(
+    model_class: type,
+    index: typing.Union[CompositeIndex, MixedIndex, EdgeIndex],
+    attr_name: str = INDEXES_ATTR,
+) -> type:
+    """Register the given index declaration on model class."""
+    # Use class dictionary directly so that declarations are not inherited from base model classes.
+    indexes = model_class.__dict__.get(attr_name, ())
+    # Decorators are applied bottom-up, prepend to preserve order in which indexes were written.
+    setattr(model_class, attr_name, (index,) + tuple(indexes))
+    return model_class
+
+
+def _check_edge_model(model_class: type, decorator_name: str) -> None:
+    """Check the given model class is an edge model, raise an exception otherwise."""
+    if not isinstance(model_class, type) or not issubclass(model_class, Edge):
+        raise InvalidElementError(
+            f"Decorator {decorator_name!r} can be applied only on goblin.element.Edge, "
+            f"applied on {model_class!r}"
+        )
+
+
+def _check_vertex_model(model_class: type, decorator_name: str) -> None:
+    """Check the given model class is a vertex model, raise an exception otherwise."""
+    if not isinstance(model_class, type) or not issubclass(model_class, Vertex):
+        raise InvalidElementError(
+            f"Decorator {decorator_name!r} can be applied only on goblin.element.Vertex, "
+            f"applied on {model_class!r}"
+        )
+
+
+def composite_index(
+    *keys: str,
+    name: str = None,
+    unique: bool = False,
+    index_only: bool = False,
+    consistency: ConsistencyModifier = None,
+) -> typing.Callable[[type], type]:
+    """Declare a composite index on the decorated Vertex or Edge model.
+
+    :param keys: attribute names of properties the index should be built on
+    :param name: name of the index, derived from label and keys if not provided
+    :param unique: enforce uniqueness of the indexed keys
+    :param index_only: restrict the index only to the label of the decorated model
+    :param consistency: consistency modifier of the index, LOCK guarantees uniqueness under concurrent writes
+    """
+    if not keys:
+        raise IndexDefinitionError("No keys provided for composite index")
+
+    if consistency == ConsistencyModifier.FORK:
+        raise IndexDefinitionError("Consistency modifier FORK cannot be used for indexes")
+
+    def wrapper(model_class: type) -> type:
+        return _add_index(
+            model_class,
+            CompositeIndex(
+                keys=tuple(keys), name=name, unique=unique, index_only=index_only, consistency=consistency
+            ),
+        )
+
+    return wrapper
+
+
+def mixed_index(
+    *keys: str,
+    name: str = None,
+    backend: str = "search",
+    mapping: typing.Dict[str, IndexMapping] = None,
+    index_only: bool = False,
+) -> typing.Callable[[type], type]:
+    """Declare a mixed index on the decorated Vertex or Edge model.
+
+    :param keys: attribute names of properties the index should be built on
+    :param name: name of the index, derived from label and keys if not provided
+    :param backend: name of the indexing backend as configured in JanusGraph
+    :param mapping: an optional mapping of keys to the mapping used in indexing backend
+    :param index_only: restrict the index only to the label of the decorated model
+    """
+    if not keys:
+        raise IndexDefinitionError("No keys provided for mixed index")
+
+    unknown_keys = set(mapping or {}) - set(keys)
+    if unknown_keys:
+        raise IndexDefinitionError(
+            f"Mapping for mixed index defined for keys not present in the index: {sorted(unknown_keys)}"
+        )
+
+    def wrapper(model_class: type) -> type:
+        return _add_index(
+            model_class,
+            MixedIndex(
+                keys=tuple(keys),
+                name=name,
+                backend=backend,
+                mapping=dict(mapping) if mapping else None,
+                index_only=index_only,
+            ),
+        )
+
+    return wrapper
+
+
+def edge_index(
+    *keys: str,
+    name: str = None,
+    direction: IndexDirection = IndexDirection.BOTH,
+    order: IndexOrder = IndexOrder.ASC,
+) -> typing.Callable[[type], type]:
+    """Declare a vertex-centric index on the decorated Edge model.
+
+    :param keys: attribute names of edge properties the index should be sorted on
+    :param name: name of the index, derived from label, keys, direction and order if not provided
+    :param direction: direction of incident edges the index is built for
+    :param order: sort order of edges in the index
+    """
+    if not keys:
+        raise IndexDefinitionError("No keys provided for vertex-centric index")
+
+    def wrapper(model_class: type) -> type:
+        _check_edge_model(model_class, "edge_index")
+        return _add_index(
+            model_class,
+            EdgeIndex(keys=tuple(keys), name=name, direction=direction, order=order),
+            EDGE_INDEXES_ATTR,
+        )
+
+    return wrapper
+
+
+def multiplicity(value: EdgeMultiplicity) -> typing.Callable[[type], type]:
+    """State multiplicity of the decorated Edge model."""
+    if not isinstance(value, EdgeMultiplicity):
+        raise TypeError(f"Multiplicity should be of type {EdgeMultiplicity!r}, got {type(value)!r} instead")
+
+    def wrapper(model_class: type) -> type:
+        _check_edge_model(model_class, "multiplicity")
+        # Multiplicity is not inherited, each model defines its own label.
+        setattr(model_class, MULTIPLICITY_ATTR, value)
+        return model_class
+
+    return wrapper
+
+
+def data_types(**overrides: PropertyDataType) -> typing.Callable[[type], type]:
+    """State data types of property keys used by the decorated Vertex or Edge model.
+
+    Data types stated override data types derived from Goblin data types of properties. Keys are attribute
+    names of properties, data types stated on base model classes are inherited.
+    """
+    for key, value in overrides.items():
+        if not isinstance(value, PropertyDataType):
+            raise TypeError(
+                f"Data type of {key!r} should be of type {PropertyDataType!r}, got {type(value)!r} instead"
+            )
+
+    def wrapper(model_class: type) -> type:
+        declared = dict(getattr(model_class, DATA_TYPES_ATTR, {}))
+        declared.update(overrides)
+        setattr(model_class, DATA_TYPES_ATTR, declared)
+        return model_class
+
+    return wrapper
+
+
+def vertex_label(partitioned: bool = False, static: bool = False) -> typing.Callable[[type], type]:
+    """State options of the vertex label defined by the decorated Vertex model.
+
+    Options cannot be changed once the vertex label is created.
+
+    :param partitioned: partition vertices of the label across the cluster, suitable for vertices with many edges
+    :param static: vertices of the label cannot be modified once created
+    """
+
+    def wrapper(model_class: type) -> type:
+        _check_vertex_model(model_class, "vertex_label")
+        # Options are not inherited, each model defines its own label.
+        setattr(model_class, VERTEX_LABEL_ATTR, VertexLabel(partitioned=partitioned, static=static))
+        return model_class
+
+    return wrapper
+
+
+def _to_seconds(name: str, value: typing.Union[int, datetime.timedelta]) -> int:
+    """Convert the given time-to-live to seconds, check it is valid."""
+    if isinstance(value, datetime.timedelta):
+        value = value.total_seconds()
+
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 1 or value != int(value):
+        raise TTLDefinitionError(f"Time-to-live of {name} should be a positive whole number of seconds, got {value!r}")
+
+    return int(value)
+
+
+def ttl(
+    duration: typing.Union[int, datetime.timedelta] = None, **keys: typing.Union[int, datetime.timedelta]
+) -> typing.Callable[[type], type]:
+    """Declare time-to-live of elements of the decorated Vertex or Edge model and of its property keys.
+
+    :param duration: time-to-live of vertices or edges of the label defined by the model, in seconds or as timedelta
+    :param keys: time-to-live of property keys, keys are attribute names of properties
+    """
+    if duration is None and not keys:
+        raise TTLDefinitionError("No time-to-live stated")
+
+    declaration = TTL(
+        label=_to_seconds("label", duration) if duration is not None else None,
+        keys={key: _to_seconds(f"key {key!r}", value) for key, value in keys.items()} or None,
+    )
+
+    def wrapper(model_class: type) -> type:
+        # Time-to-live of a label is not inherited, each model defines its own label.
+        setattr(model_class, TTL_ATTR, declaration)
+        return model_class
+
+    return wrapper
+
+
+def consistency(
+    modifier: ConsistencyModifier = None, **keys: ConsistencyModifier
+) -> typing.Callable[[type], type]:
+    """Declare consistency modifiers of the edge label defined by the decorated model and of its property keys.
+
+    :param modifier: consistency modifier of the edge label, only edge models can state it
+    :param keys: consistency modifiers of property keys, keys are attribute names of properties
+    """
+    if modifier is None and not keys:
+        raise ConsistencyDefinitionError("No consistency modifier stated")
+
+    for key, value in [("label", modifier), *keys.items()]:
+        if value is not None and not isinstance(value, ConsistencyModifier):
+            raise TypeError(
+                f"Consistency modifier of {key!r} should be of type {ConsistencyModifier!r}, "
+                f"got {type(value)!r} instead"
+            )
+
+    def wrapper(model_class: type) -> type:
+        if modifier is not None:
+            _check_edge_model(model_class, "consistency")
+        # Consistency of a label is not inherited, each model defines its own label.
+        setattr(model_class, CONSISTENCY_ATTR, Consistency(label=modifier, keys=dict(keys) or None))
+        return model_class
+
+    return wrapper
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Discovery of models by static analysis of sources, without importing the application.
+
+Sources of modules are parsed using the ast module and models are reconstructed from class
+definitions found. Only Goblin, Goblinoid and Gremlin Python (and a few builtins) are imported
+and called when evaluating expressions, any other code of the application is never executed.
+"""
+
+import ast
+import builtins
+import importlib
+import logging
+import os
+import sys
+import types
+import typing
+
+from .exceptions import StaticDiscoveryError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Top level packages that are imported and used when evaluating expressions found in sources.
+_TRUSTED_PACKAGES = frozenset(("datetime", "goblin", "goblinoid", "gremlin_python"))
+# Builtins that can be called when evaluating expressions found in sources.
+_TRUSTED_BUILTINS = frozenset(("tuple", "list", "set", "frozenset", "dict", "str", "int", "float", "bool"))
+
+
+def find_module_source(module_name: str) -> typing.Optional[typing.Tuple[str, bool]]:
+    """Find source of the given module without importing it or its parent packages.
+
+    :return: path to the source file and a flag whether the module is a package, None if not found
+    """
+    parts = module_name.split(".")
+    for entry in sys.path:
+        base = os.path.join(entry or os.getcwd(), *parts)
+        init_path = os.path.join(base, "__init__.py")
+        if os.path.isfile(init_path):
+            return init_path, True
+        if os.path.isfile(base + ".py"):
+            return base + ".py", False
+
+    return None
+
+
+def iter_package_sources(module_name: str) -> typing.Iterator[typing.Tuple[str, str]]:
+    """Iterate over sources of the top level package holding the given module, without importing it.
+
+    :return: an iterator of relative paths within the package directory and absolute paths, in a stable order
+    """
+    found = find_module_source(module_name.split(".", maxsplit=1)[0])
+    if found is None:
+        raise StaticDiscoveryError(f"Sources of module {module_name!r} not found")
+
+    path, is_package = found
+    if not is_package:
+        yield os.path.basename(path), path
+        return
+
+    package_dir = os.path.dirname(path)
+    for root, dirs, files in os.walk(package_dir):
+        # Walk in a stable order, skip hidden and cache directories.
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+        for file_name in sorted(files):
+            if file_name.endswith(".py"):
+                file_path = os.path.join(root, file_name)
+                yield os.path.relpath(file_path, package_dir), file_path
+
+
+class _StaticModule:
+    """A parsed module together with its top level definitions."""
+
+    __slots__ = ("name", "path", "is_package", "classes", "imports", "assignments")
+
+    def __init__(self, name: str, path: str, is_package: bool):
+        """Parse source of the module, collect top level definitions."""
+        self.name = name
+        self.path = path
+        self.is_package = is_package
+        # Name to class definition.
+        self.classes = {}
+        # Name to qualified name of the imported object or module.
+        self.imports = {}
+        # Name to the last expression assigned.
+        self.assignments = {}
+
+        with open(path, "r") as source_file:
+            tree = ast.parse(source_file.read(), filename=path)
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                self.classes[node.name] = node
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = alias.name
+                    else:
+                        # The top level package is bound in case of "import a.b.c".
+                        top_level = alias.name.split(".", maxsplit=1)[0]
+                        self.imports[top_level] = top_level
+            elif isinstance(node, ast.ImportFrom):
+                source_module = self._get_import_source(node)
+                for alias in node.names:
+                    if alias.name != "*":
+                        self.imports[alias.asname or alias.name] = f"{source_module}.{alias.name}"
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        self.assignments[target.id] = node.value
+            elif isinstance(node, ast.AnnAssign) and node.value is not None and isinstance(node.target, ast.Name):
+                self.assignments[node.target.id] = node.value
+
+    def _get_import_source(self, node: ast.ImportFrom) -> str:
+        """Get absolute name of module from which names are imported."""
+        if not node.level:
+            return node.module
+
+        package = self.name if self.is_package else self.name.rpartition(".")[0]
+        for _ in range(node.level - 1):
+            package = package.rpartition(".")[0]
+
+        return f"{package}.{node.module}" if node.module else package
+
+    def location(self, node: ast.AST) -> str:
+        """Get location of the given node for reporting."""
+        return f"{self.path}:{getattr(node, 'lineno', '?')}"
+
+
+class _StaticDiscovery:
+    """Resolve names and evaluate expressions found in sources of the application."""
+
+    def __init__(self):
+        """Initialize caches of parsed modules and reconstructed classes."""
+        self._modules = {}
+        self._classes = {}
+        self._in_progress = set()
+
+    def get_module(self, module_name: str) -> typing.Optional[_StaticModule]:
+        """Get parsed module of the application, None if the module is not found."""
+        if module_name not in self._modules:
+            found = find_module_source(module_name)
+            try:
+                self._modules[module_name] = _StaticModule(module_name, *found) if found else None
+            except (OSError, SyntaxError) as exc:
+                raise StaticDiscoveryError(f"Failed to parse module {module_name}: {str(exc)}") from exc
+
+        return self._modules[module_name]
+
+    @staticmethod
+    def _import_trusted(qualified_name: str) -> typing.Any:
+        """Import an object from one of the trusted packages."""
+        parts = qualified_name.split(".")
+        for idx in range(len(parts), 0, -1):
+            try:
+                result = importlib.import_module(".".join(parts[:idx]))
+            except ImportError:
+                continue
+
+            try:
+                for attr in parts[idx:]:
+                    result = getattr(result, attr)
+            except AttributeError as exc:
+                raise StaticDiscoveryError(f"Failed to resolve {qualified_name}: {str(exc)}") from exc
+
+            return result
+
+        raise StaticDiscoveryError(f"Failed to import {qualified_name}")
+
+    def resolve(self, qualified_name: str) -> typing.Any:
+        """Resolve a fully qualified name to an object, parsed module or a reconstructed class."""
+        parts = qualified_name.split(".")
+        if parts[0] in _TRUSTED_PACKAGES:
+            return self._import_trusted(qualified_name)
+
+        for idx in range(len(parts), 0, -1):
+            module = self.get_module(".".join(parts[:idx]))
+            if module is not None:
+                result = module
+                for attr in parts[idx:]:
+                    result = self.get_attribute(result, attr)
+                return result
+
+        raise StaticDiscoveryError(f"Failed to find source of {qualified_name}")
+
+    def get_attribute(self, obj: typing.Any, name: str) -> typing.Any:
+        """Get attribute of an object or a top level name defined in a parsed module."""
+        if not isinstance(obj, _StaticModule):
+            try:
+                return getattr(obj, name)
+            except AttributeError as exc:
+                raise StaticDiscoveryError(str(exc)) from exc
+
+        if name in obj.classes:
+            return self.get_class(obj, obj.classes[name])
+        elif name in obj.imports:
+            return self.resolve(obj.imports[name])
+        elif name in obj.assignments:
+            return self.evaluate(obj, obj.assignments[name])
+
+        submodule = self.get_module(f"{obj.name}.{name}") if obj.is_package else None
+        if submodule is None:
+            raise StaticDiscoveryError(f"Name {name!r} not found in module {obj.name} ({obj.path})")
+
+        return submodule
+
+    def get_class(self, module: _StaticModule, node: ast.ClassDef) -> type:
+        """Reconstruct class from its definition, class body statements which cannot be evaluated are skipped."""
+        key = (module.name, node.name)
+        if key in self._classes:
+            return self._classes[key]
+
+        if key in self._in_progress:
+            raise StaticDiscoveryError(f"Cyclic definition of class {node.name} at {module.location(node)}")
+
+        self._in_progress.add(key)
+        try:
+            bases = tuple(self.evaluate(module, base) for base in node.bases)
+            namespace = {"__module__": module.name, "__qualname__": node.name}
+            for statement in node.body:
+                if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+                    target, value = statement.targets[0], statement.value
+                elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+                    target, value = statement.target, statement.value
+                else:
+                    continue
+
+                if not isinstance(target, ast.Name):
+                    continue
+
+                try:
+                    namespace[target.id] = self.evaluate(module, value)
+                except StaticDiscoveryError as exc:
+                    if target.id == "__label__":
+                        raise
+                    _LOGGER.warning(
+                        "Skipping attribute %r of class %s at %s: %s",
+                        target.id,
+                        node.name,
+                        module.location(statement),
+                        str(exc),
+                    )
+
+            result = types.new_class(node.name, bases, exec_body=lambda ns: ns.update(namespace))
+            # Decorators are applied bottom-up.
+            for decorator in reversed(node.decorator_list):
+                try:
+                    decorator_function = self.evaluate(module, decorator)
+                except StaticDiscoveryError as exc:
+                    _LOGGER.warning(
+                        "Skipping decorator of class %s at %s: %s", node.name, module.location(decorator), str(exc)
+                    )
+                    continue
+                result = self._call(module, decorator, decorator_function, [result], {})
+        finally:
+            self._in_progress.discard(key)
+
+        self._classes[key] = result
+        return result
+
+    def _call(
+        self,
+        module: _StaticModule,
+        node: ast.AST,
+        function: typing.Callable,
+        args: typing.List[typing.Any],
+        kwargs: typing.Dict[str, typing.Any],
+    ) -> typing.Any:
+        """Call the given function if it is safe to do so."""
+        function_module = getattr(function, "__module__", None) or ""
+        is_trusted_builtin = function_module == "builtins" and getattr(function, "__name__", None) in _TRUSTED_BUILTINS
+        if not is_trusted_builtin and function_module.split(".", maxsplit=1)[0] not in _TRUSTED_PACKAGES:
+            raise StaticDiscoveryError(f"Refusing to call {function!r} at {module.location(node)}")
+
+        try:
+            return function(*args, **kwargs)
+        except Exception as exc:
+            raise StaticDiscoveryError(f"Failed to evaluate call at {module.location(node)}: {str(exc)}") from exc
+
+    def evaluate(self, module: _StaticModule, node: ast.AST) -> typing.Any:
+        """Evaluate an expression found in the given module."""
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError):
+            pass
+
+        if isinstance(node, ast.Name):
+            if node.id in module.classes or node.id in module.imports or node.id in module.assignments:
+                return self.get_attribute(module, node.id)
+            if node.id in _TRUSTED_BUILTINS:
+                return getattr(builtins, node.id)
+            raise StaticDiscoveryError(f"Name {node.id!r} cannot be resolved at {module.location(node)}")
+        elif isinstance(node, ast.Attribute):
+            return self.get_attribute(self.evaluate(module, node.value), node.attr)
+        elif isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+            items = []
+            for item in node.elts:
+                if isinstance(item, ast.Starred):
+                    items.extend(self.evaluate(module, item.value))
+                else:
+                    items.append(self.evaluate(module, item))
+            if isinstance(node, ast.Tuple):
+                return tuple(items)
+            return items if isinstance(node, ast.List) else set(items)
+        elif isinstance(node, ast.Dict):
+            result = {}
+            for key, value in zip(node.keys, node.values):
+                if key is None:
+                    result.update(self.evaluate(module, value))
+                else:
+                    result[self.evaluate(module, key)] = self.evaluate(module, value)
+            return result
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left = self.evaluate(module, node.left)
+            right = self.evaluate(module, node.right)
+            if not isinstance(left, (tuple, list, str)) or type(left) != type(right):
+                raise StaticDiscoveryError(f"Unsupported concatenation at {module.location(node)}")
+            return left + right
+        elif isinstance(node, ast.Call):
+            function = self.evaluate(module, node.func)
+            args = []
+            for arg in node.args:
+                if isinstance(arg, ast.Starred):
+                    args.extend(self.evaluate(module, arg.value))
+                else:
+                    args.append(self.evaluate(module, arg))
+            kwargs = {}
+            for keyword in node.keywords:
+                if keyword.arg is None:
+                    kwargs.update(self.evaluate(module, keyword.value))
+                else:
+                    kwargs[keyword.arg] = self.evaluate(module, keyword.value)
+            return self._call(module, node, function, args, kwargs)
+
+        raise StaticDiscoveryError(f"Expression {type(node).__name__} cannot be evaluated at {module.location(node)}")
+
+
+def discover_models(module_import: str, models_iterable: str) -> typing.List[type]:
+    """Discover models stated in the given iterable by static analysis of sources, without importing them."""
+    discovery = _StaticDiscovery()
+    module = discovery.get_module(module_import)
+    if module is None:
+        raise StaticDiscoveryError(f"Failed to find source of module {module_import} in {sys.path}")
+
+    if models_iterable not in module.assignments and models_iterable not in module.imports:
+        raise StaticDiscoveryError(f"Iterable {models_iterable} is not assigned in module {module_import} ({module.path})")
+
+    result = discovery.get_attribute(module, models_iterable)
+    if not isinstance(result, typing.Iterable) or isinstance(result, (str, _StaticModule)):
+        raise StaticDiscoveryError(
+            f"Requested object {models_iterable} from module {module_import} is not iterable but {type(result)}"
+        )
+
+    return list(result)
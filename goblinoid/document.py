@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Schema documents - serialized schema description exchanged between build and deploy stages.
+
+A schema document states schema description together with the document format version and the version
+of Goblinoid which created it:
+
+  {"format": "goblinoid-schema", "version": 1, "goblinoid_version": "0.1.0", "schema": {...}}
+
+Documents are written either as JSON or in a compact binary form - gzip compressed JSON without whitespace.
+Binary documents are written deterministically, so the same schema always results in the same document.
+Loading a document does not require models, it can be used instead of importing them. The format is specific
+to Goblinoid, documents are applied by scripts generated by Goblinoid, not by JanusGraph's schema tooling.
+"""
+
+import gzip
+import io
+import json
+import logging
+import typing
+
+from . import __version__ as goblinoid_version
+from .exceptions import SchemaDocumentError
+from .groovy import get_document_loader_script
+from .schema import SCHEMA_SECTIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+_DOCUMENT_FORMAT = "goblinoid-schema"
+# Increase on incompatible changes in the document format.
+_DOCUMENT_FORMAT_VERSION = 1
+# Magic bytes of gzip streams used to recognize binary documents.
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Available forms of schema documents.
+DOCUMENT_FORMATS = ("json", "binary")
+
+
+def dump_document(schema: typing.Dict[str, typing.Any], document_format: str = "json") -> bytes:
+    """Serialize schema description into a schema document.
+
+    :param schema: schema description to serialize
+    :param document_format: form of the document, one of "json" or "binary"
+    """
+    if document_format not in DOCUMENT_FORMATS:
+        raise ValueError(
+            f"Unknown schema document format {document_format!r}, available formats: {', '.join(DOCUMENT_FORMATS)}"
+        )
+
+    document = {
+        "format": _DOCUMENT_FORMAT,
+        "version": _DOCUMENT_FORMAT_VERSION,
+        "goblinoid_version": goblinoid_version,
+        "schema": schema,
+    }
+    if document_format == "json":
+        return (json.dumps(document, sort_keys=True, indent=2) + "\n").encode("utf-8")
+
+    content = io.BytesIO()
+    # Modification time is not stated so the same schema always results in the same document.
+    with gzip.GzipFile(fileobj=content, mode="wb", mtime=0) as compressed:
+        compressed.write(json.dumps(document, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return content.getvalue()
+
+
+def save_document(document_file: str, schema: typing.Dict[str, typing.Any], document_format: str = "json") -> None:
+    """Store schema description into a schema document file."""
+    content = dump_document(schema, document_format)
+    with open(document_file, "wb") as document:
+        document.write(content)
+
+
+def parse_document(content: bytes, source: str = "<bytes>") -> typing.Dict[str, typing.Any]:
+    """Parse a schema document in any of the supported forms, return schema description stated in it.
+
+    :param content: content of the schema document
+    :param source: name of the document used in reported problems
+    """
+    try:
+        if content.startswith(_GZIP_MAGIC):
+            content = gzip.decompress(content)
+        document = json.loads(content.decode("utf-8"))
+    except (OSError, EOFError, ValueError) as exc:
+        raise SchemaDocumentError(f"Failed to parse schema document {source!r}: {str(exc)}") from exc
+
+    if not isinstance(document, dict) or document.get("format") != _DOCUMENT_FORMAT:
+        raise SchemaDocumentError(f"File {source!r} is not a Goblinoid schema document")
+
+    if document.get("version") != _DOCUMENT_FORMAT_VERSION:
+        raise SchemaDocumentError(
+            f"Schema document {source!r} is in format version {document.get('version')!r}, "
+            f"only version {_DOCUMENT_FORMAT_VERSION} is supported"
+        )
+
+    schema = document.get("schema")
+    if not isinstance(schema, dict) or any(not isinstance(schema.get(section), dict) for section in SCHEMA_SECTIONS):
+        raise SchemaDocumentError(
+            f"Schema document {source!r} does not state all schema sections: {', '.join(SCHEMA_SECTIONS)}"
+        )
+
+    _LOGGER.debug(
+        "Loaded schema document %r created by Goblinoid %s", source, document.get("goblinoid_version", "unknown")
+    )
+    return schema
+
+
+def load_document(document_file: str) -> typing.Dict[str, typing.Any]:
+    """Load schema description from a schema document file in any of the supported forms."""
+    try:
+        with open(document_file, "rb") as document:
+            content = document.read()
+    except OSError as exc:
+        raise SchemaDocumentError(f"Failed to load schema document {document_file!r}: {str(exc)}") from exc
+
+    return parse_document(content, document_file)
+
+
+def get_loader_script(document_path: str) -> str:
+    """Get Groovy script applying the schema document stored on the Gremlin Server side in bulk.
+
+    Unlike generated scripts, the loader does not depend on the schema, so it can be deployed once and the schema
+    document is parsed by the server instead of compiling a script stating all schema elements.
+    """
+    return get_document_loader_script(document_path, _DOCUMENT_FORMAT, _DOCUMENT_FORMAT_VERSION)
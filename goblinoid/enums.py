@@ -49,3 +49,36 @@ class PropertyDataType(Enum):
     DATE = auto()
     GEOSHAPE = auto()
     UUID = auto()
+
+
+class IndexMapping(Enum):
+    """Mapping of keys in mixed indexes."""
+
+    DEFAULT = auto()
+    TEXT = auto()
+    STRING = auto()
+    TEXTSTRING = auto()
+    PREFIX_TREE = auto()
+
+
+class IndexDirection(Enum):
+    """Direction of edges covered by a vertex-centric index."""
+
+    OUT = auto()
+    IN = auto()
+    BOTH = auto()
+
+
+class IndexOrder(Enum):
+    """Sort order of edges in a vertex-centric index."""
+
+    ASC = auto()
+    DESC = auto()
+
+
+class ConsistencyModifier(Enum):
+    """Consistency of property keys, edge labels and composite indexes."""
+
+    DEFAULT = auto()
+    LOCK = auto()
+    FORK = auto()
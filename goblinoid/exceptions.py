@@ -17,6 +17,8 @@
 
 """Exception hierarchy definition."""
 
+import typing
+
 
 class GoblinoidExceptionBase(Exception):
     """"A base class for Goblinoid exception hierarchy."""
@@ -52,3 +54,54 @@ class PropertyNameClashError(GoblinoidExceptionBase):
 
 class MultipleLabelsError(GoblinoidExceptionBase):
     """Raised if multiple labels with a same name found."""
+
+
+class IndexDefinitionError(GoblinoidExceptionBase):
+    """Raised if an index declared on a model is not valid."""
+
+
+class TTLDefinitionError(GoblinoidExceptionBase):
+    """Raised if time-to-live declared on a model is not valid."""
+
+
+class ConsistencyDefinitionError(GoblinoidExceptionBase):
+    """Raised if consistency modifier declared on a model is not valid."""
+
+
+class SchemaSnapshotError(GoblinoidExceptionBase):
+    """Raised if a schema snapshot cannot be loaded."""
+
+
+class SchemaChangeError(GoblinoidExceptionBase):
+    """Raised if schema elements were removed or changed compared to a schema snapshot."""
+
+
+class SchemaSubmitError(GoblinoidExceptionBase):
+    """Raised if schema cannot be applied on Gremlin Server."""
+
+
+class StaticDiscoveryError(GoblinoidExceptionBase):
+    """Raised if models cannot be discovered by static analysis of sources."""
+
+
+class SchemaConflictError(GoblinoidExceptionBase):
+    """Raised if multiple problems were found in models, all problems found are available in errors."""
+
+    def __init__(self, errors: typing.Iterable[Exception]):
+        """Store all problems found, report them in the exception message."""
+        self.errors = list(errors)
+        super().__init__(
+            f"Found {len(self.errors)} problems in models:\n" + "\n".join(f"  {error}" for error in self.errors)
+        )
+
+
+class BatchManifestError(GoblinoidExceptionBase):
+    """Raised if a batch manifest cannot be loaded."""
+
+
+class SampleProfileError(GoblinoidExceptionBase):
+    """Raised if a data sample cannot be read."""
+
+
+class SchemaDocumentError(GoblinoidExceptionBase):
+    """Raised if a schema document cannot be loaded."""
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Writers of groovy scripts creating schema from schema description."""
+
+import json
+import logging
+import operator
+import shutil
+import typing
+
+from .enums import IndexOrder
+from .enums import PropertyDataType
+from .lifecycle import get_lifecycle_bindings
+from .lifecycle import get_lifecycle_script
+from .lifecycle import IndexLifecycle
+from .schema import split_schema
+
+_LOGGER = logging.getLogger(__name__)
+_FILE_PREPEND = """// Automatically generated file by Goblinoid.
+
+:remote connect tinkerpop.server conf/remote.yaml session
+:remote console
+
+
+"""
+
+_TRANSACTION_BEGIN = """mgmt = graph.openManagement()
+
+"""
+
+_TRANSACTION_END = """
+mgmt.commit()
+"""
+
+_INDEX_ORDERS = {
+    # Naming as used in TinkerPop releases shipped with JanusGraph.
+    IndexOrder.ASC.name: "incr",
+    IndexOrder.DESC.name: "decr",
+}
+
+_GROOVY_DATA_TYPES = {
+    PropertyDataType.STRING.name: "String.class",
+    PropertyDataType.CHARACTER.name: "Character.class",
+    PropertyDataType.BOOLEAN.name: "Boolean.class",
+    PropertyDataType.BYTE.name: "Byte.class",
+    PropertyDataType.SHORT.name: "Short.class",
+    PropertyDataType.INTEGER.name: "Integer.class",
+    PropertyDataType.LONG.name: "Long.class",
+    PropertyDataType.FLOAT.name: "Float.class",
+    PropertyDataType.DOUBLE.name: "Double.class",
+    PropertyDataType.DATE.name: "Date.class",
+    PropertyDataType.GEOSHAPE.name: "org.janusgraph.core.attribute.Geoshape.class",
+    PropertyDataType.UUID.name: "UUID.class",
+}
+
+# Maximum length of a string literal in the compact script, Groovy (JVM) does not allow constants over 64kB.
+_COMPACT_LITERAL_SIZE = 16384
+
+_COMPACT_LOADER = """
+//
+// Schema loader creating schema elements stated in schema description.
+//
+
+vertexClass = org.apache.tinkerpop.gremlin.structure.Vertex.class
+edgeClass = org.apache.tinkerpop.gremlin.structure.Edge.class
+
+applySchema = { schema ->
+  schema.vertex_labels.each { name, definition ->
+    vertexLabel = mgmt.getVertexLabel(name)
+    if (vertexLabel == null) {
+      maker = mgmt.makeVertexLabel(name)
+      if (definition.partitioned)
+        maker.partition()
+      if (definition['static'])
+        maker.setStatic()
+      vertexLabel = maker.make()
+    } else if (vertexLabel.isPartitioned() != (definition.partitioned == true) || vertexLabel.isStatic() != (definition['static'] == true)) {
+      mgmt.rollback()
+      throw new IllegalStateException("Vertex label '" + name + "' already exists with different options, they cannot be changed")
+    }
+    if (definition.ttl != null)
+      mgmt.setTTL(vertexLabel, java.time.Duration.ofSeconds(definition.ttl))
+  }
+
+  schema.edge_labels.each { name, definition ->
+    edgeLabel = mgmt.getEdgeLabel(name)
+    if (edgeLabel == null) {
+      maker = mgmt.makeEdgeLabel(name)
+      if (definition.multiplicity != null)
+        maker.multiplicity(org.janusgraph.core.Multiplicity.valueOf(definition.multiplicity))
+      edgeLabel = maker.make()
+    }
+    if (definition.ttl != null)
+      mgmt.setTTL(edgeLabel, java.time.Duration.ofSeconds(definition.ttl))
+    if (definition.consistency != null)
+      mgmt.setConsistency(edgeLabel, org.janusgraph.core.schema.ConsistencyModifier.valueOf(definition.consistency))
+  }
+
+  schema.property_keys.each { name, definition ->
+    propertyKey = mgmt.getPropertyKey(name)
+    if (propertyKey == null) {
+      maker = mgmt.makePropertyKey(name).dataType(dataTypes[definition.data_type])
+      if (definition.cardinality != null)
+        maker.cardinality(org.janusgraph.core.Cardinality.valueOf(definition.cardinality))
+      propertyKey = maker.make()
+    }
+    if (definition.ttl != null)
+      mgmt.setTTL(propertyKey, java.time.Duration.ofSeconds(definition.ttl))
+    if (definition.consistency != null)
+      mgmt.setConsistency(propertyKey, org.janusgraph.core.schema.ConsistencyModifier.valueOf(definition.consistency))
+  }
+
+  schema.indexes.each { name, definition ->
+    if (mgmt.getGraphIndex(name) == null) {
+      isVertex = definition.element == 'vertex'
+      builder = mgmt.buildIndex(name, isVertex ? vertexClass : edgeClass)
+      definition.keys.each { key ->
+        if (definition.mapping?.get(key) != null)
+          builder.addKey(mgmt.getPropertyKey(key), org.janusgraph.core.schema.Mapping.valueOf(definition.mapping[key]).asParameter())
+        else
+          builder.addKey(mgmt.getPropertyKey(key))
+      }
+      if (definition.index_only)
+        builder.indexOnly(isVertex ? mgmt.getVertexLabel(definition.label) : mgmt.getEdgeLabel(definition.label))
+      if (definition.index_type == 'composite') {
+        if (definition.unique)
+          builder.unique()
+        builder.buildCompositeIndex()
+      } else {
+        builder.buildMixedIndex(definition.backend)
+      }
+    }
+    if (definition.consistency != null)
+      mgmt.setConsistency(mgmt.getGraphIndex(name), org.janusgraph.core.schema.ConsistencyModifier.valueOf(definition.consistency))
+  }
+
+  schema.edge_indexes.each { label, labelIndexes ->
+    edgeLabel = mgmt.getEdgeLabel(label)
+    labelIndexes.each { name, definition ->
+      if (mgmt.getRelationIndex(edgeLabel, name) == null)
+        mgmt.buildEdgeIndex(
+          edgeLabel,
+          name,
+          org.apache.tinkerpop.gremlin.structure.Direction.valueOf(definition.direction),
+          org.apache.tinkerpop.gremlin.process.traversal.Order.valueOf(orders[definition.order]),
+          *definition.keys.collect { mgmt.getPropertyKey(it) }
+        )
+    }
+  }
+}
+
+"""
+
+
+def _get_index_definition(index_name: str, index: typing.Dict[str, typing.Any]) -> str:
+    """Create a groovy definition of the given index."""
+    if index["element"] == "vertex":
+        element_class = "org.apache.tinkerpop.gremlin.structure.Vertex.class"
+        label = f"mgmt.getVertexLabel('{index['label']}')"
+    else:
+        element_class = "org.apache.tinkerpop.gremlin.structure.Edge.class"
+        label = f"mgmt.getEdgeLabel('{index['label']}')"
+
+    result = f"mgmt.buildIndex('{index_name}', {element_class})"
+    for key in index["keys"]:
+        mapping = index.get("mapping", {}).get(key)
+        if mapping:
+            result += f".addKey(mgmt.getPropertyKey('{key}'), org.janusgraph.core.schema.Mapping.{mapping}.asParameter())"
+        else:
+            result += f".addKey(mgmt.getPropertyKey('{key}'))"
+
+    if index["index_only"]:
+        result += f".indexOnly({label})"
+
+    if index["index_type"] == "composite":
+        if index["unique"]:
+            result += ".unique()"
+        result += ".buildCompositeIndex()"
+    else:
+        result += f".buildMixedIndex('{index['backend']}')"
+
+    return result
+
+
+def _get_edge_index_definition(edge_label: str, index_name: str, index: typing.Dict[str, typing.Any]) -> str:
+    """Create a groovy definition of the given vertex-centric index."""
+    keys = ", ".join(f"mgmt.getPropertyKey('{key}')" for key in index["keys"])
+    return (
+        f"mgmt.buildEdgeIndex(mgmt.getEdgeLabel('{edge_label}'), '{index_name}', "
+        f"org.apache.tinkerpop.gremlin.structure.Direction.{index['direction']}, "
+        f"org.apache.tinkerpop.gremlin.process.traversal.Order.{_INDEX_ORDERS[index['order']]}, {keys})"
+    )
+
+
+def _write_index_file(output: typing.TextIO, index_file: typing.Optional[str]) -> None:
+    """Append content of the index file to the resulting script."""
+    if index_file:
+        _LOGGER.info("Adding indexes from file %r", index_file)
+        with open(index_file, 'r') as index_definitions:
+            output.write("//\n// Indexes defined for the schema.\n//\n\n")
+            shutil.copyfileobj(index_definitions, output)
+
+
+def _write_transactions(
+    output: typing.TextIO,
+    schema: typing.Dict[str, typing.Any],
+    write_body: typing.Callable[[typing.TextIO, typing.Dict[str, typing.Any]], None],
+    index_file: typing.Optional[str],
+    chunk_size: typing.Optional[int],
+) -> None:
+    """Write management transactions creating schema, optionally split into chunks each committed on its own."""
+    if not chunk_size:
+        output.write(_TRANSACTION_BEGIN)
+        write_body(output, schema)
+        _write_index_file(output, index_file)
+        output.write(_TRANSACTION_END)
+        return
+
+    # Schema elements are created only if they do not exist yet, so chunks applied before are no-ops on reruns.
+    chunks = split_schema(schema, chunk_size)
+    for idx, chunk in enumerate(chunks, start=1):
+        chunk_id = f"{idx}/{len(chunks)}"
+        output.write(f"//\n// Chunk {chunk_id}\n//\n\n")
+        output.write(_TRANSACTION_BEGIN)
+        write_body(output, chunk)
+        output.write(_TRANSACTION_END)
+        output.write(f"println('Chunk {chunk_id} applied')\n\n")
+
+    if index_file:
+        output.write(_TRANSACTION_BEGIN)
+        _write_index_file(output, index_file)
+        output.write(_TRANSACTION_END)
+
+
+def _write_element_options(output: typing.TextIO, element: str, definition: typing.Dict[str, typing.Any]) -> None:
+    """Write statements setting time-to-live and consistency modifier of the given schema element, if declared."""
+    if definition.get("ttl") is not None:
+        output.write(f"mgmt.setTTL({element}, java.time.Duration.ofSeconds({definition['ttl']}))\n")
+    if definition.get("consistency") is not None:
+        output.write(
+            f"mgmt.setConsistency({element}, "
+            f"org.janusgraph.core.schema.ConsistencyModifier.{definition['consistency']})\n"
+        )
+
+
+def _write_script_body(output: typing.TextIO, schema: typing.Dict[str, typing.Any]) -> None:
+    """Write statements creating schema elements, each schema element is created by its own statements."""
+    for vertex_label, vertex_label_definition in sorted(schema["vertex_labels"].items(), key=operator.itemgetter(0)):
+        output.write(
+            f"{vertex_label}_vl = mgmt.getVertexLabel('{vertex_label}')\n"
+            f"if ({vertex_label}_vl == null) {{\n"
+            f"  {vertex_label}_vl = mgmt.makeVertexLabel('{vertex_label}')"
+        )
+        partitioned = vertex_label_definition.get("partitioned", False)
+        static = vertex_label_definition.get("static", False)
+        if partitioned:
+            output.write(".partition()")
+        if static:
+            output.write(".setStatic()")
+        # Options cannot be changed once the label is created, refuse to silently ignore them. Braces keep the
+        # statement incomplete until the else branch in interactive consoles, which submit each complete statement.
+        output.write(
+            f".make()\n"
+            f"}} else if ({vertex_label}_vl.isPartitioned() != {str(partitioned).lower()} "
+            f"|| {vertex_label}_vl.isStatic() != {str(static).lower()}) {{\n"
+            f"  mgmt.rollback()\n"
+            f"  throw new IllegalStateException(\"Vertex label '{vertex_label}' already exists with different "
+            f"options, they cannot be changed\")\n"
+            f"}}\n"
+        )
+        _write_element_options(output, f"{vertex_label}_vl", vertex_label_definition)
+        output.write("\n")
+
+    output.write("\n")
+
+    for edge_label, edge_label_definition in sorted(schema["edge_labels"].items(), key=operator.itemgetter(0)):
+        output.write(
+            f"{edge_label}_el = mgmt.getEdgeLabel('{edge_label}')\n"
+            f"if ({edge_label}_el == null)\n"
+            f"  {edge_label}_el = mgmt.makeEdgeLabel('{edge_label}')"
+        )
+        if edge_label_definition.get("multiplicity"):
+            output.write(f".multiplicity(org.janusgraph.core.Multiplicity.{edge_label_definition['multiplicity']})")
+        output.write(".make()\n")
+        _write_element_options(output, f"{edge_label}_el", edge_label_definition)
+        output.write("\n")
+
+    output.write("\n")
+
+    for property_db_name, property_key in sorted(schema["property_keys"].items(), key=operator.itemgetter(0)):
+        output.write(
+            f"{property_db_name}_p = mgmt.getPropertyKey('{property_db_name}')\n"
+            f"if ({property_db_name}_p == null)\n"
+            f"  {property_db_name}_p = mgmt.makePropertyKey('{property_db_name}')"
+            f".dataType({_GROOVY_DATA_TYPES[property_key['data_type']]})"
+        )
+        if property_key["cardinality"]:
+            output.write(f".cardinality(org.janusgraph.core.Cardinality.{property_key['cardinality']})")
+        output.write(".make()\n")
+        _write_element_options(output, f"{property_db_name}_p", property_key)
+        output.write("\n")
+
+    if schema["indexes"]:
+        output.write("//\n// Indexes declared on models.\n//\n\n")
+
+    for index_name, index in sorted(schema["indexes"].items(), key=operator.itemgetter(0)):
+        output.write(
+            f"if (mgmt.getGraphIndex('{index_name}') == null)\n"
+            f"  {_get_index_definition(index_name, index)}\n"
+        )
+        _write_element_options(output, f"mgmt.getGraphIndex('{index_name}')", index)
+        output.write("\n")
+
+    if schema["edge_indexes"]:
+        output.write("//\n// Vertex-centric indexes declared on models.\n//\n\n")
+
+    for edge_label, label_indexes in sorted(schema["edge_indexes"].items(), key=operator.itemgetter(0)):
+        for index_name, index in sorted(label_indexes.items(), key=operator.itemgetter(0)):
+            output.write(
+                f"if (mgmt.getRelationIndex(mgmt.getEdgeLabel('{edge_label}'), '{index_name}') == null)\n"
+                f"  {_get_edge_index_definition(edge_label, index_name, index)}\n\n"
+            )
+
+
+def write_script(
+    output: typing.TextIO,
+    schema: typing.Dict[str, typing.Any],
+    index_file: str = None,
+    chunk_size: int = None,
+    index_lifecycle: IndexLifecycle = None,
+) -> None:
+    """Write groovy script creating the given schema, each schema element is created by its own statements."""
+    output.write(_FILE_PREPEND)
+    _write_transactions(output, schema, _write_script_body, index_file, chunk_size)
+    _write_lifecycle(output, schema, index_lifecycle)
+
+
+def _to_groovy_literal(value: typing.Any) -> str:
+    """Convert a JSON serializable value to a groovy literal."""
+    if value is None:
+        return "null"
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, (int, float)):
+        return repr(value)
+    elif isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    elif isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_to_groovy_literal(item) for item in value) + "]"
+    else:
+        raise ValueError(f"Cannot convert value of type {type(value)} to a groovy literal")
+
+
+def _write_lifecycle(
+    output: typing.TextIO, schema: typing.Dict[str, typing.Any], index_lifecycle: typing.Optional[IndexLifecycle]
+) -> None:
+    """Write routine driving lifecycle of indexes present in the schema description."""
+    if not index_lifecycle:
+        return
+
+    bindings = get_lifecycle_bindings(schema, index_lifecycle)
+    if not bindings["lifecycleIndexes"]:
+        return
+
+    output.write("\n")
+    for name, value in bindings.items():
+        output.write(f"{name} = {_to_groovy_literal(value)}\n")
+    output.write(get_lifecycle_script())
+
+
+def _to_groovy_map(mapping: typing.Dict[str, str]) -> str:
+    """Convert a mapping of names to groovy expressions to a groovy map literal."""
+    return "[" + ", ".join(f"{key}: {value}" for key, value in sorted(mapping.items())) + "]"
+
+
+def _write_compact_body(output: typing.TextIO, schema: typing.Dict[str, typing.Any]) -> None:
+    """Write schema description as data passed to the schema loader."""
+    # Split to multiple literals to respect limits on constant size, escape to form valid groovy string literals.
+    description = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    output.write("applySchema(new groovy.json.JsonSlurper().parseText(\n")
+    for idx in range(0, len(description), _COMPACT_LITERAL_SIZE):
+        literal = description[idx:idx + _COMPACT_LITERAL_SIZE].replace("\\", "\\\\").replace("'", "\\'")
+        output.write(f"  {'+ ' if idx else ''}'{literal}'\n")
+    output.write("))\n")
+
+
+def write_compact_script(
+    output: typing.TextIO,
+    schema: typing.Dict[str, typing.Any],
+    index_file: str = None,
+    chunk_size: int = None,
+    index_lifecycle: IndexLifecycle = None,
+) -> None:
+    """Write groovy script creating the given schema, schema is stated as data processed by a fixed loader.
+
+    Size of code the Gremlin server needs to compile stays the same regardless of the number of schema elements.
+    """
+    output.write(_FILE_PREPEND)
+    output.write(f"dataTypes = {_to_groovy_map(_GROOVY_DATA_TYPES)}\n")
+    output.write(f"orders = {_to_groovy_map({key: _to_groovy_literal(value) for key, value in _INDEX_ORDERS.items()})}\n")
+    output.write(_COMPACT_LOADER)
+    _write_transactions(output, schema, _write_compact_body, index_file, chunk_size)
+    _write_lifecycle(output, schema, index_lifecycle)
+
+
+def get_submit_script() -> str:
+    """Get script applying schema description passed in schemaDescription binding in one management transaction.
+
+    The script does not depend on schema description so it is compiled only once on the Gremlin Server side.
+    """
+    return (
+        f"dataTypes = {_to_groovy_map(_GROOVY_DATA_TYPES)}\n"
+        f"orders = {_to_groovy_map({key: _to_groovy_literal(value) for key, value in _INDEX_ORDERS.items()})}\n"
+        f"{_COMPACT_LOADER}"
+        f"{_TRANSACTION_BEGIN}"
+        "applySchema(new groovy.json.JsonSlurper().parseText(schemaDescription))\n"
+        f"{_TRANSACTION_END}"
+    )
+
+
+def get_document_loader_script(document_path: str, document_format: str, document_version: int) -> str:
+    """Get script loading a schema document on the Gremlin Server side and applying it in one transaction.
+
+    :param document_path: path to the schema document on the Gremlin Server side
+    :param document_format: format name stated in schema documents
+    :param document_version: version of the document format the loader understands
+    """
+    return (
+        f"{_FILE_PREPEND}"
+        f"schemaDocument = {_to_groovy_literal(document_path)}\n"
+        f"dataTypes = {_to_groovy_map(_GROOVY_DATA_TYPES)}\n"
+        f"orders = {_to_groovy_map({key: _to_groovy_literal(value) for key, value in _INDEX_ORDERS.items()})}\n"
+        f"{_COMPACT_LOADER}"
+        "\n"
+        "loadSchemaDocument = { path ->\n"
+        "  stream = new BufferedInputStream(new FileInputStream(path))\n"
+        "  // Binary documents are gzip compressed.\n"
+        "  stream.mark(2)\n"
+        "  compressed = stream.read() == 0x1f && stream.read() == 0x8b\n"
+        "  stream.reset()\n"
+        "  if (compressed)\n"
+        "    stream = new java.util.zip.GZIPInputStream(stream)\n"
+        "  try {\n"
+        "    document = new groovy.json.JsonSlurper().parse(new InputStreamReader(stream, 'UTF-8'))\n"
+        "  } finally {\n"
+        "    stream.close()\n"
+        "  }\n"
+        f"  if (document.format != {_to_groovy_literal(document_format)} || document.version != {document_version})\n"
+        "    throw new IllegalArgumentException(\"File '\" + path + \"' is not a supported schema document\")\n"
+        "  return document.schema\n"
+        "}\n"
+        "\n"
+        "schema = loadSchemaDocument(schemaDocument)\n"
+        f"{_TRANSACTION_BEGIN}"
+        "applySchema(schema)\n"
+        f"{_TRANSACTION_END}"
+    )
+
+
+def get_index_file_script(index_file: str) -> str:
+    """Get script applying content of the index file in one management transaction."""
+    with open(index_file, "r") as index_definitions:
+        return _TRANSACTION_BEGIN + index_definitions.read() + _TRANSACTION_END
+
+
+# Available writers of the resulting script, keyed by output format name.
+WRITERS = {
+    "script": write_script,
+    "compact": write_compact_script,
+}
+
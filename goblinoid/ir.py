@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Intermediate representation of schema built from Goblin models.
+
+Models are processed in a single pass - each property instance is visited once and its type and cardinality
+are resolved once per property class. All problems found in models are collected and reported together once
+all models are processed. The resulting representation is turned into the JSON serializable schema description
+consumed by output writers, schema submission and snapshots.
+"""
+
+import logging
+import typing
+from enum import Enum
+
+from goblin.element import Edge
+from goblin.element import Vertex
+from goblin.element import VertexProperty
+from goblin.properties import Property
+from gremlin_python.process.traversal import Cardinality
+import goblin.properties
+
+from .decorators import CompositeIndex
+from .decorators import Consistency
+from .decorators import CONSISTENCY_ATTR
+from .decorators import DATA_TYPES_ATTR
+from .decorators import EDGE_INDEXES_ATTR
+from .decorators import INDEXES_ATTR
+from .decorators import MULTIPLICITY_ATTR
+from .decorators import TTL
+from .decorators import TTL_ATTR
+from .decorators import VERTEX_LABEL_ATTR
+from .decorators import VertexLabel
+from .enums import ConsistencyModifier
+from .enums import EdgeMultiplicity
+from .enums import PropertyDataType
+from .exceptions import ConsistencyDefinitionError
+from .exceptions import GoblinoidExceptionBase
+from .exceptions import IndexDefinitionError
+from .exceptions import InvalidElementError
+from .exceptions import MultipleLabelsError
+from .exceptions import PropertyNameClashError
+from .exceptions import SchemaConflictError
+from .exceptions import TTLDefinitionError
+from .exceptions import UnsupportedPropertyCardinality
+from .exceptions import UnsupportedPropertyType
+from .exceptions import WrongPropertyType
+
+_LOGGER = logging.getLogger(__name__)
+
+_SUPPORTED_PROPERTY_TYPES = {
+    goblin.properties.String.__name__: PropertyDataType.STRING,
+    goblin.properties.Integer.__name__: PropertyDataType.INTEGER,
+    goblin.properties.Float.__name__: PropertyDataType.FLOAT,
+    goblin.properties.Boolean.__name__: PropertyDataType.BOOLEAN,
+    # These are supported by JanusGraph, but not supported by Goblin:
+    #   Character
+    #   Byte
+    #   Short
+    #   Long
+    #   Double
+    #   Date
+    #   Geoshape
+    #   UUID
+}
+
+# Data types which can be stated for properties of Goblin data types, values need to be representable in the
+# data type stated. Data types of properties using other (custom) Goblin data types always need to be stated.
+_COMPATIBLE_DATA_TYPES = {
+    PropertyDataType.STRING: (PropertyDataType.STRING, PropertyDataType.CHARACTER),
+    PropertyDataType.INTEGER: (
+        PropertyDataType.BYTE,
+        PropertyDataType.SHORT,
+        PropertyDataType.INTEGER,
+        PropertyDataType.LONG,
+    ),
+    PropertyDataType.FLOAT: (PropertyDataType.FLOAT, PropertyDataType.DOUBLE),
+    PropertyDataType.BOOLEAN: (PropertyDataType.BOOLEAN,),
+}
+
+_CARDINALITIES = {
+    Cardinality.single: "SINGLE",
+    Cardinality.set_: "SET",
+    Cardinality.list_: "LIST",
+}
+
+# Property keys Goblin uses to store label and type of elements.
+_BUILTIN_PROPERTY_KEYS = ("__label__", "__type__")
+
+
+class LabelRecord:
+    """A vertex or an edge label."""
+
+    __slots__ = ("name", "model_class", "multiplicity", "partitioned", "static", "ttl", "consistency")
+
+    def __init__(
+        self,
+        name: str,
+        model_class: type,
+        multiplicity: typing.Optional[EdgeMultiplicity] = None,
+        partitioned: bool = False,
+        static: bool = False,
+        ttl: typing.Optional[int] = None,
+        consistency: typing.Optional[ConsistencyModifier] = None,
+    ):
+        """Create a record of a label defined by the given model class."""
+        self.name = name
+        self.model_class = model_class
+        self.multiplicity = multiplicity
+        self.partitioned = partitioned
+        self.static = static
+        self.ttl = ttl
+        self.consistency = consistency
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the label, options not set are omitted."""
+        result = {}
+        if self.multiplicity is not None:
+            result["multiplicity"] = self.multiplicity.name
+        if self.partitioned:
+            result["partitioned"] = True
+        if self.static:
+            result["static"] = True
+        if self.ttl is not None:
+            result["ttl"] = self.ttl
+        if self.consistency is not None:
+            result["consistency"] = self.consistency.name
+        return result
+
+
+class PropertyKeyRecord:
+    """A property key together with the first property declaring it."""
+
+    __slots__ = ("name", "data_type", "cardinality", "model_class", "property_name", "ttl", "consistency")
+
+    def __init__(
+        self,
+        name: str,
+        data_type: PropertyDataType,
+        cardinality: typing.Optional[str],
+        model_class: typing.Optional[type] = None,
+        property_name: typing.Optional[str] = None,
+    ):
+        """Create a record of a property key."""
+        self.name = name
+        self.data_type = data_type
+        self.cardinality = cardinality
+        self.model_class = model_class
+        self.property_name = property_name
+        self.ttl = None  # type: typing.Optional[int]
+        self.consistency = None  # type: typing.Optional[ConsistencyModifier]
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the property key."""
+        result = {"data_type": self.data_type.name, "cardinality": self.cardinality}
+        if self.ttl is not None:
+            result["ttl"] = self.ttl
+        if self.consistency is not None:
+            result["consistency"] = self.consistency.name
+        return result
+
+
+class IndexRecord:
+    """A graph index or a vertex-centric index declared on a model class."""
+
+    __slots__ = ("name", "definition", "model_class")
+
+    def __init__(self, name: str, definition: typing.Dict[str, typing.Any], model_class: type):
+        """Create a record of an index with its JSON serializable definition."""
+        self.name = name
+        self.definition = definition
+        self.model_class = model_class
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the index."""
+        return self.definition
+
+
+class SchemaIR:
+    """Schema elements defined by models."""
+
+    __slots__ = ("vertex_labels", "edge_labels", "property_keys", "indexes", "edge_indexes")
+
+    def __init__(self):
+        """Create an empty schema."""
+        self.vertex_labels = {}  # type: typing.Dict[str, LabelRecord]
+        self.edge_labels = {}  # type: typing.Dict[str, LabelRecord]
+        self.property_keys = {}  # type: typing.Dict[str, PropertyKeyRecord]
+        self.indexes = {}  # type: typing.Dict[str, IndexRecord]
+        # Names of vertex-centric indexes are unique per edge label.
+        self.edge_indexes = {}  # type: typing.Dict[str, typing.Dict[str, IndexRecord]]
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the schema.
+
+        The description is used to generate the resulting script and it is also stored in schema snapshots.
+        """
+        return {
+            "vertex_labels": {name: record.describe() for name, record in self.vertex_labels.items()},
+            "edge_labels": {name: record.describe() for name, record in self.edge_labels.items()},
+            "property_keys": {name: record.describe() for name, record in self.property_keys.items()},
+            "indexes": {name: record.describe() for name, record in self.indexes.items()},
+            "edge_indexes": {
+                edge_label: {name: record.describe() for name, record in label_indexes.items()}
+                for edge_label, label_indexes in self.edge_indexes.items()
+            },
+        }
+
+
+def _get_index_keys(
+    model_class: type, keys: typing.Iterable[str], db_names: typing.Dict[str, str]
+) -> typing.List[str]:
+    """Resolve keys used in an index declaration to names of keys as stored in the database."""
+    result = []
+    for key in keys:
+        db_name = db_names.get(key)
+        if db_name is None:
+            if key not in db_names.values():
+                raise IndexDefinitionError(
+                    f"Key {key!r} used in index declared on {model_class!r} is not a property of the model"
+                )
+            db_name = key
+        result.append(db_name)
+
+    return result
+
+
+def _get_index_definition(
+    model_class: type, index: typing.Any, index_keys: typing.List[str]
+) -> typing.Tuple[str, typing.Dict[str, typing.Any]]:
+    """Get name and definition of a graph index declared on the model class."""
+    index_type = "composite" if isinstance(index, CompositeIndex) else "mixed"
+    index_name = index.name or f"{model_class.__label__}_{'_'.join(index_keys)}_{index_type}"
+
+    definition = {
+        "index_type": index_type,
+        "element": "vertex" if issubclass(model_class, Vertex) else "edge",
+        "label": model_class.__label__,
+        "keys": index_keys,
+        "index_only": index.index_only,
+    }
+    if isinstance(index, CompositeIndex):
+        definition["unique"] = index.unique
+        if index.consistency is not None:
+            definition["consistency"] = index.consistency.name
+    else:
+        # Mapping of mixed indexes is stated using keys as declared in the model.
+        definition["backend"] = index.backend
+        definition["mapping"] = {
+            key: index.mapping[declared_key].name
+            for declared_key, key in zip(index.keys, index_keys)
+            if index.mapping and declared_key in index.mapping
+        }
+
+    return index_name, definition
+
+
+def _get_edge_index_definition(
+    model_class: type, index: typing.Any, index_keys: typing.List[str]
+) -> typing.Tuple[str, typing.Dict[str, typing.Any]]:
+    """Get name and definition of a vertex-centric index declared on the edge model class."""
+    index_name = index.name
+    if not index_name:
+        index_name = (
+            f"{model_class.__label__}_{'_'.join(index_keys)}_"
+            f"{index.direction.name.lower()}_{index.order.name.lower()}"
+        )
+
+    return index_name, {"keys": index_keys, "direction": index.direction.name, "order": index.order.name}
+
+
+def _format_option(value: typing.Any) -> str:
+    """Format value of a schema element option for humans."""
+    return value.name if isinstance(value, Enum) else repr(value)
+
+
+class _SchemaBuilder:
+    """Build schema IR from models in a single pass, collect all problems found."""
+
+    __slots__ = ("schema", "errors", "_data_types", "_module_import", "_models_iterable")
+
+    def __init__(self, module_import: str, models_iterable: str):
+        """Initialize builder, module import and models iterable are used in reported problems."""
+        self.schema = SchemaIR()
+        self.errors = []  # type: typing.List[GoblinoidExceptionBase]
+        # Data types resolved per class of the property data type.
+        self._data_types = {}  # type: typing.Dict[type, PropertyDataType]
+        self._module_import = module_import
+        self._models_iterable = models_iterable
+
+    def _get_data_type(
+        self,
+        property_instance: typing.Union[VertexProperty, Property],
+        declared: typing.Optional[PropertyDataType] = None,
+    ) -> PropertyDataType:
+        """Get type of property based on classes defined in Goblin, respect data type declared on model."""
+        data_type_class = type(property_instance.data_type)
+        data_type = self._data_types.get(data_type_class)
+        if data_type is None:
+            data_type = _SUPPORTED_PROPERTY_TYPES.get(data_type_class.__name__)
+            if data_type is None:
+                if declared is not None:
+                    # Custom Goblin data types are trusted to produce values of the declared type.
+                    return declared
+                raise UnsupportedPropertyType(
+                    f"Property type {data_type_class} is not supported by Goblinoid, "
+                    f"state data type of the property using data_types decorator"
+                )
+            self._data_types[data_type_class] = data_type
+
+        if declared is not None:
+            if declared not in _COMPATIBLE_DATA_TYPES[data_type]:
+                raise UnsupportedPropertyType(
+                    f"Data type {declared.name} cannot be used for property of type {data_type_class}, "
+                    f"compatible data types: {', '.join(item.name for item in _COMPATIBLE_DATA_TYPES[data_type])}"
+                )
+            return declared
+
+        return data_type
+
+    @staticmethod
+    def _get_cardinality(property_instance: typing.Union[VertexProperty, Property]) -> typing.Optional[str]:
+        """Convert Goblin's cardinality enum to its name in JanusGraph, edge properties have no cardinality."""
+        if not isinstance(property_instance, VertexProperty):
+            return None
+
+        cardinality = _CARDINALITIES.get(property_instance.cardinality)
+        if cardinality is None:
+            raise UnsupportedPropertyCardinality(
+                f"Cardinality type {type(property_instance.cardinality)} is not supported"
+            )
+
+        return cardinality
+
+    def _add_label(self, model_class: type) -> None:
+        """Register label defined by the model class."""
+        if issubclass(model_class, Vertex):
+            labels = self.schema.vertex_labels
+            kind = "Vertex"
+            multiplicity = None
+            partitioned, static = model_class.__dict__.get(VERTEX_LABEL_ATTR) or VertexLabel()
+        elif issubclass(model_class, Edge):
+            labels = self.schema.edge_labels
+            kind = "Edge"
+            multiplicity = model_class.__dict__.get(MULTIPLICITY_ATTR)
+            # Partitioning and static labels apply only to vertex labels.
+            partitioned = static = False
+        else:
+            raise InvalidElementError(
+                f"Element {model_class.__name__} from {self._module_import} present in "
+                f"iterable {self._models_iterable} is not of type "
+                f"goblin.element.Edge nor goblin.element.Vertex"
+            )
+
+        existing = labels.get(model_class.__label__)
+        if existing is not None:
+            raise MultipleLabelsError(
+                f"{kind} label {model_class.__label__!r} found multiple times - "
+                f"in class {model_class!r} and {existing.model_class!r}"
+            )
+
+        label_ttl = (model_class.__dict__.get(TTL_ATTR) or TTL()).label
+        label_consistency = (model_class.__dict__.get(CONSISTENCY_ATTR) or Consistency()).label
+        labels[model_class.__label__] = LabelRecord(
+            model_class.__label__,
+            model_class,
+            multiplicity,
+            partitioned,
+            static,
+            label_ttl,
+            label_consistency,
+        )
+        if label_ttl is not None and kind == "Vertex" and not static:
+            raise TTLDefinitionError(
+                f"Time-to-live can be declared only for static vertex labels, declared on {model_class!r}"
+            )
+
+        if label_consistency == ConsistencyModifier.FORK and multiplicity not in (None, EdgeMultiplicity.MULTI):
+            raise ConsistencyDefinitionError(
+                f"Consistency modifier FORK can be used only for edge labels with multiplicity MULTI, "
+                f"declared on {model_class!r} with multiplicity {multiplicity.name}"
+            )
+
+    def _add_property(
+        self,
+        model_class: type,
+        property_name: str,
+        property_instance: typing.Union[VertexProperty, Property],
+        declared_data_type: typing.Optional[PropertyDataType] = None,
+    ) -> str:
+        """Register property key used by the given property, return name of the key as stored in the database."""
+        if isinstance(property_instance, Property) and issubclass(model_class, Vertex):
+            raise WrongPropertyType(
+                f"Property {property_name!r} in {model_class} is of "
+                f"type {type(property_instance)}, but should be of type VertexProperty."
+            )
+        elif isinstance(property_instance, VertexProperty) and issubclass(model_class, Edge):
+            raise WrongPropertyType(
+                f"Property {property_name!r} in {model_class} is of "
+                f"type {type(property_instance)}, but should be of type Property."
+            )
+
+        db_name = property_instance.getdb_name() or property_name
+        data_type = self._get_data_type(property_instance, declared_data_type)
+        cardinality = self._get_cardinality(property_instance)
+
+        existing = self.schema.property_keys.get(db_name)
+        if existing is None:
+            self.schema.property_keys[db_name] = PropertyKeyRecord(
+                db_name, data_type, cardinality, model_class, property_name
+            )
+            return db_name
+
+        if existing.data_type != data_type:
+            raise PropertyNameClashError(
+                f"Property key {db_name!r} is of type {data_type.name} in {model_class!r} "
+                f"(property {property_name!r}), but of type {existing.data_type.name} "
+                f"in {existing.model_class!r} (property {existing.property_name!r})"
+            )
+
+        if cardinality is not None:
+            if existing.cardinality is None:
+                # Key first seen on an edge, take cardinality stated on vertex property.
+                existing.cardinality = cardinality
+            elif existing.cardinality != cardinality:
+                raise PropertyNameClashError(
+                    f"Property key {db_name!r} has cardinality {cardinality} in {model_class!r} "
+                    f"(property {property_name!r}), but cardinality {existing.cardinality} "
+                    f"in {existing.model_class!r} (property {existing.property_name!r})"
+                )
+
+        return db_name
+
+    def _add_indexes(self, model_class: type, db_names: typing.Dict[str, str]) -> None:
+        """Register graph indexes and vertex-centric indexes declared on the model class."""
+        for index in model_class.__dict__.get(INDEXES_ATTR, ()):
+            try:
+                index_name, definition = _get_index_definition(
+                    model_class, index, _get_index_keys(model_class, index.keys, db_names)
+                )
+            except IndexDefinitionError as exc:
+                self.errors.append(exc)
+                continue
+
+            if index_name in self.schema.indexes:
+                self.errors.append(
+                    IndexDefinitionError(
+                        f"Index {index_name!r} declared multiple times, "
+                        f"in class {model_class!r} and {self.schema.indexes[index_name].model_class!r}"
+                    )
+                )
+                continue
+
+            self.schema.indexes[index_name] = IndexRecord(index_name, definition, model_class)
+
+        if not issubclass(model_class, Edge):
+            return
+
+        for index in model_class.__dict__.get(EDGE_INDEXES_ATTR, ()):
+            try:
+                index_name, definition = _get_edge_index_definition(
+                    model_class, index, _get_index_keys(model_class, index.keys, db_names)
+                )
+            except IndexDefinitionError as exc:
+                self.errors.append(exc)
+                continue
+
+            label_indexes = self.schema.edge_indexes.setdefault(model_class.__label__, {})
+            if index_name in label_indexes:
+                self.errors.append(
+                    IndexDefinitionError(
+                        f"Vertex-centric index {index_name!r} declared multiple times in class {model_class!r}"
+                    )
+                )
+                continue
+
+            label_indexes[index_name] = IndexRecord(index_name, definition, model_class)
+
+    def _add_key_options(
+        self,
+        model_class: type,
+        db_names: typing.Dict[str, str],
+        option: str,
+        option_name: str,
+        declared: typing.Dict[str, typing.Any],
+        error_class: type,
+    ) -> None:
+        """Register options of property keys declared on the model class, options are stored in key records."""
+        for key, value in declared.items():
+            db_name = db_names.get(key)
+            if db_name is None:
+                self.errors.append(
+                    error_class(
+                        f"{option_name.capitalize()} declared on {model_class!r} for {key!r}, which is not a property"
+                    )
+                )
+                continue
+
+            record = self.schema.property_keys[db_name]
+            current = getattr(record, option)
+            if current is not None and current != value:
+                self.errors.append(
+                    PropertyNameClashError(
+                        f"Property key {db_name!r} has {option_name} {_format_option(value)} declared in "
+                        f"{model_class!r}, but {option_name} {_format_option(current)} was declared already"
+                    )
+                )
+                continue
+
+            setattr(record, option, value)
+
+    def _add_key_consistency(self, model_class: type, db_names: typing.Dict[str, str]) -> None:
+        """Register consistency modifiers of property keys declared on the model class."""
+        declared = (model_class.__dict__.get(CONSISTENCY_ATTR) or Consistency()).keys or {}
+        self._add_key_options(
+            model_class, db_names, "consistency", "consistency modifier", declared, ConsistencyDefinitionError
+        )
+        for key, modifier in declared.items():
+            record = self.schema.property_keys.get(db_names.get(key))
+            if modifier == ConsistencyModifier.FORK and record is not None and record.cardinality != "LIST":
+                self.errors.append(
+                    ConsistencyDefinitionError(
+                        f"Consistency modifier FORK can be used only for property keys with cardinality LIST, "
+                        f"declared on {model_class!r} for {key!r}"
+                    )
+                )
+
+    def add_model(self, model_class: type) -> None:
+        """Add all schema elements defined by the given model class."""
+        try:
+            self._add_label(model_class)
+        except InvalidElementError as exc:
+            # Nothing more can be inspected on classes which are not models.
+            self.errors.append(exc)
+            return
+        except GoblinoidExceptionBase as exc:
+            self.errors.append(exc)
+
+        declared_data_types = getattr(model_class, DATA_TYPES_ATTR, {})
+        unknown_keys = set(declared_data_types) - set(model_class.__properties__)
+        if unknown_keys:
+            self.errors.append(
+                UnsupportedPropertyType(
+                    f"Data types stated on {model_class!r} for keys which are not properties of the model: "
+                    f"{sorted(unknown_keys)}"
+                )
+            )
+
+        db_names = {}
+        for property_name, property_instance in model_class.__properties__.items():
+            if not isinstance(property_instance, (Property, VertexProperty)):
+                _LOGGER.warning(f"Skipping property {property_name!r}, not of type Property nor VertexProperty")
+                continue
+
+            try:
+                db_names[property_name] = self._add_property(
+                    model_class, property_name, property_instance, declared_data_types.get(property_name)
+                )
+            except GoblinoidExceptionBase as exc:
+                self.errors.append(exc)
+
+        self._add_indexes(model_class, db_names)
+        self._add_key_options(
+            model_class,
+            db_names,
+            "ttl",
+            "time-to-live",
+            (model_class.__dict__.get(TTL_ATTR) or TTL()).keys or {},
+            TTLDefinitionError,
+        )
+        self._add_key_consistency(model_class, db_names)
+
+    def build(self) -> SchemaIR:
+        """Finish building schema, raise an exception if any problem was found in models."""
+        if len(self.errors) == 1:
+            raise self.errors[0]
+        elif self.errors:
+            raise SchemaConflictError(self.errors)
+
+        for property_db_name in _BUILTIN_PROPERTY_KEYS:
+            self.schema.property_keys[property_db_name] = PropertyKeyRecord(
+                property_db_name, PropertyDataType.STRING, "SINGLE"
+            )
+
+        return self.schema
+
+
+def build_schema_ir(iterable: typing.Iterable[type], module_import: str, models_iterable: str) -> SchemaIR:
+    """Build schema IR from the given models.
+
+    If a single problem is found in models, it is raised directly. If multiple problems are found,
+    SchemaConflictError listing all of them is raised.
+    """
+    builder = _SchemaBuilder(module_import, models_iterable)
+    for model_class in iterable:
+        builder.add_model(model_class)
+
+    return builder.build()
+
+
+def get_compatible_data_types(
+    property_instance: typing.Union[VertexProperty, Property]
+) -> typing.Optional[typing.Tuple[PropertyDataType, ...]]:
+    """Get data types which can be stated for the property using data_types decorator, None if any can be stated."""
+    data_type = _SUPPORTED_PROPERTY_TYPES.get(type(property_instance.data_type).__name__)
+    if data_type is None:
+        # Custom Goblin data types are trusted to produce values of the declared type.
+        return None
+
+    return _COMPATIBLE_DATA_TYPES[data_type]
+
+
+def get_goblin_data_type(data_type: PropertyDataType) -> typing.Optional[typing.Tuple[str, PropertyDataType]]:
+    """Get name of a Goblin data type whose values can be stored under the given data type and its default data type.
+
+    :return: name of the Goblin data type class and data type used for it if none is stated, None if Goblin
+             has no such data type
+    """
+    for name, default in _SUPPORTED_PROPERTY_TYPES.items():
+        if data_type in _COMPATIBLE_DATA_TYPES[default]:
+            return name, default
+
+    return None
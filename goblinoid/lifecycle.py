@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Lifecycle of indexes created on graphs already holding data.
+
+Indexes created for property keys that already exist are not usable right away - they need to get
+registered on all JanusGraph instances, data present in the graph need to be reindexed and the index
+needs to be enabled afterwards. Goblinoid generates a routine driving this lifecycle.
+"""
+
+import typing
+
+from .schema import iter_schema_elements
+
+# Supported backends used to reindex data.
+REINDEX_BACKENDS = ("local", "mapreduce")
+
+_LIFECYCLE_ROUTINE = """
+//
+// Index lifecycle - wait for registration, reindex and enable indexes created above.
+//
+
+getLifecycleIndex = { mgmt, spec ->
+  spec[0] == 'graph' ? mgmt.getGraphIndex(spec[1]) : mgmt.getRelationIndex(mgmt.getEdgeLabel(spec[2]), spec[1])
+}
+
+getLifecycleIndexStatuses = { mgmt, spec ->
+  index = getLifecycleIndex(mgmt, spec)
+  spec[0] == 'graph' ? index.getFieldKeys().collect { index.getIndexStatus(it) } as Set : [index.getIndexStatus()] as Set
+}
+
+awaitLifecycleIndexStatus = { spec, status ->
+  watcher = spec[0] == 'graph' ?
+    org.janusgraph.graphdb.database.management.ManagementSystem.awaitGraphIndexStatus(graph, spec[1]) :
+    org.janusgraph.graphdb.database.management.ManagementSystem.awaitRelationIndexStatus(graph, spec[1], spec[2])
+  report = watcher.status(status).timeout(indexTimeout, java.time.temporal.ChronoUnit.SECONDS).call()
+  if (!report.getSucceeded())
+    throw new IllegalStateException("Index ${spec[1]} did not reach status ${status} in ${indexTimeout} seconds")
+  println("Index ${spec[1]} reached status ${status} in ${report.getElapsed()}")
+}
+
+mgmt = graph.openManagement()
+pendingIndexes = lifecycleIndexes.findAll { spec ->
+  statuses = getLifecycleIndexStatuses(mgmt, spec)
+  statuses.contains(org.janusgraph.core.schema.SchemaStatus.INSTALLED) || statuses.contains(org.janusgraph.core.schema.SchemaStatus.REGISTERED)
+}
+mgmt.rollback()
+println("${pendingIndexes.size()} of ${lifecycleIndexes.size()} indexes need to be reindexed")
+
+pendingIndexes.each { spec -> awaitLifecycleIndexStatus(spec, org.janusgraph.core.schema.SchemaStatus.REGISTERED) }
+
+reindexed = 0
+pendingIndexes.collate(reindexParallelism).each { batch ->
+  mgmt = graph.openManagement()
+  futures = batch.collect { spec ->
+    index = getLifecycleIndex(mgmt, spec)
+    reindexBackend == 'mapreduce' ?
+      new org.janusgraph.hadoop.MapReduceIndexManagement(graph).updateIndex(index, org.janusgraph.core.schema.SchemaAction.REINDEX) :
+      mgmt.updateIndex(index, org.janusgraph.core.schema.SchemaAction.REINDEX)
+  }
+  futures.each { it.get(indexTimeout, java.util.concurrent.TimeUnit.SECONDS) }
+  mgmt.commit()
+  reindexed += batch.size()
+  println("Reindexed ${reindexed}/${pendingIndexes.size()} indexes")
+}
+
+mgmt = graph.openManagement()
+pendingIndexes.each { spec ->
+  if (getLifecycleIndexStatuses(mgmt, spec).contains(org.janusgraph.core.schema.SchemaStatus.REGISTERED))
+    mgmt.updateIndex(getLifecycleIndex(mgmt, spec), org.janusgraph.core.schema.SchemaAction.ENABLE_INDEX)
+}
+mgmt.commit()
+
+pendingIndexes.each { spec -> awaitLifecycleIndexStatus(spec, org.janusgraph.core.schema.SchemaStatus.ENABLED) }
+"""
+
+
+class IndexLifecycle(typing.NamedTuple):
+    """Configuration of index lifecycle orchestration."""
+
+    # Timeout in seconds for each index to reach the desired status and for reindexing.
+    timeout: int = 600
+    # Number of indexes reindexed in parallel.
+    parallelism: int = 1
+    # Backend used to reindex data, one of REINDEX_BACKENDS.
+    backend: str = "local"
+
+
+def get_lifecycle_indexes(schema: typing.Dict[str, typing.Any]) -> typing.List[typing.List[str]]:
+    """Get specification of indexes from the schema description as used in the lifecycle routine."""
+    result = []
+    for section, path, _ in iter_schema_elements(schema):
+        if section == "indexes":
+            result.append(["graph", path[0], None])
+        elif section == "edge_indexes":
+            result.append(["relation", path[1], path[0]])
+
+    return result
+
+
+def get_lifecycle_bindings(schema: typing.Dict[str, typing.Any], config: IndexLifecycle) -> typing.Dict[str, typing.Any]:
+    """Get values of variables used in the lifecycle routine."""
+    if config.backend not in REINDEX_BACKENDS:
+        raise ValueError(f"Unknown reindex backend {config.backend!r}, available backends: {', '.join(REINDEX_BACKENDS)}")
+
+    return {
+        "lifecycleIndexes": get_lifecycle_indexes(schema),
+        "indexTimeout": config.timeout,
+        "reindexParallelism": config.parallelism,
+        "reindexBackend": config.backend,
+    }
+
+
+def get_lifecycle_script() -> str:
+    """Get routine driving lifecycle of indexes, variables used are passed as bindings."""
+    return _LIFECYCLE_ROUTINE
+
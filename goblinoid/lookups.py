@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Generate a Python module with index-backed lookup helpers for Goblin sessions.
+
+A finder function is generated for each graph index and an ordered edge fetch for each vertex-centric index
+declared on models, so traversals answered by indexes are available to the application code directly:
+
+  * find_<label>_by_<keys> - equality lookup answered by a composite index, returning a single element
+    for unique indexes
+  * search_<label>_by_<keys> - lookup answered by a mixed index, accepting values or predicates
+  * get_<edge label>_<direction>_by_<keys> - edges incident to a vertex ordered as in a vertex-centric index
+"""
+
+import logging
+import os
+import re
+import typing
+
+from . import __version__ as goblinoid_version
+from .enums import PropertyDataType
+from .ir import SchemaIR
+
+_LOGGER = logging.getLogger(__name__)
+
+# Python types used in annotations of generated functions.
+_PYTHON_TYPES = {
+    PropertyDataType.STRING: "str",
+    PropertyDataType.CHARACTER: "str",
+    PropertyDataType.BOOLEAN: "bool",
+    PropertyDataType.BYTE: "int",
+    PropertyDataType.SHORT: "int",
+    PropertyDataType.INTEGER: "int",
+    PropertyDataType.LONG: "int",
+    PropertyDataType.FLOAT: "float",
+    PropertyDataType.DOUBLE: "float",
+    PropertyDataType.DATE: "datetime.datetime",
+    PropertyDataType.UUID: "uuid.UUID",
+    PropertyDataType.GEOSHAPE: "typing.Any",
+}
+_DIRECTION_STEPS = {"OUT": "outE", "IN": "inE", "BOTH": "bothE"}
+# Naming as used in TinkerPop releases shipped with JanusGraph.
+_ORDERS = {"ASC": "Order.incr", "DESC": "Order.decr"}
+
+
+def _to_identifier(name: str) -> str:
+    """Turn a label or a key name into a valid Python identifier."""
+    result = re.sub(r"\W+", "_", name).strip("_").lower() or "element"
+    return f"_{result}" if result[0].isdigit() else result
+
+
+def _get_attribute_names(model_class: type) -> typing.Dict[str, str]:
+    """Map names of keys as stored in the database to attribute names of properties of the model."""
+    return {
+        property_instance.getdb_name() or property_name: property_name
+        for property_name, property_instance in model_class.__properties__.items()
+    }
+
+
+class _LookupsWriter:
+    """Collect generated functions together with imports they need."""
+
+    __slots__ = ("schema", "models", "function_names", "functions", "imports")
+
+    def __init__(self, schema: SchemaIR):
+        """Create a writer generating lookups for the given schema."""
+        self.schema = schema
+        # Names of model classes as available in the generated module.
+        self.models = {}  # type: typing.Dict[type, str]
+        self.function_names = set()  # type: typing.Set[str]
+        self.functions = []  # type: typing.List[str]
+        self.imports = set()  # type: typing.Set[str]
+
+    def _get_model_name(self, model_class: type) -> str:
+        """Get name of the model class in the generated module, import it if not imported yet."""
+        name = self.models.get(model_class)
+        if name is None:
+            name = model_class.__name__
+            if name in self.models.values():
+                name = f"{_to_identifier(model_class.__module__)}_{name}"
+            self.models[model_class] = name
+        return name
+
+    def _get_function_name(self, name: str, index_name: str) -> str:
+        """Get a unique name of a generated function, index name is used to distinguish clashes."""
+        if name in self.function_names:
+            name = f"{name}_{_to_identifier(index_name)}"
+        self.function_names.add(name)
+        return name
+
+    def _get_type(self, key: str) -> str:
+        """Get Python type used in annotations of the given key."""
+        python_type = _PYTHON_TYPES[self.schema.property_keys[key].data_type]
+        if "." in python_type and not python_type.startswith("typing."):
+            self.imports.add(python_type.split(".", maxsplit=1)[0])
+        return python_type
+
+    def add_index(self, index_name: str, definition: typing.Dict[str, typing.Any], model_class: type) -> None:
+        """Add a finder answered by the given graph index."""
+        model = self._get_model_name(model_class)
+        attribute_names = _get_attribute_names(model_class)
+        keys = definition["keys"]
+        arguments = [attribute_names.get(key, _to_identifier(key)) for key in keys]
+        suffix = f"{_to_identifier(definition['label'])}_by_{'_'.join(arguments)}"
+
+        lines = []
+        if definition["index_type"] == "composite":
+            name = self._get_function_name(f"find_{suffix}", index_name)
+            parameters = ", ".join(f"{argument}: {self._get_type(key)}" for argument, key in zip(arguments, keys))
+            filters = "".join(f".has({key!r}, {argument})" for argument, key in zip(arguments, keys))
+            if definition["unique"]:
+                lines.append(
+                    f"async def {name}(session: Session, {parameters}) -> typing.Optional[{model}]:\n"
+                    f'    """Find {model} using unique composite index {index_name!r}."""\n'
+                    f"    result = await session.traversal({model}){filters}.limit(1).toList()\n"
+                    f"    return result[0] if result else None\n"
+                )
+            else:
+                lines.append(
+                    f"async def {name}(\n"
+                    f"    session: Session, {parameters}, limit: typing.Optional[int] = None\n"
+                    f") -> typing.List[{model}]:\n"
+                    f'    """Find {model} using composite index {index_name!r}."""\n'
+                    f"    traversal = session.traversal({model}){filters}\n"
+                    f"    if limit is not None:\n"
+                    f"        traversal = traversal.limit(limit)\n"
+                    f"    return await traversal.toList()\n"
+                )
+        else:
+            name = self._get_function_name(f"search_{suffix}", index_name)
+            parameters = ", ".join(f"{argument}: typing.Any = None" for argument in arguments)
+            lines.append(
+                f"async def {name}(\n"
+                f"    session: Session, {parameters}, limit: typing.Optional[int] = None\n"
+                f") -> typing.List[{model}]:\n"
+                f'    """Search {model} using mixed index {index_name!r}, values or predicates are accepted."""\n'
+                f"    traversal = session.traversal({model})\n"
+            )
+            for argument, key in zip(arguments, keys):
+                lines.append(
+                    f"    if {argument} is not None:\n"
+                    f"        traversal = traversal.has({key!r}, {argument})\n"
+                )
+            lines.append(
+                "    if limit is not None:\n"
+                "        traversal = traversal.limit(limit)\n"
+                "    return await traversal.toList()\n"
+            )
+
+        self.functions.append("".join(lines))
+
+    def add_edge_index(
+        self, edge_label: str, index_name: str, definition: typing.Dict[str, typing.Any], model_class: type
+    ) -> None:
+        """Add a fetch of incident edges ordered as in the given vertex-centric index."""
+        model = self._get_model_name(model_class)
+        attribute_names = _get_attribute_names(model_class)
+        keys = definition["keys"]
+        arguments = [attribute_names.get(key, _to_identifier(key)) for key in keys]
+        direction = definition["direction"]
+        name = self._get_function_name(
+            f"get_{_to_identifier(edge_label)}_{direction.lower()}_by_{'_'.join(arguments)}", index_name
+        )
+        order = "".join(f".by({key!r}, {_ORDERS[definition['order']]})" for key in keys)
+        self.functions.append(
+            f"async def {name}(\n"
+            f"    session: Session,\n"
+            f"    vertex_id: typing.Any,\n"
+            f"    {arguments[0]}: typing.Any = None,\n"
+            f"    limit: typing.Optional[int] = None,\n"
+            f") -> typing.List[{model}]:\n"
+            f'    """Get {direction.lower()} edges {edge_label!r} of the vertex using vertex-centric index '
+            f'{index_name!r}.\n'
+            f"\n"
+            f"    Edges are ordered by {', '.join(arguments)}, {arguments[0]} accepts a value or a predicate.\n"
+            f'    """\n'
+            f"    traversal = session.g.V(vertex_id).{_DIRECTION_STEPS[direction]}({edge_label!r})\n"
+            f"    if {arguments[0]} is not None:\n"
+            f"        traversal = traversal.has({keys[0]!r}, {arguments[0]})\n"
+            f"    traversal = traversal.order(){order}\n"
+            f"    if limit is not None:\n"
+            f"        traversal = traversal.limit(limit)\n"
+            f"    return await traversal.toList()\n"
+        )
+
+    def write(self, output: typing.TextIO, source: str) -> None:
+        """Write the generated module."""
+        output.write(
+            f'"""Index-backed lookup helpers for models in {source}.\n'
+            f"\n"
+            f"Generated by Goblinoid {goblinoid_version}, do not edit - regenerate the module when models change.\n"
+            f'"""\n\n'
+        )
+        for module in sorted(self.imports | {"typing"}):
+            output.write(f"import {module}\n")
+
+        output.write("\nfrom goblin.session import Session\n")
+        if any(_ORDERS["ASC"] in function or _ORDERS["DESC"] in function for function in self.functions):
+            output.write("from gremlin_python.process.traversal import Order\n")
+
+        output.write("\n")
+        for model_class, name in sorted(self.models.items(), key=lambda item: (item[0].__module__, item[1])):
+            alias = f" as {name}" if name != model_class.__name__ else ""
+            output.write(f"from {model_class.__module__} import {model_class.__name__}{alias}\n")
+
+        for function in self.functions:
+            output.write("\n\n")
+            output.write(function)
+
+
+def generate_lookups(schema: SchemaIR, output: typing.TextIO, source: str) -> int:
+    """Write a Python module with lookup helpers for indexes in the given schema.
+
+    :param schema: schema IR built from models, index records refer to models declaring them
+    :param output: stream the generated module is written to
+    :param source: description of models the module is generated for, stated in the module docstring
+    :return: number of generated functions
+    """
+    writer = _LookupsWriter(schema)
+    for index_name, record in sorted(schema.indexes.items()):
+        writer.add_index(index_name, record.definition, record.model_class)
+
+    for edge_label, label_indexes in sorted(schema.edge_indexes.items()):
+        for index_name, record in sorted(label_indexes.items()):
+            writer.add_edge_index(edge_label, index_name, record.definition, record.model_class)
+
+    writer.write(output, source)
+    return len(writer.functions)
+
+
+def write_lookups(output_file: str, content: str) -> None:
+    """Write a generated module with lookup helpers, the file is written only if its content changes.
+
+    :param output_file: path to the generated module
+    :param content: module generated by generate_lookups
+    """
+    if os.path.isfile(output_file):
+        with open(output_file, "r") as existing:
+            if existing.read() == content:
+                _LOGGER.debug("Lookup helpers in %r are up to date", output_file)
+                return
+
+    _LOGGER.info("Writing lookup helpers into %r", output_file)
+    with open(output_file, "w") as output_stream:
+        output_stream.write(content)
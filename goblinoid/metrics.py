@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Instrumentation of phases Goblinoid goes through when creating schema.
+
+Each phase records its wall time and peak RSS of the process once the phase finishes. If tracing of
+allocations is turned on, net and peak size of memory allocated in the phase are recorded as well (tracing
+slows Python down considerably, so it is opt-in).
+"""
+
+import contextlib
+import json
+import logging
+import sys
+import time
+import tracemalloc
+import typing
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PhaseMetrics(typing.NamedTuple):
+    """Metrics recorded for one phase."""
+
+    name: str
+    wall_time: float
+    peak_rss: typing.Optional[int]
+    allocated: typing.Optional[int] = None
+    peak_allocated: typing.Optional[int] = None
+
+
+def _get_peak_rss() -> typing.Optional[int]:
+    """Get peak resident set size of the process in bytes, None if not available on the platform."""
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class Metrics:
+    """Collector of per-phase metrics and counts of processed schema elements."""
+
+    __slots__ = ("trace_allocations", "phases", "counts")
+
+    def __init__(self, trace_allocations: bool = False):
+        """Initialize collector, trace allocations in each phase if requested."""
+        self.trace_allocations = trace_allocations
+        self.phases = []  # type: typing.List[PhaseMetrics]
+        self.counts = {}  # type: typing.Dict[str, int]
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> typing.Iterator[None]:
+        """Measure the wrapped phase."""
+        tracing = self.trace_allocations and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            wall_time = time.monotonic() - start
+            allocated = peak_allocated = None
+            if tracing:
+                allocated, peak_allocated = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            self.phases.append(PhaseMetrics(name, wall_time, _get_peak_rss(), allocated, peak_allocated))
+            _LOGGER.debug("Phase %r took %.3fs", name, wall_time)
+
+    def count(self, name: str, value: int) -> None:
+        """Record a count, counts recorded multiple times under the same name are summed."""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def count_schema(self, schema: typing.Dict[str, typing.Any]) -> None:
+        """Record number of schema elements in each section of the schema description."""
+        for section, elements in schema.items():
+            if section == "edge_indexes":
+                self.count(section, sum(len(label_indexes) for label_indexes in elements.values()))
+            else:
+                self.count(section, len(elements))
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable representation of recorded metrics."""
+        return {
+            "phases": [phase._asdict() for phase in self.phases],
+            "counts": dict(self.counts),
+            "wall_time": sum(phase.wall_time for phase in self.phases),
+            "peak_rss": max((phase.peak_rss or 0 for phase in self.phases), default=None),
+        }
+
+    def save(self, file: str) -> None:
+        """Store recorded metrics as JSON."""
+        with open(file, "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, sort_keys=True, indent=2)
+
+    def format_summary(self) -> str:
+        """Format recorded metrics for humans."""
+        lines = []
+        for phase in self.phases:
+            line = f"{phase.name:<12} {phase.wall_time:9.3f}s"
+            if phase.peak_rss is not None:
+                line += f"  peak RSS {phase.peak_rss / 1048576:8.1f}MiB"
+            if phase.allocated is not None:
+                line += (
+                    f"  allocated {phase.allocated / 1048576:8.1f}MiB"
+                    f" (peak {phase.peak_allocated / 1048576:.1f}MiB)"
+                )
+            lines.append(line)
+
+        lines.append(f"{'total':<12} {sum(phase.wall_time for phase in self.phases):9.3f}s")
+        if self.counts:
+            lines.append(", ".join(f"{name}: {value}" for name, value in sorted(self.counts.items())))
+
+        return "\n".join(lines)
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Profile a sample of graph data and recommend schema changes based on the data observed.
+
+Two formats of samples are supported, both are streamed so samples do not need to fit into memory:
+
+  * GraphSON in the adjacency list format as written by TinkerPop's GraphSONWriter or JanusGraph's bulk
+    export - one vertex per line with its properties and incident edges, typed (GraphSON 2/3) or untyped
+  * CSV edge list with a header row stating at least source and target columns, optionally label,
+    source_label and target_label columns; remaining columns are treated as edge properties
+
+Lines of GraphSON samples are processed in chunks in a pool of processes and partial profiles are merged.
+Degrees in CSV edge lists are aggregated per vertex, so memory used grows with the number of vertices.
+"""
+
+import collections
+import concurrent.futures
+import csv
+import itertools
+import json
+import logging
+import os
+import re
+import typing
+
+from .enums import EdgeMultiplicity
+from .enums import PropertyDataType
+from .exceptions import SampleProfileError
+from .ir import SchemaIR
+from .ir import get_compatible_data_types
+from .ir import get_goblin_data_type
+
+_LOGGER = logging.getLogger(__name__)
+
+# At most this number of distinct values is tracked per key, cardinality of keys above is reported as a lower bound.
+DISTINCT_LIMIT = 10000
+# Multiplicity is suggested only for edge labels with at least this number of edges in the sample.
+MULTIPLICITY_MIN_EDGES = 100
+
+# Data types of values as stated in typed GraphSON.
+_GRAPHSON_TYPES = {
+    "g:Int32": PropertyDataType.INTEGER,
+    "g:Int64": PropertyDataType.LONG,
+    "g:Float": PropertyDataType.FLOAT,
+    "g:Double": PropertyDataType.DOUBLE,
+    "g:Date": PropertyDataType.DATE,
+    "g:Timestamp": PropertyDataType.DATE,
+    "g:UUID": PropertyDataType.UUID,
+    "gx:Byte": PropertyDataType.BYTE,
+    "gx:Int16": PropertyDataType.SHORT,
+    "gx:Char": PropertyDataType.CHARACTER,
+    "janusgraph:Geoshape": PropertyDataType.GEOSHAPE,
+}
+# Data types values written as strings (e.g. in CSV) can be parsed to.
+_STRING_PATTERNS = (
+    (re.compile(r"^-?\d{1,18}$"), PropertyDataType.LONG),
+    (re.compile(r"^-?(\d+\.\d*|\.\d+|\d+)([eE][-+]?\d+)?$"), PropertyDataType.DOUBLE),
+    (re.compile(r"^(true|false)$", re.IGNORECASE), PropertyDataType.BOOLEAN),
+    (
+        re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE),
+        PropertyDataType.UUID,
+    ),
+    (re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[-+]\d{2}:?\d{2})?)?$"), PropertyDataType.DATE),
+)
+# Numeric data types ordered from the narrowest one.
+_INTEGRAL_TYPES = (PropertyDataType.BYTE, PropertyDataType.SHORT, PropertyDataType.INTEGER, PropertyDataType.LONG)
+_NUMERIC_TYPES = _INTEGRAL_TYPES + (PropertyDataType.FLOAT, PropertyDataType.DOUBLE)
+# Columns of CSV edge lists which do not hold edge properties.
+_EDGE_LIST_COLUMNS = ("source", "target", "label", "source_label", "target_label")
+_INTEGER_RANGE = (-(2 ** 31), 2 ** 31 - 1)
+
+
+class DegreeStats:
+    """Distribution of degrees of vertices, the histogram is kept in power of two buckets."""
+
+    __slots__ = ("count", "total", "maximum", "histogram")
+
+    def __init__(self):
+        """Create empty statistics."""
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+        # Maps bit length of the degree to number of vertices, i.e. bucket n holds degrees in [2^(n-1), 2^n).
+        self.histogram = collections.Counter()  # type: typing.Counter[int]
+
+    def add(self, degree: int) -> None:
+        """Record degree of a vertex."""
+        self.count += 1
+        self.total += degree
+        self.maximum = max(self.maximum, degree)
+        self.histogram[degree.bit_length()] += 1
+
+    def merge(self, other: "DegreeStats") -> None:
+        """Merge statistics computed on another part of the sample."""
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+        self.histogram.update(other.histogram)
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the statistics."""
+        return {
+            "vertices": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0,
+            "max": self.maximum,
+            "histogram": {
+                (f"{2 ** (bucket - 1)}-{2 ** bucket - 1}" if bucket else "0"): count
+                for bucket, count in sorted(self.histogram.items())
+            },
+        }
+
+
+class KeyStats:
+    """Statistics of values of a property key."""
+
+    __slots__ = ("count", "max_values", "distinct", "distinct_overflow", "size_total", "size_max", "data_types")
+
+    def __init__(self):
+        """Create empty statistics."""
+        self.count = 0
+        # The maximum number of values of the key stated on one element.
+        self.max_values = 0
+        self.distinct = set()  # type: typing.Set[typing.Any]
+        self.distinct_overflow = False
+        self.size_total = 0
+        self.size_max = 0
+        self.data_types = collections.Counter()  # type: typing.Counter[PropertyDataType]
+
+    def add(self, values: typing.List[typing.Tuple[typing.Any, PropertyDataType]]) -> None:
+        """Record values of the key stated on one element."""
+        self.max_values = max(self.max_values, len(values))
+        for value, data_type in values:
+            self.count += 1
+            self.data_types[data_type] += 1
+            size = len(str(value))
+            self.size_total += size
+            self.size_max = max(self.size_max, size)
+            if not self.distinct_overflow:
+                self.distinct.add(value if isinstance(value, typing.Hashable) else str(value))
+                if len(self.distinct) > DISTINCT_LIMIT:
+                    self.distinct_overflow = True
+                    self.distinct.clear()
+
+    def merge(self, other: "KeyStats") -> None:
+        """Merge statistics computed on another part of the sample."""
+        self.count += other.count
+        self.max_values = max(self.max_values, other.max_values)
+        self.size_total += other.size_total
+        self.size_max = max(self.size_max, other.size_max)
+        self.data_types.update(other.data_types)
+        self.distinct_overflow = self.distinct_overflow or other.distinct_overflow
+        if not self.distinct_overflow:
+            self.distinct |= other.distinct
+            self.distinct_overflow = len(self.distinct) > DISTINCT_LIMIT
+        if self.distinct_overflow:
+            self.distinct.clear()
+
+    @property
+    def distinct_count(self) -> int:
+        """Number of distinct values, the limit of tracked values is returned if exceeded."""
+        return DISTINCT_LIMIT if self.distinct_overflow else len(self.distinct)
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the statistics."""
+        return {
+            "values": self.count,
+            "max_values_per_element": self.max_values,
+            "distinct": (f">{DISTINCT_LIMIT}" if self.distinct_overflow else len(self.distinct)),
+            "mean_size": round(self.size_total / self.count, 3) if self.count else 0,
+            "max_size": self.size_max,
+            "data_types": {data_type.name: count for data_type, count in self.data_types.most_common()},
+        }
+
+
+class DataProfile:
+    """Statistics computed on a sample of graph data."""
+
+    __slots__ = ("vertex_counts", "edge_counts", "degrees", "keys", "edge_keys")
+
+    def __init__(self):
+        """Create an empty profile."""
+        self.vertex_counts = collections.Counter()  # type: typing.Counter[str]
+        self.edge_counts = collections.Counter()  # type: typing.Counter[str]
+        # Keyed by vertex label, edge label and direction; edge label None holds degrees over all edge labels.
+        self.degrees = {}  # type: typing.Dict[typing.Tuple[str, typing.Optional[str], str], DegreeStats]
+        self.keys = {}  # type: typing.Dict[str, KeyStats]
+        # Keys stated on edges of the given label.
+        self.edge_keys = {}  # type: typing.Dict[str, typing.Set[str]]
+
+    def add_degree(self, vertex_label: str, edge_label: typing.Optional[str], direction: str, degree: int) -> None:
+        """Record degree of a vertex."""
+        stats = self.degrees.get((vertex_label, edge_label, direction))
+        if stats is None:
+            stats = self.degrees[(vertex_label, edge_label, direction)] = DegreeStats()
+        stats.add(degree)
+
+    def add_properties(
+        self, properties: typing.Dict[str, typing.List[typing.Tuple[typing.Any, PropertyDataType]]]
+    ) -> None:
+        """Record properties stated on one element."""
+        for key, values in properties.items():
+            stats = self.keys.get(key)
+            if stats is None:
+                stats = self.keys[key] = KeyStats()
+            stats.add(values)
+
+    def merge(self, other: "DataProfile") -> None:
+        """Merge profile computed on another part of the sample."""
+        self.vertex_counts.update(other.vertex_counts)
+        self.edge_counts.update(other.edge_counts)
+        for stats_key, stats in other.degrees.items():
+            if stats_key in self.degrees:
+                self.degrees[stats_key].merge(stats)
+            else:
+                self.degrees[stats_key] = stats
+        for key, stats in other.keys.items():
+            if key in self.keys:
+                self.keys[key].merge(stats)
+            else:
+                self.keys[key] = stats
+        for edge_label, keys in other.edge_keys.items():
+            self.edge_keys.setdefault(edge_label, set()).update(keys)
+
+    def describe(self) -> typing.Dict[str, typing.Any]:
+        """Get JSON serializable description of the profile."""
+        degrees = {}
+        for (vertex_label, edge_label, direction), stats in sorted(
+            self.degrees.items(), key=lambda item: (item[0][0], item[0][1] or "", item[0][2])
+        ):
+            degrees.setdefault(vertex_label, {})[f"{edge_label or '*'}/{direction}"] = stats.describe()
+
+        return {
+            "vertex_labels": dict(self.vertex_counts.most_common()),
+            "edge_labels": dict(self.edge_counts.most_common()),
+            "degrees": degrees,
+            "property_keys": {key: stats.describe() for key, stats in sorted(self.keys.items())},
+        }
+
+
+class Recommendation(typing.NamedTuple):
+    """A schema change recommended based on the data observed in the sample."""
+
+    kind: str
+    element: str
+    suggestion: str
+    reason: str
+
+
+def _get_string_data_type(value: str) -> PropertyDataType:
+    """Get the narrowest data type the string value can be parsed to."""
+    for pattern, data_type in _STRING_PATTERNS:
+        if pattern.match(value):
+            if data_type == PropertyDataType.LONG and _INTEGER_RANGE[0] <= int(value) <= _INTEGER_RANGE[1]:
+                return PropertyDataType.INTEGER
+            return data_type
+    return PropertyDataType.STRING
+
+
+def _read_value(value: typing.Any) -> typing.Tuple[typing.Any, PropertyDataType]:
+    """Read a (possibly typed) GraphSON value, return the value and its data type."""
+    if isinstance(value, dict) and "@type" in value:
+        data_type = _GRAPHSON_TYPES.get(value["@type"])
+        raw = value.get("@value")
+        if data_type is None:
+            data_type = _read_value(raw)[1] if not isinstance(raw, (dict, list)) else PropertyDataType.STRING
+        if data_type == PropertyDataType.GEOSHAPE:
+            raw = json.dumps(raw, sort_keys=True)
+        return raw, data_type
+
+    if isinstance(value, bool):
+        return value, PropertyDataType.BOOLEAN
+    if isinstance(value, int):
+        in_range = _INTEGER_RANGE[0] <= value <= _INTEGER_RANGE[1]
+        return value, (PropertyDataType.INTEGER if in_range else PropertyDataType.LONG)
+    if isinstance(value, float):
+        return value, PropertyDataType.DOUBLE
+    if isinstance(value, str):
+        # Strings holding e.g. numbers or dates could be stored using a narrower data type.
+        return value, _get_string_data_type(value)
+    return json.dumps(value, sort_keys=True), PropertyDataType.STRING
+
+
+def _unwrap(value: typing.Any) -> typing.Any:
+    """Strip type information of GraphSON 2/3 from elements."""
+    if isinstance(value, dict) and "@type" in value and "@value" in value:
+        return value["@value"]
+    return value
+
+
+def _read_vertex_properties(
+    properties: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.List[typing.Tuple[typing.Any, PropertyDataType]]]:
+    """Read properties of a vertex, each key can hold multiple vertex properties."""
+    result = {}
+    for key, vertex_properties in properties.items():
+        if not isinstance(vertex_properties, list):
+            vertex_properties = [vertex_properties]
+        result[key] = [_read_value(_unwrap(item).get("value")) for item in vertex_properties]
+    return result
+
+
+def _read_edge_properties(
+    properties: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.List[typing.Tuple[typing.Any, PropertyDataType]]]:
+    """Read properties of an edge, values can be wrapped in g:Property in typed GraphSON."""
+    result = {}
+    for key, value in properties.items():
+        value = _unwrap(value)
+        if isinstance(value, dict) and "key" in value and "value" in value:
+            value = value["value"]
+        result[key] = [_read_value(value)]
+    return result
+
+
+def _profile_graphson_lines(lines: typing.List[typing.Tuple[int, str]]) -> DataProfile:
+    """Profile a chunk of lines of a GraphSON sample, each line holding a vertex with its incident edges."""
+    profile = DataProfile()
+    for line_number, line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            vertex = _unwrap(json.loads(line))
+            label = vertex.get("label", "vertex")
+            profile.vertex_counts[label] += 1
+            profile.add_properties(_read_vertex_properties(vertex.get("properties") or {}))
+
+            total = 0
+            for direction, field in (("OUT", "outE"), ("IN", "inE")):
+                degrees = {}
+                for edge_label, edges in (vertex.get(field) or {}).items():
+                    degrees[edge_label] = len(edges)
+                    total += len(edges)
+                    if direction != "OUT":
+                        continue
+
+                    # Edges are stated on both incident vertices, they are counted on their out vertex.
+                    profile.edge_counts[edge_label] += len(edges)
+                    for edge in edges:
+                        properties = _read_edge_properties(_unwrap(edge).get("properties") or {})
+                        profile.edge_keys.setdefault(edge_label, set()).update(properties)
+                        profile.add_properties(properties)
+
+                for edge_label, degree in degrees.items():
+                    profile.add_degree(label, edge_label, direction, degree)
+
+            profile.add_degree(label, None, "BOTH", total)
+        except (ValueError, AttributeError, TypeError) as exc:
+            raise SampleProfileError(f"Failed to read vertex on line {line_number}: {str(exc)}") from exc
+
+    return profile
+
+
+def profile_graphson(file: typing.TextIO, chunk_size: int = 10000, workers: int = None) -> DataProfile:
+    """Profile a sample in GraphSON adjacency list format.
+
+    :param file: file holding the sample, one vertex per line
+    :param chunk_size: number of lines processed at once
+    :param workers: number of worker processes, defaults to number of processors; the sample is processed
+                    in the current process if set to 1
+    """
+    lines = enumerate(file, start=1)
+    chunks = iter(lambda: list(itertools.islice(lines, chunk_size)), [])
+    profile = DataProfile()
+    if workers == 1:
+        for chunk in chunks:
+            profile.merge(_profile_graphson_lines(chunk))
+        return profile
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only a bounded number of chunks is read ahead so the sample is not loaded into memory at once.
+        max_pending = 2 * (workers or os.cpu_count() or 1)
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_profile_graphson_lines, chunk))
+            if len(pending) >= max_pending:
+                profile.merge(pending.popleft().result())
+        while pending:
+            profile.merge(pending.popleft().result())
+
+    return profile
+
+
+def profile_edge_list(file: typing.TextIO, chunk_size: int = 10000) -> DataProfile:
+    """Profile a sample stated as CSV edge list with a header row.
+
+    :param file: file holding the sample
+    :param chunk_size: number of rows processed at once
+    """
+    reader = csv.DictReader(file)
+    if not reader.fieldnames or "source" not in reader.fieldnames or "target" not in reader.fieldnames:
+        raise SampleProfileError("CSV edge list needs to state source and target columns in the header row")
+
+    property_columns = [column for column in reader.fieldnames if column not in _EDGE_LIST_COLUMNS]
+    profile = DataProfile()
+    # Degrees are aggregated per vertex, keyed by vertex id, vertex label, edge label and direction.
+    degrees = collections.Counter()  # type: typing.Counter[typing.Tuple[str, str, str, str]]
+    rows = enumerate(reader, start=2)
+    for chunk in iter(lambda: list(itertools.islice(rows, chunk_size)), []):
+        edges = collections.Counter()
+        for line_number, row in chunk:
+            if row["source"] is None or row["target"] is None:
+                raise SampleProfileError(f"Row on line {line_number} does not state source and target")
+
+            edge_label = row.get("label") or "edge"
+            edges[(row["source"], row.get("source_label") or "vertex", edge_label, "OUT")] += 1
+            edges[(row["target"], row.get("target_label") or "vertex", edge_label, "IN")] += 1
+            profile.edge_counts[edge_label] += 1
+
+            properties = {
+                column: [(row[column], _get_string_data_type(row[column]))]
+                for column in property_columns
+                if row.get(column)
+            }
+            profile.edge_keys.setdefault(edge_label, set()).update(properties)
+            profile.add_properties(properties)
+
+        degrees.update(edges)
+
+    totals = collections.Counter()  # type: typing.Counter[typing.Tuple[str, str]]
+    for (vertex_id, vertex_label, edge_label, direction), degree in degrees.items():
+        profile.add_degree(vertex_label, edge_label, direction, degree)
+        totals[(vertex_id, vertex_label)] += degree
+
+    for (_, vertex_label), degree in totals.items():
+        profile.vertex_counts[vertex_label] += 1
+        profile.add_degree(vertex_label, None, "BOTH", degree)
+
+    return profile
+
+
+def _get_data_type(data_types: typing.Iterable[PropertyDataType]) -> typing.Optional[PropertyDataType]:
+    """Get a data type able to hold all values of the given data types, None if only strings can."""
+    data_types = set(data_types)
+    if len(data_types) == 1:
+        return next(iter(data_types))
+    if data_types <= set(_NUMERIC_TYPES):
+        return max(data_types, key=_NUMERIC_TYPES.index)
+    return None
+
+
+def _recommend_partitioning(
+    profile: DataProfile, schema: typing.Dict[str, typing.Any], supernode_degree: int
+) -> typing.Iterator[Recommendation]:
+    """Recommend partitioning of vertex labels with supernodes."""
+    for (vertex_label, edge_label, _), stats in sorted(profile.degrees.items(), key=lambda item: item[0][0]):
+        if edge_label is not None or stats.maximum < supernode_degree:
+            continue
+
+        definition = schema["vertex_labels"].get(vertex_label)
+        if definition is None or definition.get("partitioned"):
+            continue
+
+        yield Recommendation(
+            "partitioning",
+            f"vertex label {vertex_label!r}",
+            "@vertex_label(partitioned=True)",
+            f"vertices with up to {stats.maximum} incident edges found, partitioning spreads them across the "
+            f"cluster",
+        )
+
+
+def _recommend_edge_indexes(
+    profile: DataProfile, schema: typing.Dict[str, typing.Any], vci_degree: int
+) -> typing.Iterator[Recommendation]:
+    """Recommend vertex-centric indexes for edge labels with many edges incident to a vertex."""
+    directions = {}
+    for (_, edge_label, direction), stats in profile.degrees.items():
+        if edge_label is not None and stats.maximum >= vci_degree:
+            directions.setdefault(edge_label, {})[direction] = max(
+                stats.maximum, directions.get(edge_label, {}).get(direction, 0)
+            )
+
+    for edge_label, degrees in sorted(directions.items()):
+        if edge_label not in schema["edge_labels"] or not profile.edge_keys.get(edge_label):
+            continue
+
+        direction = next(iter(degrees)) if len(degrees) == 1 else "BOTH"
+        indexed_directions = {index["direction"] for index in schema["edge_indexes"].get(edge_label, {}).values()}
+        if "BOTH" in indexed_directions or direction in indexed_directions:
+            continue
+
+        # The key with the most distinct values is the most selective sort key.
+        key = max(sorted(profile.edge_keys[edge_label]), key=lambda item: profile.keys[item].distinct_count)
+        yield Recommendation(
+            "vertex-centric index",
+            f"edge label {edge_label!r}",
+            f"@edge_index({key!r}, direction=IndexDirection.{direction})",
+            f"vertices with up to {max(degrees.values())} incident edges found, {key!r} has the most distinct "
+            f"values of keys stated on the edges",
+        )
+
+
+def _recommend_multiplicity(
+    profile: DataProfile, schema: typing.Dict[str, typing.Any]
+) -> typing.Iterator[Recommendation]:
+    """Recommend multiplicity of edge labels based on degrees observed, report multiplicity violated."""
+    maximums = {}
+    for (_, edge_label, direction), stats in profile.degrees.items():
+        if edge_label is not None:
+            maximums[(edge_label, direction)] = max(stats.maximum, maximums.get((edge_label, direction), 0))
+
+    for edge_label, definition in sorted(schema["edge_labels"].items()):
+        if not profile.edge_counts[edge_label]:
+            continue
+
+        single_out = maximums.get((edge_label, "OUT"), 0) <= 1
+        single_in = maximums.get((edge_label, "IN"), 0) <= 1
+        declared = EdgeMultiplicity[definition.get("multiplicity", "MULTI")]
+        if declared in (EdgeMultiplicity.MULTI, EdgeMultiplicity.SIMPLE):
+            if profile.edge_counts[edge_label] < MULTIPLICITY_MIN_EDGES or not (single_out or single_in):
+                continue
+
+            if single_out and single_in:
+                suggested = EdgeMultiplicity.ONE2ONE
+            elif single_out:
+                suggested = EdgeMultiplicity.MANY2ONE
+            else:
+                suggested = EdgeMultiplicity.ONE2MANY
+            yield Recommendation(
+                "multiplicity",
+                f"edge label {edge_label!r}",
+                f"@multiplicity(EdgeMultiplicity.{suggested.name})",
+                f"at most one {'outgoing' if single_out else 'incoming'} edge per vertex found in "
+                f"{profile.edge_counts[edge_label]} edges",
+            )
+        elif (declared in (EdgeMultiplicity.MANY2ONE, EdgeMultiplicity.ONE2ONE) and not single_out) or (
+            declared in (EdgeMultiplicity.ONE2MANY, EdgeMultiplicity.ONE2ONE) and not single_in
+        ):
+            yield Recommendation(
+                "multiplicity",
+                f"edge label {edge_label!r}",
+                "@multiplicity(EdgeMultiplicity.MULTI)",
+                f"sample violates multiplicity {declared.name} declared",
+            )
+
+
+def _get_key_properties(schema: SchemaIR) -> typing.Dict[str, typing.List[typing.Tuple[type, str, typing.Any]]]:
+    """Get model classes, attribute names and property instances of properties stored under each property key."""
+    result = {}
+    for record in (*schema.vertex_labels.values(), *schema.edge_labels.values()):
+        for property_name, property_instance in record.model_class.__properties__.items():
+            db_name = property_instance.getdb_name() or property_name
+            result.setdefault(db_name, []).append((record.model_class, property_name, property_instance))
+
+    return result
+
+
+def _suggest_data_type(
+    model_class: type, property_name: str, property_instance: typing.Any, data_type: PropertyDataType
+) -> str:
+    """Suggest how to store the property of the model under the given data type."""
+    decorator = f"@data_types({property_name}=PropertyDataType.{data_type.name})"
+    compatible = get_compatible_data_types(property_instance)
+    if compatible is None or data_type in compatible:
+        return f"{decorator} on {model_class.__name__}"
+
+    # The data type cannot be stated for the Goblin data type used, the property type needs to change.
+    property_class = type(property_instance).__name__
+    goblin_data_type = get_goblin_data_type(data_type)
+    if goblin_data_type is None:
+        return (
+            f"{model_class.__name__}.{property_name} = {property_class}(<custom Goblin data type>) "
+            f"with {decorator} on {model_class.__name__}"
+        )
+
+    goblin_name, default = goblin_data_type
+    suggestion = f"{model_class.__name__}.{property_name} = {property_class}(goblin.{goblin_name})"
+    if default != data_type:
+        suggestion += f" with {decorator} on {model_class.__name__}"
+    return suggestion
+
+
+def _recommend_property_keys(profile: DataProfile, schema_ir: SchemaIR) -> typing.Iterator[Recommendation]:
+    """Recommend narrower data types and cardinality of property keys based on values observed."""
+    schema = schema_ir.describe()
+    key_properties = _get_key_properties(schema_ir)
+    for key, definition in sorted(schema["property_keys"].items()):
+        stats = profile.keys.get(key)
+        if stats is None or not stats.count:
+            continue
+
+        declared = PropertyDataType[definition["data_type"]]
+        observed = _get_data_type(stats.data_types)
+        if observed is not None and observed != declared:
+            narrower = declared == PropertyDataType.STRING or (
+                declared in _INTEGRAL_TYPES
+                and observed in _INTEGRAL_TYPES
+                and _INTEGRAL_TYPES.index(observed) < _INTEGRAL_TYPES.index(declared)
+            )
+            if narrower and key in key_properties:
+                # All properties stored under the key need to change, the key has a single data type.
+                yield Recommendation(
+                    "data type",
+                    f"property key {key!r}",
+                    "; ".join(
+                        _suggest_data_type(model_class, property_name, property_instance, observed)
+                        for model_class, property_name, property_instance in key_properties[key]
+                    ),
+                    f"all {stats.count} values found fit {observed.name}, "
+                    f"mean size {stats.size_total / stats.count:.1f} characters",
+                )
+
+        if stats.max_values > 1 and definition["cardinality"] == "SINGLE":
+            yield Recommendation(
+                "cardinality",
+                f"property key {key!r}",
+                "VertexProperty(..., card=Cardinality.set_) or card=Cardinality.list_",
+                f"up to {stats.max_values} values of the key found on one vertex",
+            )
+
+
+def recommend(
+    profile: DataProfile,
+    schema_ir: SchemaIR,
+    supernode_degree: int = 100000,
+    vci_degree: int = 1000,
+) -> typing.List[Recommendation]:
+    """Recommend schema changes combining the profile of a data sample with schema of models.
+
+    :param profile: profile of the data sample
+    :param schema_ir: schema IR built from models, recommendations refer to models and their attributes
+    :param supernode_degree: degree of vertices for which partitioning of their label is recommended
+    :param vci_degree: degree of vertices for which vertex-centric indexes on incident edges are recommended
+    """
+    schema = schema_ir.describe()
+    return [
+        *_recommend_partitioning(profile, schema, supernode_degree),
+        *_recommend_edge_indexes(profile, schema, vci_degree),
+        *_recommend_multiplicity(profile, schema),
+        *_recommend_property_keys(profile, schema_ir),
+    ]
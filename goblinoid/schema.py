@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Helpers for working with schema description as created by Goblinoid.
+
+Schema description is a JSON serializable dictionary with the following sections:
+
+  vertex_labels - vertex label name to its definition
+  edge_labels - edge label name to its definition
+  property_keys - property key name to its definition
+  indexes - graph (composite and mixed) index name to its definition
+  edge_indexes - edge label name to a mapping of vertex-centric index name to its definition
+"""
+
+import operator
+import typing
+
+# Sections in the order schema elements need to be created - labels and keys are referenced by indexes.
+SCHEMA_SECTIONS = ("vertex_labels", "edge_labels", "property_keys", "indexes", "edge_indexes")
+
+
+def empty_schema() -> typing.Dict[str, typing.Any]:
+    """Create a schema description with no schema elements."""
+    return {section: {} for section in SCHEMA_SECTIONS}
+
+
+def iter_schema_elements(
+    schema: typing.Dict[str, typing.Any]
+) -> typing.Iterator[typing.Tuple[str, typing.Tuple[str, ...], typing.Dict[str, typing.Any]]]:
+    """Iterate over schema elements in the order they should be created.
+
+    Yields section name, path to the element in the section (label and index name for vertex-centric
+    indexes, element name otherwise) and definition of the element.
+    """
+    for section in SCHEMA_SECTIONS[:-1]:
+        for name, definition in sorted(schema[section].items(), key=operator.itemgetter(0)):
+            yield section, (name,), definition
+
+    for edge_label, label_indexes in sorted(schema["edge_indexes"].items(), key=operator.itemgetter(0)):
+        for index_name, definition in sorted(label_indexes.items(), key=operator.itemgetter(0)):
+            yield "edge_indexes", (edge_label, index_name), definition
+
+
+def count_schema_elements(schema: typing.Dict[str, typing.Any]) -> int:
+    """Count schema elements in the schema description."""
+    return sum(len(schema[section]) for section in SCHEMA_SECTIONS[:-1]) + sum(
+        len(label_indexes) for label_indexes in schema["edge_indexes"].values()
+    )
+
+
+def select_sections(schema: typing.Dict[str, typing.Any], sections: typing.Iterable[str]) -> typing.Dict[str, typing.Any]:
+    """Create schema description holding only the given sections of the schema description."""
+    result = empty_schema()
+    for section in sections:
+        result[section] = schema[section]
+
+    return result
+
+
+def _get_index_dependencies(
+    section: str, path: typing.Tuple[str, ...], definition: typing.Dict[str, typing.Any]
+) -> typing.List[typing.Tuple[str, typing.Tuple[str, ...]]]:
+    """Get labels and property keys the given index is built on, other schema elements have no dependencies."""
+    if section == "indexes":
+        result = [("property_keys", (key,)) for key in definition["keys"]]
+        if definition["index_only"]:
+            label_section = "vertex_labels" if definition["element"] == "vertex" else "edge_labels"
+            result.append((label_section, (definition["label"],)))
+        return result
+    elif section == "edge_indexes":
+        return [("edge_labels", (path[0],))] + [("property_keys", (key,)) for key in definition["keys"]]
+
+    return []
+
+
+def _group_schema_elements(
+    schema: typing.Dict[str, typing.Any]
+) -> typing.List[typing.List[typing.Tuple[str, typing.Tuple[str, ...], typing.Dict[str, typing.Any]]]]:
+    """Group schema elements so that each index is in one group with labels and keys it is built on.
+
+    Groups do not depend on each other, they are returned in the order of their first schema element.
+    """
+    elements = list(iter_schema_elements(schema))
+    parents = {(section, path): (section, path) for section, path, _ in elements}
+
+    def find(element: typing.Tuple[str, typing.Tuple[str, ...]]) -> typing.Tuple[str, typing.Tuple[str, ...]]:
+        while parents[element] != element:
+            parents[element] = parents[parents[element]]
+            element = parents[element]
+        return element
+
+    for section, path, definition in elements:
+        for dependency in _get_index_dependencies(section, path, definition):
+            # Elements not present were created before, they cannot be created together with the index.
+            if dependency in parents:
+                parents[find(dependency)] = find((section, path))
+
+    groups = {}
+    for section, path, definition in elements:
+        groups.setdefault(find((section, path)), []).append((section, path, definition))
+
+    # Groups are inserted in the order of their first schema element.
+    return list(groups.values())
+
+
+def get_indexes_on_existing_elements(
+    schema: typing.Dict[str, typing.Any], existing: typing.Optional[typing.Dict[str, typing.Any]] = None
+) -> typing.List[str]:
+    """Get names of indexes built on labels or property keys not created together with them.
+
+    JanusGraph enables an index right away only if keys (edge label for vertex-centric indexes) it is built on
+    are created in the same management transaction, other indexes are left installed.
+
+    :param schema: description of schema elements to be created or altered
+    :param existing: description of schema elements created before, elements stated in it are not created again
+    """
+    existing = existing or {}
+
+    def is_created(section: str, name: str) -> bool:
+        return name in schema[section] and name not in existing.get(section, {})
+
+    result = []
+    for index_name, definition in sorted(schema["indexes"].items(), key=operator.itemgetter(0)):
+        # Labels the index is restricted to do not affect the index status.
+        if is_created("indexes", index_name) and not all(
+            is_created("property_keys", key) for key in definition["keys"]
+        ):
+            result.append(index_name)
+
+    for edge_label, label_indexes in sorted(schema["edge_indexes"].items(), key=operator.itemgetter(0)):
+        if is_created("edge_labels", edge_label):
+            continue
+
+        existing_indexes = existing.get("edge_indexes", {}).get(edge_label, {})
+        result.extend(
+            f"{edge_label}/{index_name}" for index_name in sorted(label_indexes) if index_name not in existing_indexes
+        )
+
+    return result
+
+
+def split_schema(schema: typing.Dict[str, typing.Any], chunk_size: int) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Split schema description into chunks holding at most chunk_size schema elements.
+
+    Each index is placed in the same chunk as labels and property keys it is built on, so it is enabled right
+    away once the chunk is committed. Chunks do not depend on each other. Indexes sharing keys are kept together,
+    so a chunk can exceed chunk_size if an index (with keys and other indexes built on them) does not fit.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size has to be a positive number, got {chunk_size}")
+
+    result = []
+    chunk = None
+    chunk_elements = 0
+    for group in _group_schema_elements(schema):
+        if chunk is None or (chunk_elements and chunk_elements + len(group) > chunk_size):
+            chunk = empty_schema()
+            chunk_elements = 0
+            result.append(chunk)
+
+        for section, path, definition in group:
+            if section == "edge_indexes":
+                chunk[section].setdefault(path[0], {})[path[1]] = definition
+            else:
+                chunk[section][path[0]] = definition
+        chunk_elements += len(group)
+
+    return result
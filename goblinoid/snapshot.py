@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Schema snapshots and computation of schema changes between runs."""
+
+import json
+import logging
+import typing
+
+from .exceptions import SchemaChangeError
+from .exceptions import SchemaSnapshotError
+from .schema import count_schema_elements
+from .schema import SCHEMA_SECTIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Increase on incompatible changes in the snapshot format.
+_SNAPSHOT_FORMAT_VERSION = 1
+# Options JanusGraph allows to change on existing schema elements, with values resetting options no longer stated.
+_ALTERABLE_OPTIONS = {"ttl": 0, "consistency": "DEFAULT"}
+
+
+def save_snapshot(snapshot_file: str, schema: typing.Dict[str, typing.Any]) -> None:
+    """Store snapshot of the given schema description into a file."""
+    with open(snapshot_file, "w") as snapshot:
+        json.dump({"version": _SNAPSHOT_FORMAT_VERSION, "schema": schema}, snapshot, sort_keys=True, indent=2)
+
+
+def load_snapshot(snapshot_file: str) -> typing.Dict[str, typing.Any]:
+    """Load schema description from a snapshot file."""
+    try:
+        with open(snapshot_file, "r") as snapshot:
+            content = json.load(snapshot)
+    except (OSError, ValueError) as exc:
+        raise SchemaSnapshotError(f"Failed to load schema snapshot {snapshot_file!r}: {str(exc)}") from exc
+
+    if not isinstance(content, dict) or content.get("version") != _SNAPSHOT_FORMAT_VERSION:
+        raise SchemaSnapshotError(
+            f"Schema snapshot {snapshot_file!r} is not a snapshot in format version {_SNAPSHOT_FORMAT_VERSION}"
+        )
+
+    return content["schema"]
+
+
+def _diff_section(
+    section: str,
+    previous: typing.Dict[str, typing.Any],
+    current: typing.Dict[str, typing.Any],
+    errors: typing.List[str],
+) -> typing.Dict[str, typing.Any]:
+    """Compute new and altered entries in a section of schema description, record other changes as errors."""
+    for name in sorted(previous.keys() - current.keys()):
+        errors.append(f"{section}: {name!r} was removed")
+
+    result = {}
+    for name, definition in current.items():
+        if name not in previous:
+            result[name] = definition
+        elif previous[name] != definition:
+            altered = _get_altered(previous[name], definition)
+            if altered is None:
+                errors.append(f"{section}: {name!r} changed from {previous[name]!r} to {definition!r}")
+            else:
+                _LOGGER.info("Altering %s %r", section, name)
+                result[name] = altered
+
+    return result
+
+
+def _get_altered(
+    previous: typing.Dict[str, typing.Any], current: typing.Dict[str, typing.Any]
+) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """Get definition applying changes of options which can be altered, None if other parts of definition changed."""
+    fixed = {name: value for name, value in previous.items() if name not in _ALTERABLE_OPTIONS}
+    if fixed != {name: value for name, value in current.items() if name not in _ALTERABLE_OPTIONS}:
+        return None
+
+    altered = dict(current)
+    for option, reset_value in _ALTERABLE_OPTIONS.items():
+        if option in previous and option not in current:
+            altered[option] = reset_value
+    return altered
+
+
+def diff_schema(
+    previous: typing.Dict[str, typing.Any], current: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.Any]:
+    """Compute schema description holding only elements added or altered in the current schema description.
+
+    Time-to-live and consistency modifiers of existing schema elements can be altered, altered elements are
+    stated with all their options and options no longer stated are reset. Schema elements cannot be removed
+    nor changed otherwise once created, all such changes are reported at once.
+    """
+    errors = []
+    result = {}
+    for section in SCHEMA_SECTIONS[:-1]:
+        result[section] = _diff_section(section, previous.get(section, {}), current[section], errors)
+
+    # Names of vertex-centric indexes are unique per edge label.
+    result["edge_indexes"] = {}
+    previous_edge_indexes = previous.get("edge_indexes", {})
+    for edge_label in sorted(previous_edge_indexes.keys() - current["edge_indexes"].keys()):
+        for index_name in sorted(previous_edge_indexes[edge_label]):
+            errors.append(f"edge_indexes: {index_name!r} on edge label {edge_label!r} was removed")
+
+    for edge_label, label_indexes in current["edge_indexes"].items():
+        new_indexes = _diff_section(
+            f"edge_indexes of {edge_label!r}", previous_edge_indexes.get(edge_label, {}), label_indexes, errors
+        )
+        if new_indexes:
+            result["edge_indexes"][edge_label] = new_indexes
+
+    if errors:
+        raise SchemaChangeError(
+            "Schema changes not supported by incremental schema creation found:\n" + "\n".join(errors)
+        )
+
+    _LOGGER.info("Found %d new or altered schema elements", count_schema_elements(result))
+    return result
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Direct submission of schema to Gremlin Server."""
+
+import asyncio
+import json
+import logging
+import time
+import typing
+
+from goblin.driver import Cluster
+
+from .exceptions import SchemaSubmitError
+from .groovy import get_index_file_script
+from .groovy import get_submit_script
+from .lifecycle import get_lifecycle_bindings
+from .lifecycle import get_lifecycle_script
+from .lifecycle import IndexLifecycle
+from .schema import count_schema_elements
+from .schema import split_schema
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def _submit(
+    client: typing.Any, script: str, bindings: typing.Optional[typing.Dict[str, str]], step: str
+) -> float:
+    """Submit a script to Gremlin Server, return time spent on the request."""
+    start = time.monotonic()
+    try:
+        result_set = await client.submit(script, bindings=bindings)
+        await result_set.all()
+    except Exception as exc:
+        raise SchemaSubmitError(f"Failed to apply {step}: {str(exc)}") from exc
+
+    duration = time.monotonic() - start
+    _LOGGER.info("Applied %s in %.3fs", step, duration)
+    return duration
+
+
+async def apply_schema_async(
+    schema: typing.Dict[str, typing.Any],
+    hosts: typing.List[str],
+    port: int = 8182,
+    index_file: str = None,
+    chunk_size: int = None,
+    max_inflight: int = 8,
+    response_timeout: float = None,
+    index_lifecycle: IndexLifecycle = None,
+) -> typing.Dict[str, float]:
+    """Apply schema using one pooled connection, a coroutine to be used in an already running event loop.
+
+    See apply_schema for details.
+    """
+    loop = asyncio.get_event_loop()
+    # One connection is used, requests in flight are multiplexed on it.
+    cluster = await Cluster.open(
+        loop,
+        hosts=hosts,
+        port=port,
+        min_conns=1,
+        max_conns=1,
+        max_times_acquired=max_inflight,
+        max_inflight=max_inflight,
+        response_timeout=response_timeout,
+    )
+    script = get_submit_script()
+    timings = {}
+    try:
+        client = await cluster.connect()
+        # Indexes are created in the same transaction as keys they are built on so that they are enabled right
+        # away, chunks keep them together and do not depend on each other, so they are pipelined.
+        if chunk_size:
+            chunks = split_schema(schema, chunk_size)
+        else:
+            chunks = [schema] if count_schema_elements(schema) else []
+        steps = [f"chunk {idx}/{len(chunks)}" for idx in range(1, len(chunks) + 1)]
+        durations = await asyncio.gather(
+            *(
+                _submit(client, script, {"schemaDescription": json.dumps(chunk, sort_keys=True)}, step)
+                for step, chunk in zip(steps, chunks)
+            )
+        )
+        timings.update(zip(steps, durations))
+
+        if index_file:
+            _LOGGER.info("Adding indexes from file %r", index_file)
+            timings["index file"] = await _submit(client, get_index_file_script(index_file), None, "index file")
+
+        if index_lifecycle:
+            bindings = get_lifecycle_bindings(schema, index_lifecycle)
+            if bindings["lifecycleIndexes"]:
+                timings["index lifecycle"] = await _submit(client, get_lifecycle_script(), bindings, "index lifecycle")
+    finally:
+        await cluster.close()
+
+    return timings
+
+
+def apply_schema(
+    schema: typing.Dict[str, typing.Any],
+    hosts: typing.List[str],
+    port: int = 8182,
+    index_file: str = None,
+    chunk_size: int = None,
+    max_inflight: int = 8,
+    response_timeout: float = None,
+    index_lifecycle: IndexLifecycle = None,
+) -> typing.Dict[str, float]:
+    """Apply the given schema description directly to Gremlin Server.
+
+    Schema is applied in one management transaction unless chunk size is given. Each chunk is applied in its
+    own management transaction, indexes are placed in the same chunk as keys they are built on and chunks are
+    pipelined over one pooled connection. If index lifecycle configuration is provided, newly created indexes
+    are reindexed and enabled at the end.
+
+    The event loop of the current thread is run until schema is applied, use apply_schema_async in coroutines.
+
+    :return: time in seconds spent on each submitted step
+    """
+    start = time.monotonic()
+    loop = asyncio.get_event_loop()
+    timings = loop.run_until_complete(
+        apply_schema_async(
+            schema, hosts, port, index_file, chunk_size, max_inflight, response_timeout, index_lifecycle
+        )
+    )
+    _LOGGER.info("Schema applied in %d steps in %.3fs", len(timings), time.monotonic() - start)
+    return timings
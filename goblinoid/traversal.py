@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Parsing of Gremlin traversals as found in query logs.
+
+Only the parts of traversals relevant to index usage are extracted - filters right after the start of
+a traversal (g.V()/g.E()) which can be answered by graph indexes and filters or ordering of incident
+edges which can be answered by vertex-centric indexes. Both Groovy and Python (gremlin_python) spelling
+of steps is understood. Anonymous traversals nested in steps are not inspected.
+"""
+
+import re
+import typing
+
+# Tokens of Gremlin traversals: strings, numbers, names and punctuation.
+_TOKEN = re.compile(
+    r"""\s*(?:(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")"""
+    r"""|(?P<number>-?\d+(?:\.\d+)?[LlDdFf]?)"""
+    r"""|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"""
+    r"""|(?P<punctuation>[().,\[\]]))"""
+)
+# Start of a traversal in a line of a query log.
+_TRAVERSAL_START = re.compile(r"\bg\s*\.\s*[VE]\s*\(")
+# Predicates which can be answered only by mixed indexes.
+_RANGE_PREDICATES = frozenset(
+    (
+        "gt",
+        "gte",
+        "lt",
+        "lte",
+        "inside",
+        "outside",
+        "between",
+        "textContains",
+        "textContainsPrefix",
+        "textContainsRegex",
+        "textContainsFuzzy",
+        "textPrefix",
+        "textRegex",
+        "textFuzzy",
+    )
+)
+_EDGE_STEPS = {"outE": "OUT", "inE": "IN", "bothE": "BOTH", "out": "OUT", "in": "IN", "in_": "IN", "both": "BOTH"}
+_FILTER_STEPS = frozenset(("has", "hasLabel", "has_label"))
+_ORDER_STEPS = frozenset(("order", "by", "limit", "range", "range_"))
+
+
+class Call(typing.NamedTuple):
+    """A call of a step or a predicate, e.g. has('name', 'goblinoid') or gt(3)."""
+
+    name: str
+    args: typing.Tuple[typing.Any, ...]
+
+
+class GraphLookup(typing.NamedTuple):
+    """Filters answered by a graph index at the start of a traversal."""
+
+    element: str
+    label: typing.Optional[str]
+    keys: typing.Tuple[str, ...]
+    range_keys: typing.Tuple[str, ...]
+
+
+class EdgeLookup(typing.NamedTuple):
+    """Filters or ordering of incident edges answered by a vertex-centric index."""
+
+    edge_label: str
+    direction: str
+    keys: typing.Tuple[str, ...]
+    order: typing.Optional[typing.Tuple[str, str]] = None
+
+
+class _Parser:
+    """A small recursive descent parser of chained calls."""
+
+    __slots__ = ("tokens", "position")
+
+    def __init__(self, text: str):
+        """Tokenize the given text, tokenization stops on the first unknown character."""
+        self.tokens = []
+        position = 0
+        while True:
+            match = _TOKEN.match(text, position)
+            if not match or match.end() == position:
+                break
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.position = 0
+
+    def _peek(self) -> typing.Optional[typing.Tuple[str, str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> typing.Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ValueError("Unexpected end of traversal")
+        self.position += 1
+        return token
+
+    def _accept(self, value: str) -> bool:
+        token = self._peek()
+        if token is not None and token[1] == value:
+            self.position += 1
+            return True
+        return False
+
+    def _expression(self) -> typing.Any:
+        """Parse an argument - a literal, a list or a (qualified) name optionally called."""
+        kind, value = self._next()
+        if kind == "string":
+            return value[1:-1].replace("\\'", "'").replace('\\"', '"')
+        if kind == "number":
+            return value.rstrip("LlDdFf")
+        if value == "[":
+            items = []
+            while not self._accept("]"):
+                items.append(self._expression())
+                self._accept(",")
+            return items
+        if kind != "name":
+            raise ValueError(f"Unexpected token {value!r}")
+
+        # Qualified names such as P.gt, T.label or Order.desc are reduced to their last part.
+        while self._accept("."):
+            _, value = self._next()
+        if self._accept("("):
+            return Call(value, self._arguments())
+        return value
+
+    def _arguments(self) -> typing.Tuple[typing.Any, ...]:
+        args = []
+        while not self._accept(")"):
+            args.append(self._expression())
+            self._accept(",")
+        return tuple(args)
+
+    def steps(self) -> typing.List[Call]:
+        """Parse steps of a traversal chained by dots, parsing stops on the first unexpected token."""
+        result = []
+        try:
+            while True:
+                kind, value = self._next()
+                if kind != "name" or not self._accept("("):
+                    break
+                result.append(Call(value, self._arguments()))
+                if not self._accept("."):
+                    break
+        except ValueError:
+            pass
+        return result
+
+
+def parse_traversal(text: str) -> typing.List[Call]:
+    """Parse steps of a traversal, the traversal source (g) is expected to be stripped."""
+    return _Parser(text).steps()
+
+
+def find_traversals(line: str) -> typing.Iterator[str]:
+    """Find traversals in a line of a query log, yield each traversal without its traversal source."""
+    for match in _TRAVERSAL_START.finditer(line):
+        yield line[match.start() + 1:].lstrip(" .")
+
+
+def _is_label(value: typing.Any) -> bool:
+    return value in ("label", "T.label")
+
+
+def _get_filter(step: Call) -> typing.Optional[typing.Tuple[typing.Optional[str], typing.Optional[str], bool]]:
+    """Get label, key and a flag whether range predicate is used from a filter step."""
+    if step.name in ("hasLabel", "has_label"):
+        return (step.args[0] if len(step.args) == 1 and isinstance(step.args[0], str) else None), None, False
+
+    args = step.args
+    label = None
+    if len(args) == 3:
+        label, args = (args[0] if isinstance(args[0], str) else None), args[1:]
+    if len(args) != 2 or not isinstance(args[0], str):
+        # Existence checks and traversal filters cannot be answered by indexes.
+        return None
+
+    if _is_label(args[0]):
+        return (args[1] if isinstance(args[1], str) else None), None, False
+
+    is_range = isinstance(args[1], Call) and args[1].name in _RANGE_PREDICATES
+    return label, args[0], is_range
+
+
+def extract_lookups(steps: typing.List[Call]) -> typing.List[typing.Union[GraphLookup, EdgeLookup]]:
+    """Extract filters of the traversal which can be answered by indexes."""
+    if not steps or steps[0].name not in ("V", "E"):
+        return []
+
+    result = []
+    label = None
+    keys = []
+    range_keys = []
+    position = 1
+    while position < len(steps) and steps[position].name in _FILTER_STEPS:
+        found = _get_filter(steps[position])
+        position += 1
+        if found is None:
+            continue
+        step_label, key, is_range = found
+        label = step_label or label
+        if key is not None:
+            (range_keys if is_range else keys).append(key)
+
+    # Traversals starting at given elements do not use graph indexes, incident edges can still use edge indexes.
+    if (keys or range_keys) and not steps[0].args:
+        element = "vertex" if steps[0].name == "V" else "edge"
+        result.append(GraphLookup(element, label, tuple(keys), tuple(range_keys)))
+
+    # Filters and ordering of incident edges.
+    for idx in range(position, len(steps)):
+        step = steps[idx]
+        direction = _EDGE_STEPS.get(step.name)
+        if direction is None or len(step.args) != 1 or not isinstance(step.args[0], str):
+            continue
+
+        edge_keys = []
+        order = None
+        for next_step in steps[idx + 1:]:
+            if next_step.name in _FILTER_STEPS and step.name.endswith("E"):
+                found = _get_filter(next_step)
+                if found is not None and found[1] is not None:
+                    edge_keys.append(found[1])
+            elif next_step.name == "by" and next_step.args and isinstance(next_step.args[0], str):
+                order_name = next_step.args[1] if len(next_step.args) > 1 else "asc"
+                order = (next_step.args[0], "DESC" if str(order_name).lower() in ("desc", "decr") else "ASC")
+            elif next_step.name not in _ORDER_STEPS and next_step.name not in _FILTER_STEPS:
+                break
+
+        if edge_keys or order:
+            result.append(EdgeLookup(step.args[0], direction, tuple(edge_keys), order))
+
+    return result
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Watch sources of models and create schema again when they change.
+
+Sources of the package holding models are polled for changes. Once a source file changes, the changed modules
+and modules referencing objects defined in them are reloaded; other modules stay imported. Schema of all models
+is described again and the whole resulting script is written, only if the schema described by models changed.
+"""
+
+import importlib
+import logging
+import os
+import sys
+import time
+import types
+import typing
+
+from .create import create_schema
+from .create import describe_schema
+from .discovery import iter_package_sources
+from .exceptions import GoblinoidExceptionBase
+from .schema import iter_schema_elements
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _get_source_stats(module_import: str) -> typing.Dict[str, typing.Tuple[int, int]]:
+    """Get modification time and size of each source of the package holding models."""
+    result = {}
+    for _, file_path in iter_package_sources(module_import):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        result[file_path] = (stat.st_mtime_ns, stat.st_size)
+
+    return result
+
+
+def _references(value: typing.Any, module_names: typing.Set[str]) -> bool:
+    """Check whether the given value is one of the modules or it was defined in one of the modules."""
+    if isinstance(value, types.ModuleType):
+        return value.__name__ in module_names
+
+    if isinstance(value, (tuple, list, set, frozenset)):
+        # Models iterables are commonly built from models imported from other modules.
+        return any(getattr(item, "__module__", None) in module_names for item in value)
+
+    return getattr(value, "__module__", None) in module_names
+
+
+def _get_affected_modules(package: str, changed_paths: typing.Set[str]) -> typing.List[types.ModuleType]:
+    """Get loaded modules which need to be reloaded, in the order they should be reloaded."""
+    loaded = {}
+    for module_name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and (module_name == package or module_name.startswith(package + ".")):
+            loaded[os.path.abspath(module_file)] = module
+
+    affected = [loaded[path] for path in sorted(changed_paths) if path in loaded]
+    affected_names = {module.__name__ for module in affected}
+    # Modules holding references to objects of reloaded modules need to be reloaded as well, once their
+    # dependencies are reloaded.
+    found = True
+    while found:
+        found = False
+        for module in loaded.values():
+            if module.__name__ in affected_names:
+                continue
+
+            if any(_references(value, affected_names) for value in vars(module).values()):
+                affected.append(module)
+                affected_names.add(module.__name__)
+                found = True
+
+    return affected
+
+
+def _log_changes(previous: typing.Optional[typing.Dict[str, typing.Any]], schema: typing.Dict[str, typing.Any]) -> None:
+    """Report schema elements which were added, changed or removed."""
+    if previous is None:
+        return
+
+    previous_elements = {(section, path): definition for section, path, definition in iter_schema_elements(previous)}
+    elements = {(section, path): definition for section, path, definition in iter_schema_elements(schema)}
+    for key in sorted(set(previous_elements) | set(elements)):
+        section, path = key
+        if key not in previous_elements:
+            _LOGGER.info("Added %s %s", section, "/".join(path))
+        elif key not in elements:
+            _LOGGER.info("Removed %s %s", section, "/".join(path))
+        elif previous_elements[key] != elements[key]:
+            _LOGGER.info("Changed %s %s", section, "/".join(path))
+
+
+def _wait_for_changes(
+    module_import: str, sources: typing.Dict[str, typing.Tuple[int, int]], interval: float
+) -> typing.Tuple[typing.Dict[str, typing.Tuple[int, int]], typing.Set[str]]:
+    """Poll sources until any of them changes, return new state of sources and paths changed."""
+    while True:
+        time.sleep(interval)
+        current = _get_source_stats(module_import)
+        changed = {path for path in set(current) | set(sources) if current.get(path) != sources.get(path)}
+        if changed:
+            return current, changed
+
+
+def watch_schema(
+    module_import: str,
+    models_iterable: str,
+    output_file: str,
+    interval: float = 0.5,
+    static_discovery: bool = False,
+    **kwargs: typing.Any,
+) -> None:
+    """Create schema and create it again each time sources of models change, runs until interrupted.
+
+    :param module_import: import specification of module holding models iterable
+    :param models_iterable: name of iterable that holds all models
+    :param output_file: path to the resulting groovy script
+    :param interval: interval in seconds in which sources are checked for changes
+    :param static_discovery: discover models by static analysis of sources instead of importing them
+    :param kwargs: additional arguments passed to create_schema
+    """
+    package = module_import.split(".", maxsplit=1)[0]
+    sources = _get_source_stats(module_import)
+    previous = None
+    while True:
+        start = time.monotonic()
+        try:
+            schema = describe_schema(module_import, models_iterable, static_discovery)
+            if schema != previous:
+                _log_changes(previous, schema)
+                # Models are described already, let the writer use the description instead of describing them again.
+                create_schema(module_import, models_iterable, output_file, schema=schema, **kwargs)
+                previous = schema
+                _LOGGER.info("Schema written to %r in %.3fs", output_file, time.monotonic() - start)
+            else:
+                _LOGGER.info("No changes in schema")
+        except GoblinoidExceptionBase as exc:
+            _LOGGER.error("Failed to create schema: %s", str(exc))
+
+        _LOGGER.info("Watching %d source files of %r for changes", len(sources), package)
+        sources, changed = _wait_for_changes(module_import, sources, interval)
+        _LOGGER.info("Changed: %s", ", ".join(sorted(changed)))
+
+        if static_discovery:
+            # Sources are parsed again on each run, nothing to reload.
+            continue
+
+        for module in _get_affected_modules(package, changed):
+            _LOGGER.debug("Reloading module %r", module.__name__)
+            try:
+                importlib.reload(module)
+            except Exception as exc:
+                _LOGGER.error("Failed to reload module %r: %s", module.__name__, str(exc))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""A local stand-in for Gremlin Server to be used in tests.
+
+The server accepts script evaluation requests sent over the websocket protocol, records them and
+responds with results computed by an optional handler. The server runs in the event loop of the caller,
+so schema is applied using the coroutine variant of apply_schema (goblinoid.submit.apply_schema_async):
+
+  async def test_apply_schema():
+      async with FakeGremlinServer() as server:
+          await apply_schema_async(schema, hosts=[server.host], port=server.port)
+
+      assert server.requests
+
+  asyncio.get_event_loop().run_until_complete(test_apply_schema())
+"""
+
+import json
+import logging
+import typing
+
+from aiohttp import web
+from aiohttp import WSMsgType
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FakeGremlinServer:
+    """A fake Gremlin Server recording submitted scripts together with bindings."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        handler: typing.Callable[[str, typing.Dict[str, typing.Any]], typing.List[typing.Any]] = None,
+    ):
+        """Create the server, port 0 picks a random free port once started.
+
+        :param handler: a callable computing result data of a request, raised exceptions are reported as server errors
+        """
+        self.host = host
+        self.port = port
+        self.requests = []
+        self._handler = handler
+        self._runner = None
+
+    async def start(self) -> None:
+        """Start listening for requests."""
+        app = web.Application()
+        app.router.add_get("/gremlin", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        _LOGGER.debug("Fake Gremlin Server listening on %s:%d", self.host, self.port)
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeGremlinServer":
+        """Start the server on entering context."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        """Stop the server on leaving context."""
+        await self.stop()
+
+    def _respond(self, request: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        """Compute response to the given request message."""
+        request_id = request["requestId"]
+        if isinstance(request_id, dict):
+            # Request identifier serialized as GraphSON typed value.
+            request_id = request_id["@value"]
+
+        args = request.get("args", {})
+        gremlin = args.get("gremlin")
+        bindings = args.get("bindings", {})
+        self.requests.append((gremlin, bindings))
+
+        try:
+            data = self._handler(gremlin, bindings) if self._handler else []
+            status = {"code": 200, "message": "", "attributes": {}}
+        except Exception as exc:
+            data = None
+            status = {"code": 500, "message": str(exc), "attributes": {}}
+
+        return {"requestId": request_id, "status": status, "result": {"data": data, "meta": {}}}
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        """Handle websocket connection from a client."""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            if message.type == WSMsgType.BINARY:
+                # Binary frames are prefixed with length of mime type and mime type itself.
+                payload = message.data[message.data[0] + 1:]
+            elif message.type == WSMsgType.TEXT:
+                payload = message.data
+            else:
+                continue
+
+            await ws.send_str(json.dumps(self._respond(json.loads(payload))))
+
+        return ws
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the cache of generated scripts."""
+
+import os
+
+from goblinoid.cache import BuildCache
+from goblinoid.cache import hash_module_sources
+
+
+def _write(path: str, content: str) -> None:
+    with open(path, "w") as output_file:
+        output_file.write(content)
+
+
+def _put(cache: BuildCache, key: str) -> None:
+    cache.put(key, {"script": "graph.tx().commit()", "sources": hash_module_sources(["goblinoid_test_models"])})
+
+
+def test_cache_invalidated_by_model_sources(tmp_path, monkeypatch):
+    """Test an entry is invalidated once sources of models defined outside of the hashed package change."""
+    package_dir = tmp_path / "goblinoid_test_app"
+    package_dir.mkdir()
+    _write(str(package_dir / "__init__.py"), "from goblinoid_test_models import ALL_MODELS\n")
+    models_path = str(tmp_path / "goblinoid_test_models.py")
+    _write(models_path, "ALL_MODELS = ()\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    cache = BuildCache(str(tmp_path / "cache"))
+    key = cache.compute_key("goblinoid_test_app", "ALL_MODELS", files=(), options={})
+    _put(cache, key)
+    assert cache.get(key)["script"] == "graph.tx().commit()"
+
+    _write(models_path, "ALL_MODELS = ()\n# changed\n")
+    # Models are not part of the package hashed into the key, the key stays the same.
+    assert cache.compute_key("goblinoid_test_app", "ALL_MODELS", files=(), options={}) == key
+    assert cache.get(key) is None
+
+    _put(cache, key)
+    assert cache.get(key) is not None
+    os.remove(models_path)
+    assert cache.get(key) is None
+
+
+def test_cache_key_package_sources(tmp_path, monkeypatch):
+    """Test the key changes with sources of the package holding models."""
+    package_dir = tmp_path / "goblinoid_test_app"
+    package_dir.mkdir()
+    _write(str(package_dir / "__init__.py"), "ALL_MODELS = ()\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    cache = BuildCache(str(tmp_path / "cache"))
+    key = cache.compute_key("goblinoid_test_app", "ALL_MODELS", files=(), options={})
+    _write(str(package_dir / "models.py"), "")
+    assert cache.compute_key("goblinoid_test_app", "ALL_MODELS", files=(), options={}) != key
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for static discovery of models."""
+
+import sys
+
+from goblinoid.discovery import discover_models
+from goblinoid.ir import build_schema_ir
+from goblinoid.utils import get_iterable_from_module
+
+_MODELS_SOURCE = '''
+import goblin
+
+from goblinoid import composite_index
+from goblinoid import edge_index
+from goblinoid import multiplicity
+from goblinoid.enums import EdgeMultiplicity
+from goblinoid.enums import IndexOrder
+
+
+class Base(goblin.Vertex):
+    description = goblin.VertexProperty(goblin.String)
+
+
+@composite_index("name", "version", unique=True, index_only=True)
+class Package(Base):
+    name = goblin.VertexProperty(goblin.String, db_name="package_name")
+    version = goblin.VertexProperty(goblin.String)
+
+
+@multiplicity(EdgeMultiplicity.MULTI)
+@edge_index("weight", order=IndexOrder.DESC)
+class DependsOn(goblin.Edge):
+    weight = goblin.Property(goblin.Integer)
+'''
+
+
+def _describe(models: tuple) -> dict:
+    for model_class in models:
+        # Goblin registers its internal dirty flag as a property of models.
+        model_class.__properties__.pop("dirty", None)
+    return build_schema_ir(models, "goblinoid_test_discovery", "ALL_MODELS").describe()
+
+
+def test_static_discovery_matches_import(tmp_path, monkeypatch):
+    """Test models discovered statically describe the same schema as imported models."""
+    package_dir = tmp_path / "goblinoid_test_discovery"
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("from .models import Package, DependsOn\n\nALL_MODELS = (Package, DependsOn)\n")
+    (package_dir / "models.py").write_text(_MODELS_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    discovered = discover_models("goblinoid_test_discovery", "ALL_MODELS")
+    # Static discovery does not import the package.
+    assert "goblinoid_test_discovery" not in sys.modules
+
+    try:
+        imported = get_iterable_from_module("goblinoid_test_discovery", "ALL_MODELS")
+        assert [model_class.__name__ for model_class in discovered] == ["Package", "DependsOn"]
+        assert _describe(tuple(discovered)) == _describe(tuple(imported))
+    finally:
+        for module_name in ("goblinoid_test_discovery", "goblinoid_test_discovery.models"):
+            sys.modules.pop(module_name, None)
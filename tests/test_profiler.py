@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Tests for schema changes recommended based on profiles of data samples."""
+
+import io
+
+import goblin
+
+from goblinoid import data_types
+from goblinoid.enums import PropertyDataType
+from goblinoid.ir import build_schema_ir
+from goblinoid.profiler import profile_edge_list
+from goblinoid.profiler import recommend
+
+_SAMPLE = """source,target,label,stars,created
+1,2,rated,3,2019-01-02
+1,3,rated,5,2019-02-03
+"""
+
+
+def _get_models(*model_classes: type) -> tuple:
+    # Goblin registers its internal dirty flag as a property of models.
+    for model_class in model_classes:
+        model_class.__properties__.pop("dirty", None)
+    return model_classes
+
+
+def _get_data_type_suggestions(*model_classes: type) -> dict:
+    schema = build_schema_ir(model_classes, "tests", "models")
+    profile = profile_edge_list(io.StringIO(_SAMPLE))
+    return {
+        recommendation.element: recommendation.suggestion
+        for recommendation in recommend(profile, schema)
+        if recommendation.kind == "data type"
+    }
+
+
+def test_recommend_data_type_applied():
+    """Test a recommended data type of a String property refers to model attributes and can be applied."""
+
+    class Rated(goblin.Edge):
+        stars = goblin.Property(goblin.String)
+        created_at = goblin.Property(goblin.String, db_name="created")
+
+    suggestions = _get_data_type_suggestions(*_get_models(Rated))
+    # Data types not compatible with String cannot be stated using data_types decorator, type of the property
+    # needs to change.
+    assert suggestions == {
+        "property key 'stars'": "Rated.stars = Property(goblin.Integer)",
+        "property key 'created'": (
+            "Rated.created_at = Property(<custom Goblin data type>) "
+            "with @data_types(created_at=PropertyDataType.DATE) on Rated"
+        ),
+    }
+
+    class RatedApplied(goblin.Edge):
+        __label__ = "rated"
+        stars = goblin.Property(goblin.Integer)
+        created_at = goblin.Property(goblin.String, db_name="created")
+
+    schema = build_schema_ir(_get_models(RatedApplied), "tests", "models")
+    assert schema.property_keys["stars"].data_type == PropertyDataType.INTEGER
+    assert "property key 'stars'" not in _get_data_type_suggestions(RatedApplied)
+
+
+def test_recommend_data_type_decorator():
+    """Test a data type compatible with the Goblin data type is recommended using data_types decorator."""
+
+    @data_types(stars=PropertyDataType.LONG)
+    class Rated(goblin.Edge):
+        stars = goblin.Property(goblin.Integer)
+
+    suggestions = _get_data_type_suggestions(*_get_models(Rated))
+    assert suggestions == {"property key 'stars'": "@data_types(stars=PropertyDataType.INTEGER) on Rated"}
+
+    data_types(stars=PropertyDataType.INTEGER)(Rated)
+    schema = build_schema_ir((Rated,), "tests", "models")
+    assert schema.property_keys["stars"].data_type == PropertyDataType.INTEGER
+    assert not _get_data_type_suggestions(Rated)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for splitting schema description into chunks."""
+
+from goblinoid.schema import count_schema_elements
+from goblinoid.schema import split_schema
+
+_SCHEMA = {
+    "vertex_labels": {"package": {}, "person": {}},
+    "edge_labels": {"depends_on": {"multiplicity": "MULTI"}},
+    "property_keys": {
+        "package_name": {"data_type": "STRING", "cardinality": "SINGLE"},
+        "version": {"data_type": "STRING", "cardinality": "SINGLE"},
+        "description": {"data_type": "STRING", "cardinality": "SINGLE"},
+        "weight": {"data_type": "INTEGER", "cardinality": "SINGLE"},
+        "email": {"data_type": "STRING", "cardinality": "SINGLE"},
+    },
+    "indexes": {
+        "package_name_version": {
+            "index_type": "composite",
+            "element": "vertex",
+            "label": "package",
+            "keys": ["package_name", "version"],
+            "index_only": True,
+            "unique": True,
+        },
+        "package_version": {
+            "index_type": "composite",
+            "element": "vertex",
+            "keys": ["version"],
+            "index_only": False,
+            "unique": False,
+        },
+    },
+    "edge_indexes": {
+        "depends_on": {"depends_on_weight": {"keys": ["weight"], "direction": "OUT", "order": "DESC"}},
+    },
+}
+
+
+def _find_chunk(chunks: list, section: str, *path: str) -> int:
+    """Find index of the chunk holding the given schema element."""
+    (found,) = [
+        position
+        for position, chunk in enumerate(chunks)
+        if path[0] in chunk[section] and (len(path) == 1 or path[1] in chunk[section][path[0]])
+    ]
+    return found
+
+
+def test_split_schema_keeps_indexes_with_keys():
+    """Test each index is in the same chunk as labels and keys it is built on."""
+    chunks = split_schema(_SCHEMA, 1)
+
+    assert sum(count_schema_elements(chunk) for chunk in chunks) == count_schema_elements(_SCHEMA)
+    assert len(chunks) > 1
+
+    # Indexes sharing a key are kept together with all their keys and the label one of them is restricted to.
+    position = _find_chunk(chunks, "indexes", "package_name_version")
+    assert _find_chunk(chunks, "indexes", "package_version") == position
+    for section, name in (("property_keys", "package_name"), ("property_keys", "version"), ("vertex_labels", "package")):
+        assert _find_chunk(chunks, section, name) == position
+
+    position = _find_chunk(chunks, "edge_indexes", "depends_on", "depends_on_weight")
+    assert _find_chunk(chunks, "edge_labels", "depends_on") == position
+    assert _find_chunk(chunks, "property_keys", "weight") == position
+
+
+def test_split_schema_chunk_size():
+    """Test elements not related to each other are split into chunks of the given size."""
+    chunks = split_schema(_SCHEMA, 1)
+    unrelated = [chunk for chunk in chunks if not chunk["indexes"] and not chunk["edge_indexes"]]
+    assert unrelated
+    assert all(count_schema_elements(chunk) == 1 for chunk in unrelated)
+    assert split_schema(_SCHEMA, count_schema_elements(_SCHEMA)) == [_SCHEMA]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for computing schema changes against snapshots."""
+
+import copy
+
+import pytest
+
+from goblinoid.exceptions import SchemaChangeError
+from goblinoid.snapshot import diff_schema
+
+_SCHEMA = {
+    "vertex_labels": {"package": {}},
+    "edge_labels": {"depends_on": {"multiplicity": "MULTI"}},
+    "property_keys": {
+        "package_name": {"data_type": "STRING", "cardinality": "SINGLE"},
+        "weight": {"data_type": "INTEGER", "cardinality": "SINGLE", "consistency": "LOCK"},
+    },
+    "indexes": {
+        "package_name": {
+            "index_type": "composite",
+            "element": "vertex",
+            "keys": ["package_name"],
+            "index_only": False,
+            "unique": True,
+        },
+    },
+    "edge_indexes": {
+        "depends_on": {"depends_on_weight": {"keys": ["weight"], "direction": "OUT", "order": "DESC"}},
+    },
+}
+
+
+def test_diff_schema_added():
+    """Test only added schema elements are stated in changes."""
+    current = copy.deepcopy(_SCHEMA)
+    current["vertex_labels"]["person"] = {}
+    current["edge_indexes"]["depends_on"]["depends_on_weight_in"] = {"keys": ["weight"], "direction": "IN"}
+
+    assert diff_schema(_SCHEMA, current) == {
+        "vertex_labels": {"person": {}},
+        "edge_labels": {},
+        "property_keys": {},
+        "indexes": {},
+        "edge_indexes": {"depends_on": {"depends_on_weight_in": {"keys": ["weight"], "direction": "IN"}}},
+    }
+
+
+@pytest.mark.parametrize(
+    "section,path",
+    [
+        ("vertex_labels", ("package",)),
+        ("property_keys", ("package_name",)),
+        ("indexes", ("package_name",)),
+        ("edge_indexes", ("depends_on", "depends_on_weight")),
+        ("edge_indexes", ("depends_on",)),
+    ],
+)
+def test_diff_schema_removed(section, path):
+    """Test removed schema elements are reported as an error."""
+    current = copy.deepcopy(_SCHEMA)
+    parent = current[section]
+    for name in path[:-1]:
+        parent = parent[name]
+    del parent[path[-1]]
+
+    with pytest.raises(SchemaChangeError, match="was removed"):
+        diff_schema(_SCHEMA, current)
+
+
+@pytest.mark.parametrize(
+    "section,name,option,value",
+    [
+        ("property_keys", "package_name", "data_type", "LONG"),
+        ("property_keys", "package_name", "cardinality", "SET"),
+        ("edge_labels", "depends_on", "multiplicity", "SIMPLE"),
+        ("vertex_labels", "package", "partitioned", True),
+        ("indexes", "package_name", "unique", False),
+    ],
+)
+def test_diff_schema_changed(section, name, option, value):
+    """Test schema elements changed in a way JanusGraph does not support are reported as an error."""
+    current = copy.deepcopy(_SCHEMA)
+    current[section][name][option] = value
+
+    with pytest.raises(SchemaChangeError, match="changed from"):
+        diff_schema(_SCHEMA, current)
+
+
+def test_diff_schema_altered():
+    """Test changes of time-to-live and consistency modifiers are stated as alterations of existing elements."""
+    current = copy.deepcopy(_SCHEMA)
+    current["edge_labels"]["depends_on"]["ttl"] = 3600
+    del current["property_keys"]["weight"]["consistency"]
+
+    changes = diff_schema(_SCHEMA, current)
+    assert changes["edge_labels"] == {"depends_on": {"multiplicity": "MULTI", "ttl": 3600}}
+    assert changes["property_keys"] == {
+        "weight": {"data_type": "INTEGER", "cardinality": "SINGLE", "consistency": "DEFAULT"}
+    }
+    assert not changes["vertex_labels"] and not changes["indexes"] and not changes["edge_indexes"]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2018-2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Test direct schema submission against the fake Gremlin Server."""
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+from goblinoid.exceptions import SchemaSubmitError
+from goblinoid.submit import apply_schema_async
+
+from fake_server import FakeGremlinServer
+
+# Connection pool of aiogremlin passes the loop argument to asyncio primitives, removed in Python 3.10.
+pytestmark = pytest.mark.skipif(sys.version_info >= (3, 10), reason="aiogremlin does not support Python 3.10+")
+
+_SCHEMA = {
+    "vertex_labels": {"package": {}},
+    "edge_labels": {"depends_on": {"multiplicity": "MULTI"}},
+    "property_keys": {
+        "package_name": {"data_type": "STRING", "cardinality": "SINGLE"},
+        "version": {"data_type": "STRING", "cardinality": "SINGLE"},
+        "weight": {"data_type": "INTEGER", "cardinality": "SINGLE"},
+        "description": {"data_type": "STRING", "cardinality": "SINGLE"},
+    },
+    "indexes": {
+        "package_name_version": {
+            "index_type": "composite",
+            "element": "vertex",
+            "label": "package",
+            "keys": ["package_name", "version"],
+            "index_only": True,
+            "unique": True,
+        },
+    },
+    "edge_indexes": {
+        "depends_on": {"depends_on_weight": {"keys": ["weight"], "direction": "OUT", "order": "DESC"}},
+    },
+}
+
+
+def _run(coroutine):
+    """Run the given coroutine in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _apply(chunk_size=None, handler=None):
+    """Apply the test schema to a fake server, return requests recorded."""
+    async with FakeGremlinServer(handler=handler) as server:
+        await apply_schema_async(_SCHEMA, hosts=[server.host], port=server.port, chunk_size=chunk_size)
+
+    return [json.loads(bindings["schemaDescription"]) for _, bindings in server.requests]
+
+
+def test_apply_schema_one_transaction():
+    """Test schema is applied in one transaction if not chunked, so indexes are created together with keys."""
+    requests = _run(_apply())
+    assert requests == [_SCHEMA]
+
+
+def test_apply_schema_chunked():
+    """Test each index is submitted in the same chunk as keys and labels it is built on."""
+    requests = _run(_apply(chunk_size=1))
+    assert len(requests) == 3
+
+    chunks = {}
+    for chunk in requests:
+        for index_name in chunk["indexes"]:
+            chunks[index_name] = chunk
+        for label_indexes in chunk["edge_indexes"].values():
+            for index_name in label_indexes:
+                chunks[index_name] = chunk
+
+    assert set(chunks["package_name_version"]["property_keys"]) == {"package_name", "version"}
+    assert set(chunks["package_name_version"]["vertex_labels"]) == {"package"}
+    assert set(chunks["depends_on_weight"]["property_keys"]) == {"weight"}
+    assert set(chunks["depends_on_weight"]["edge_labels"]) == {"depends_on"}
+
+    submitted_keys = [key for chunk in requests for key in chunk["property_keys"]]
+    assert sorted(submitted_keys) == sorted(_SCHEMA["property_keys"])
+
+
+def test_apply_schema_error():
+    """Test errors reported by the server are raised."""
+
+    def handler(gremlin, bindings):
+        raise ValueError("Schema cannot be created")
+
+    with pytest.raises(SchemaSubmitError):
+        _run(_apply(handler=handler))
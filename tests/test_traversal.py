@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# goblinoid
+# Copyright(C) 2019 Fridolin Pokorny
+#
+# This program is free software: you can redistribute it and / or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for extraction of index lookups from traversals."""
+
+from goblinoid.traversal import EdgeLookup
+from goblinoid.traversal import GraphLookup
+from goblinoid.traversal import extract_lookups
+from goblinoid.traversal import parse_traversal
+
+
+def test_extract_graph_lookup():
+    """Test extraction of filters answered by a graph index."""
+    steps = parse_traversal("V().has('package', 'package_name', 'flask')")
+    assert extract_lookups(steps) == [GraphLookup("vertex", "package", ("package_name",), ())]
+
+
+def test_extract_edge_lookup_from_given_vertex():
+    """Test a traversal starting at a given vertex still reports filters on incident edges."""
+    steps = parse_traversal("V(12345).has('package_name', 'flask').outE('depends_on').has('since', gt(3))")
+    assert extract_lookups(steps) == [EdgeLookup("depends_on", "OUT", ("since",), None)]